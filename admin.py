@@ -1,69 +1,260 @@
-import streamlit as st
-import pandas as pd
-import sqlite3
+import datetime
+import glob
+import math
 import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import streamlit as st
+
+from app.core.config import settings
+
+PRAGUE_TZ = ZoneInfo("Europe/Prague")
+
+# Embedded client of a booking; !inner when the client search has to filter the bookings
+CLIENT_COLUMNS = "full_name, phone_number"
+BOOKING_COLUMNS = "id, start_time, service_type, gcal_event_id, tenant_id"
+
+ALL = "Vše"
+
+
+@dataclass(frozen=True)
+class BookingFilters:
+    """Dashboard filters, applied by Supabase (dates are Prague days, both inclusive)."""
+    date_from: datetime.date
+    date_to: datetime.date
+    service: Optional[str] = None
+    client: Optional[str] = None
+    tenant: Optional[str] = None
+
+    def time_range(self) -> Tuple[datetime.datetime, datetime.datetime]:
+        """[start, end) covering the selected days."""
+        start = datetime.datetime.combine(self.date_from, datetime.time.min, tzinfo=PRAGUE_TZ)
+        end = datetime.datetime.combine(self.date_to + datetime.timedelta(days=1), datetime.time.min, tzinfo=PRAGUE_TZ)
+        return start, end
+
+    def search_term(self) -> Optional[str]:
+        """Client search without the characters PostgREST uses in or=(...) filters."""
+        if not self.client:
+            return None
+        term = "".join(ch for ch in self.client if ch not in ',()*%\\"').strip()
+        return term or None
+
+    def rpc_params(self) -> dict:
+        start, end = self.time_range()
+        return {
+            "p_from": start.isoformat(),
+            "p_to": end.isoformat(),
+            "p_service": self.service,
+            "p_client": self.search_term(),
+            "p_tenant": self.tenant,
+        }
+
+
+def bookings_query(client, filters: BookingFilters):
+    """Filtered select over bookings (with the client's name and phone), no paging yet."""
+    start, end = filters.time_range()
+    term = filters.search_term()
+    embed = "clients!inner" if term else "clients"
+    query = client.table('bookings')\
+        .select(f"{BOOKING_COLUMNS}, {embed}({CLIENT_COLUMNS})")\
+        .gte('start_time', start.isoformat())\
+        .lt('start_time', end.isoformat())
+    if filters.service:
+        query = query.eq('service_type', filters.service)
+    if filters.tenant:
+        query = query.eq('tenant_id', filters.tenant)
+    if term:
+        query = query.or_(f"full_name.ilike.*{term}*,phone_number.ilike.*{term}*", reference_table='clients')
+    return query
+
+
+def fetch_page(client, filters: BookingFilters, page: int, page_size: int) -> List[dict]:
+    """One page (0-based) of bookings, newest first. Only these rows leave the database."""
+    offset = page * page_size
+    response = bookings_query(client, filters)\
+        .order('start_time', desc=True)\
+        .order('id', desc=True)\
+        .range(offset, offset + page_size - 1)\
+        .execute()
+    return response.data or []
+
+
+def fetch_metrics(client, filters: BookingFilters) -> dict:
+    """
+    Aggregates computed by admin_booking_metrics (sql/admin_metrics.sql):
+    {'bookings', 'clients', 'by_service': [{'service_type', 'bookings', 'clients'}]}
+    """
+    rows = client.rpc('admin_booking_metrics', filters.rpc_params()).execute().data or []
+    total = next((row for row in rows if row.get('is_total')), {})
+    return {
+        'bookings': int(total.get('bookings') or 0),
+        'clients': int(total.get('clients') or 0),
+        'by_service': [
+            {'service_type': row['service_type'], 'bookings': int(row['bookings']), 'clients': int(row['clients'])}
+            for row in rows if not row.get('is_total')
+        ],
+    }
+
+
+def fetch_per_day(client, filters: BookingFilters) -> List[dict]:
+    """[{'day', 'bookings'}] from admin_bookings_per_day."""
+    return client.rpc('admin_bookings_per_day', filters.rpc_params()).execute().data or []
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, math.ceil(total / page_size))
+
+
+def to_frame(rows: List[dict]) -> pd.DataFrame:
+    """Flattens the embedded client and converts start_time to Prague time."""
+    records = []
+    for row in rows:
+        client = row.get('clients') or {}
+        start = row.get('start_time')
+        records.append({
+            'start_time': pd.Timestamp(start).tz_convert(PRAGUE_TZ) if start else None,
+            'full_name': client.get('full_name'),
+            'phone_number': client.get('phone_number'),
+            'service_type': row.get('service_type'),
+            'tenant_id': row.get('tenant_id'),
+            'id': row.get('id'),
+            'gcal_event_id': row.get('gcal_event_id'),
+        })
+    return pd.DataFrame.from_records(records, columns=[
+        'start_time', 'full_name', 'phone_number', 'service_type', 'tenant_id', 'id', 'gcal_event_id',
+    ])
 
-# Page Config
-st.set_page_config(
-    page_title="Wellness Admin",
-    page_icon="📅",
-    layout="centered"
-)
 
-# Header
-st.title("Wellness Pohoda - Admin Panel")
+def tenant_ids() -> List[str]:
+    """Tenants configured in TENANTS_DIR (file names without .json)."""
+    paths = glob.glob(os.path.join(settings.TENANTS_DIR, "*.json"))
+    return sorted(os.path.splitext(os.path.basename(path))[0] for path in paths)
 
-# Database Connection
-DB_FILE = "wellness.db"
 
-def load_data():
-    if not os.path.exists(DB_FILE):
-        return None
-    
+# --- Streamlit ---
+
+@st.cache_resource
+def get_client():
+    """One sync Supabase client per dashboard process."""
+    from supabase import create_client
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+
+
+@st.cache_data(ttl=settings.ADMIN_CACHE_TTL_SECONDS, show_spinner=False)
+def load_page(filters: BookingFilters, page: int, page_size: int) -> List[dict]:
+    return fetch_page(get_client(), filters, page, page_size)
+
+
+@st.cache_data(ttl=settings.ADMIN_CACHE_TTL_SECONDS, show_spinner=False)
+def load_metrics(filters: BookingFilters) -> dict:
+    return fetch_metrics(get_client(), filters)
+
+
+@st.cache_data(ttl=settings.ADMIN_CACHE_TTL_SECONDS, show_spinner=False)
+def load_per_day(filters: BookingFilters) -> List[dict]:
+    return fetch_per_day(get_client(), filters)
+
+
+def sidebar_filters() -> BookingFilters:
+    today = datetime.datetime.now(PRAGUE_TZ).date()
+    st.sidebar.header("Filtry")
+    selected = st.sidebar.date_input(
+        "Období",
+        value=(today - datetime.timedelta(days=30), today + datetime.timedelta(days=30)),
+        format="DD.MM.YYYY",
+    )
+    # While picking the range the widget returns a single day
+    date_from, date_to = (selected[0], selected[-1]) if isinstance(selected, (list, tuple)) and selected else (today, today)
+
+    tenant = None
+    tenants = tenant_ids()
+    if tenants:
+        choice = st.sidebar.selectbox("Provozovna", [ALL] + tenants)
+        tenant = None if choice == ALL else choice
+
+    # Service names come from the aggregate over the period, not from the rows
+    services = [row['service_type'] for row in load_metrics(BookingFilters(date_from, date_to, tenant=tenant))['by_service']]
+    service = st.sidebar.selectbox("Služba", [ALL] + services)
+    client = st.sidebar.text_input("Klient (jméno nebo telefon)").strip()
+
+    return BookingFilters(
+        date_from=date_from,
+        date_to=date_to,
+        service=None if service == ALL else service,
+        client=client or None,
+        tenant=tenant,
+    )
+
+
+def main():
+    st.set_page_config(
+        page_title="Wellness Admin",
+        page_icon="📅",
+        layout="wide"
+    )
+    st.title("Wellness Pohoda - Admin Panel")
+
+    if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+        st.error("Chybí SUPABASE_URL nebo SUPABASE_KEY.")
+        st.stop()
+
+    if st.button("Obnovit data"):
+        st.cache_data.clear()
+        st.rerun()
+
     try:
-        conn = sqlite3.connect(DB_FILE)
-        # Load data sorting by ID descending (newest first)
-        df = pd.read_sql_query("SELECT * FROM booking ORDER BY id DESC", conn)
-        conn.close()
-        return df
+        filters = sidebar_filters()
+        metrics = load_metrics(filters)
     except Exception as e:
         st.error(f"Chyba při čtení databáze: {e}")
-        return None
-
-# Load Data
-if st.button("Obnovit data"):
-    st.rerun()
-
-df = load_data()
-
-if df is not None and not df.empty:
-    # Metrics
-    total_bookings = len(df)
-    
-    # Try to verify if 'service' column exists for grouping, otherwise simple count
-    unique_services = df['service'].nunique() if 'service' in df.columns else 0
-    
-    col1, col2 = st.columns(2)
-    col1.metric("Celkový počet rezervací", total_bookings)
-    col2.metric("Typy služeb", unique_services)
-    
-    # Data Table
-    st.subheader("Seznam rezervací")
-    st.dataframe(
-        df, 
-        use_container_width=True,
-        column_config={
-            "created_at": st.column_config.DatetimeColumn("Vytvořeno", format="D.M.YYYY HH:mm"),
-            "day": "Den",
-            "time": "Čas",
-            "name": "Jméno",
-            "service": "Služba",
-            "id": "ID"
-        }
-    )
-else:
-    st.info("Zatím žádné rezervace nebo databáze neexistuje.")
+        st.stop()
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Celkový počet rezervací", metrics['bookings'])
+    col2.metric("Klienti", metrics['clients'])
+    col3.metric("Typy služeb", len(metrics['by_service']))
+
+    if not metrics['bookings']:
+        st.info("Pro zvolené filtry nejsou žádné rezervace.")
+    else:
+        per_day = load_per_day(filters)
+        if per_day:
+            st.bar_chart(pd.DataFrame(per_day).set_index('day')['bookings'])
+        if metrics['by_service']:
+            st.dataframe(
+                pd.DataFrame(metrics['by_service']),
+                hide_index=True,
+                column_config={"service_type": "Služba", "bookings": "Rezervace", "clients": "Klienti"},
+            )
+
+        # Data Table
+        page_size = settings.ADMIN_PAGE_SIZE
+        pages = page_count(metrics['bookings'], page_size)
+        st.subheader("Seznam rezervací")
+        page = st.number_input("Stránka", min_value=1, max_value=pages, value=1, step=1) - 1
+        st.caption(f"Stránka {page + 1} / {pages} • {metrics['bookings']} rezervací")
+        st.dataframe(
+            to_frame(load_page(filters, page, page_size)),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "start_time": st.column_config.DatetimeColumn("Termín", format="D.M.YYYY HH:mm"),
+                "full_name": "Jméno",
+                "phone_number": "Telefon",
+                "service_type": "Služba",
+                "tenant_id": "Provozovna",
+                "id": "ID",
+                "gcal_event_id": "Google Calendar",
+            }
+        )
+
+    # Footer
+    st.markdown("---")
+    st.caption("AI Voice Receptionist System • Wellness Pohoda")
+
 
-# Footer
-st.markdown("---")
-st.caption("AI Voice Receptionist System • Wellness Pohoda")
+if __name__ == "__main__":
+    main()
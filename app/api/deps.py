@@ -0,0 +1,31 @@
+from fastapi import Depends, Request
+
+from app.services.booking_service import BookingService
+from app.services.container import ServiceContainer
+from app.services.tenants import TenantRegistry
+
+
+def get_container(request: Request) -> ServiceContainer:
+    """
+    Returns the application-scoped service container.
+    Created lazily when the lifespan did not run (e.g. TestClient without a `with` block).
+    """
+    container = getattr(request.app.state, "container", None)
+    if container is None:
+        container = ServiceContainer.create()
+        request.app.state.container = container
+    return container
+
+
+def get_tenants(request: Request, container: ServiceContainer = Depends(get_container)) -> TenantRegistry:
+    """Tenant registry of the app (built around the current default container when missing)."""
+    tenants = getattr(request.app.state, "tenants", None)
+    if tenants is None or tenants.default is not container:
+        tenants = TenantRegistry(container)
+        tenants.load()
+        request.app.state.tenants = tenants
+    return tenants
+
+
+def get_booking_service(container: ServiceContainer = Depends(get_container)) -> BookingService:
+    return container.booking
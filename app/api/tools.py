@@ -1,15 +1,20 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, BackgroundTasks, Depends
 from pydantic import BaseModel
 from typing import Optional
 from app.services.booking_service import BookingService
+from app.api.deps import get_booking_service
 from datetime import datetime
 
 router = APIRouter()
-booking_service = BookingService()
 
 class CheckAvailabilityRequest(BaseModel):
     day: str
     time: str
+    staff: Optional[str] = None
+
+class FindFreeSlotsRequest(BaseModel):
+    day: str
+    staff: Optional[str] = None
 
 class BookAppointmentRequest(BaseModel):
     day: str
@@ -17,6 +22,7 @@ class BookAppointmentRequest(BaseModel):
     name: str
     phone: str
     service: Optional[str] = "general"
+    staff: Optional[str] = None
 
 class GetBookingRequest(BaseModel):
     phone: str
@@ -25,19 +31,24 @@ class CancelBookingRequest(BaseModel):
     phone: str
 
 @router.post("/tools/check_availability")
-async def check_availability(req: CheckAvailabilityRequest):
-    result = await booking_service.check_availability(req.day, req.time)
+async def check_availability(req: CheckAvailabilityRequest, booking_service: BookingService = Depends(get_booking_service)):
+    result = await booking_service.check_availability(req.day, req.time, staff=req.staff)
+    return {"result": result}
+
+@router.post("/tools/find_free_slots")
+async def find_free_slots(req: FindFreeSlotsRequest, booking_service: BookingService = Depends(get_booking_service)):
+    result = await booking_service.get_free_slots(req.day, staff=req.staff)
     return {"result": result}
 
 @router.post("/tools/book_appointment")
-async def book_appointment(req: BookAppointmentRequest, background_tasks: BackgroundTasks):
+async def book_appointment(req: BookAppointmentRequest, background_tasks: BackgroundTasks, booking_service: BookingService = Depends(get_booking_service)):
     result = await booking_service.book_appointment(
-        req.day, req.time, req.name, req.phone, req.service, background_tasks
+        req.day, req.time, req.name, req.phone, req.service, background_tasks, staff=req.staff
     )
     return {"message": result}
 
 @router.post("/tools/get_booking")
-async def get_booking(req: GetBookingRequest):
+async def get_booking(req: GetBookingRequest, booking_service: BookingService = Depends(get_booking_service)):
     # Normalize phone
     phone = req.phone.replace(" ", "").strip()
     
@@ -64,7 +75,7 @@ async def get_booking(req: GetBookingRequest):
         return {"exists": False}
 
 @router.post("/tools/cancel_booking")
-async def cancel_booking(req: CancelBookingRequest, background_tasks: BackgroundTasks):
+async def cancel_booking(req: CancelBookingRequest, background_tasks: BackgroundTasks, booking_service: BookingService = Depends(get_booking_service)):
     # Normalize phone
     phone = req.phone.replace(" ", "").strip()
     
@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Request, Depends, BackgroundTasks
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set
 
 from app.services.booking_service import BookingService
 from app.services.llm_service import get_assistant_config
 from app.core.logger import logger
+from app.core.config import settings
+from app.core.tracing import set_trace_id, span
+from app.api.deps import get_booking_service, get_tenants
+from app.services.tenants import TenantRegistry
 
 # logger = logging.getLogger(__name__) # Use central logger
 
@@ -13,16 +18,25 @@ router = APIRouter()
 @router.post("/webhook")
 async def vapi_webhook(
     request: Request,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    booking_service: BookingService = Depends(get_booking_service),
+    tenants: TenantRegistry = Depends(get_tenants),
 ) -> Dict[str, Any]:
     """
     Handle incoming webhooks from Vapi.ai manually to avoid validation errors
     and provide better debugging functionality.
+    Requests of a registered tenant (assistant ID or called number) use that tenant's services.
     """
     try:
         payload = await request.json()
         message = payload.get("message", {})
         msg_type = message.get("type")
+        # Every span and log line of this request (incl. background sends) carries the Vapi call ID
+        set_trace_id(_call_id(message))
+
+        tenant = tenants.find(_assistant_id(message), _called_number(message))
+        if tenant is not None:
+            booking_service = tenant.booking
         
         # 1. Message Filtering
         if msg_type == "assistant-request":
@@ -41,91 +55,45 @@ async def vapi_webhook(
         # Handle specific message types
         if msg_type == "assistant-request":
             logger.info("Handling assistant-request")
-            return {"assistant": get_assistant_config()}
+            # A tenant's number/assistant gets that shop's greeting, same as its tool calls
+            return {"assistant": get_assistant_config(tenant.booking.company if tenant is not None else None)}
 
         # 2. Processing Tool Calls
         if msg_type == "tool-calls":
             tool_calls = message.get("toolCalls", [])
-            booking_service = BookingService()
-            results = []
-
-            for tool_call in tool_calls:
-                call_id = tool_call.get("id")
-                function_def = tool_call.get("function", {})
-                function_name = function_def.get("name")
-                arguments = function_def.get("arguments", {})
-
-                # 3. Explicit Logging
-                logger.info(f"🔔 ZACHYCENO VOLÁNÍ: {function_name}")
-                # logger.debug(f"📦 ARGUMENTY: {arguments}")
-
-                result_content = "Error: Function not found"
-
-                # 4. Error Handling Block
-                try:
-                    if function_name == "check_availability":
-                        day = arguments.get("day")
-                        time = arguments.get("time")
-                        result_content = await booking_service.check_availability(day, time)
-                        
-                    elif function_name == "book_appointment":
-                        day = arguments.get("day")
-                        time = arguments.get("time")
-                        name = arguments.get("name")
-                        
-                        # 1. Robust Phone Extraction
-                        phone = arguments.get("phone")
-                        if not phone:
-                             logger.info("⚠️ Phone missing in args, trying Caller ID from payload...")
-                             try:
-                                 phone = message.get("call", {}).get("customer", {}).get("number")
-                                 if phone:
-                                     logger.info(f"✅ Found Phone in Caller ID: {phone}")
-                             except:
-                                 pass
-                        
-                        if not phone:
-                            # ENABLE TEST MODE FALLBACK
-                            phone = "+420777000000"
-                            if not name:
-                                name = "Vapi Tester"
-                            logger.warning(f"⚠️ Používám FALLBACK testovací číslo {phone} (volání z webu?)")
-
-                        service = arguments.get("service", "General Service")
-                        # book_appointment signature: (day, time, name, phone, service)
-                        result_content = await booking_service.book_appointment(
-                            day, time, name, phone, service, background_tasks=background_tasks
-                        )
-
-                    elif function_name == "cancel_booking":
-                         # 1. Robust Phone Extraction for cancellation too
-                        phone = arguments.get("phone")
-                        if not phone:
-                             try:
-                                 phone = message.get("call", {}).get("customer", {}).get("number")
-                             except:
-                                 pass
-                        
-                        if not phone:
-                            phone = "+420777000000" # Test fallback
-                            logger.warning(f"⚠️ CANCEL: Používám FALLBACK číslo {phone}")
-
-                        result_content = await booking_service.cancel_booking(phone, background_tasks=background_tasks)
-
-                    else:
-                        logger.warning(f"⚠️ Unknown function name: {function_name}")
-
-                except Exception as e:
-                    # Capture full traceback
-                    logger.error(f"❌ CHYBA VE FUNKCI {function_name}: {e}", exc_info=True)
-                    result_content = f"Došlo k chybě při zpracování požadavku: {str(e)}"
-
-                results.append({
-                    "toolCallId": call_id,
-                    "result": result_content
-                })
+
+            # Read-only tool calls run concurrently, writes (book/cancel) one after another in
+            # message order (a reschedule is cancel + book). Results keep the toolCallId order.
+            semaphore = asyncio.Semaphore(settings.TOOL_CALL_CONCURRENCY)
+
+            async def run_limited(tool_call: Dict[str, Any], request_tasks: "_RequestTasks", after: Optional[asyncio.Task]) -> str:
+                if after is not None:
+                    await asyncio.wait([after])
+                async with semaphore:
+                    with span(_tool_span_name(tool_call)):
+                        return await _execute_tool_call(booking_service, tool_call, message, request_tasks)
+
+            with span("webhook.tool_calls"):
+                tasks, calls = [], []
+                previous_write: Optional[asyncio.Task] = None
+                for tool_call in tool_calls:
+                    request_tasks = _RequestTasks(background_tasks)
+                    is_write = tool_call.get("function", {}).get("name") in WRITE_TOOL_NAMES
+                    task = asyncio.ensure_future(run_limited(tool_call, request_tasks, previous_write if is_write else None))
+                    if is_write:
+                        previous_write = task
+                    tasks.append(task)
+                    calls.append(request_tasks)
+                contents = await asyncio.gather(*(
+                    _with_deadline(task, tool_call.get("function", {}).get("name"), request_tasks)
+                    for task, tool_call, request_tasks in zip(tasks, tool_calls, calls)
+                ))
+
+            results = [
+                {"toolCallId": tool_call.get("id"), "result": content}
+                for tool_call, content in zip(tool_calls, contents)
+            ]
             
-            # Return Vapi structured response
             # Return Vapi structured response
             response = {"results": results}
             # logger.debug(f"📤 ODPOVĚĎ PRO VAPI: {response}")
@@ -137,3 +105,166 @@ async def vapi_webhook(
         logger.error("❌ CRITICAL WEBHOOK ERROR:", exc_info=True)
         # Return a safe empty dict or error structure to prevent timeout hang if possible
         return {}
+
+
+# Tools the assistant can call (anything else is traced as tool.unknown)
+TOOL_NAMES = frozenset({"check_availability", "find_free_slots", "book_appointment", "cancel_booking"})
+
+# Tools that change bookings, never run concurrently with each other
+WRITE_TOOL_NAMES = frozenset({"book_appointment", "cancel_booking"})
+
+HOLD_MESSAGE = "Vydržte prosím moment, ještě to pro vás ověřuji."
+
+# Tool calls that outlived their deadline keep running here (e.g. a booking in progress)
+_background_tool_tasks: Set[asyncio.Task] = set()
+
+
+class _RequestTasks:
+    """
+    BackgroundTasks of one tool call. Once the call missed its deadline the response is gone
+    and BackgroundTasks will never run, so later tasks are started on the loop instead.
+    """
+
+    def __init__(self, background_tasks: Optional[BackgroundTasks]):
+        self.background_tasks = background_tasks
+        self.detached = False
+
+    def add_task(self, func, *args, **kwargs):
+        if self.background_tasks is not None and not self.detached:
+            self.background_tasks.add_task(func, *args, **kwargs)
+            return
+        if asyncio.iscoroutinefunction(func):
+            task = asyncio.ensure_future(func(*args, **kwargs))
+        else:
+            task = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+        _background_tool_tasks.add(task)
+        task.add_done_callback(_background_tool_tasks.discard)
+
+
+async def _with_deadline(task: asyncio.Task, function_name: Optional[str], request_tasks: Optional[_RequestTasks] = None) -> str:
+    """
+    Waits for a tool call up to TOOL_CALL_TIMEOUT_SECONDS.
+    A slow call is not cancelled (it may be half-way through a booking), it finishes
+    in the background and Vapi gets a "please hold" result instead of a timeout.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), settings.TOOL_CALL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️ {function_name} nestihl deadline {settings.TOOL_CALL_TIMEOUT_SECONDS}s, odpovídám 'vydržte'.")
+        if request_tasks is not None:
+            request_tasks.detached = True
+        _background_tool_tasks.add(task)
+        task.add_done_callback(_background_tool_tasks.discard)
+        return HOLD_MESSAGE
+
+
+def _call_id(message: Dict[str, Any]) -> Optional[str]:
+    call = message.get("call")
+    return call.get("id") if isinstance(call, dict) else None
+
+
+def _assistant_id(message: Dict[str, Any]) -> Optional[str]:
+    assistant = message.get("assistant")
+    if isinstance(assistant, dict) and assistant.get("id"):
+        return assistant["id"]
+    call = message.get("call")
+    return call.get("assistantId") if isinstance(call, dict) else None
+
+
+def _called_number(message: Dict[str, Any]) -> Optional[str]:
+    # The shop's number the customer dialled (not the caller, see _caller_phone)
+    phone_number = message.get("phoneNumber")
+    if not isinstance(phone_number, dict):
+        call = message.get("call")
+        phone_number = call.get("phoneNumber") if isinstance(call, dict) else None
+    return phone_number.get("number") if isinstance(phone_number, dict) else None
+
+
+def _tool_span_name(tool_call: Dict[str, Any]) -> str:
+    # Span names must stay low-cardinality, the function name comes from the caller
+    function_name = tool_call.get("function", {}).get("name")
+    return f"tool.{function_name}" if function_name in TOOL_NAMES else "tool.unknown"
+
+
+def _caller_phone(message: Dict[str, Any]) -> Optional[str]:
+    try:
+        return message.get("call", {}).get("customer", {}).get("number")
+    except Exception:
+        return None
+
+
+async def _execute_tool_call(
+    booking_service: BookingService,
+    tool_call: Dict[str, Any],
+    message: Dict[str, Any],
+    background_tasks: Optional[BackgroundTasks]
+) -> str:
+    """
+    Executes a single Vapi tool call and returns its result content.
+    """
+    function_def = tool_call.get("function", {})
+    function_name = function_def.get("name")
+    arguments = function_def.get("arguments", {})
+
+    # 3. Explicit Logging
+    logger.info(f"🔔 ZACHYCENO VOLÁNÍ: {function_name}")
+    # logger.debug(f"📦 ARGUMENTY: {arguments}")
+
+    result_content = "Error: Function not found"
+
+    # 4. Error Handling Block
+    try:
+        if function_name == "check_availability":
+            day = arguments.get("day")
+            time = arguments.get("time")
+            result_content = await booking_service.check_availability(day, time, staff=arguments.get("staff"))
+
+        elif function_name == "find_free_slots":
+            day = arguments.get("day")
+            result_content = await booking_service.get_free_slots(day, staff=arguments.get("staff"))
+            
+        elif function_name == "book_appointment":
+            day = arguments.get("day")
+            time = arguments.get("time")
+            name = arguments.get("name")
+            
+            # 1. Robust Phone Extraction
+            phone = arguments.get("phone")
+            if not phone:
+                 logger.info("⚠️ Phone missing in args, trying Caller ID from payload...")
+                 phone = _caller_phone(message)
+                 if phone:
+                     logger.info(f"✅ Found Phone in Caller ID: {phone}")
+            
+            if not phone:
+                # ENABLE TEST MODE FALLBACK
+                phone = "+420777000000"
+                if not name:
+                    name = "Vapi Tester"
+                logger.warning(f"⚠️ Používám FALLBACK testovací číslo {phone} (volání z webu?)")
+
+            service = arguments.get("service", "General Service")
+            # book_appointment signature: (day, time, name, phone, service)
+            result_content = await booking_service.book_appointment(
+                day, time, name, phone, service, background_tasks=background_tasks, staff=arguments.get("staff")
+            )
+
+        elif function_name == "cancel_booking":
+             # 1. Robust Phone Extraction for cancellation too
+            phone = arguments.get("phone") or _caller_phone(message)
+            
+            if not phone:
+                phone = "+420777000000" # Test fallback
+                logger.warning(f"⚠️ CANCEL: Používám FALLBACK číslo {phone}")
+
+            result_content = await booking_service.cancel_booking(phone, background_tasks=background_tasks)
+
+        else:
+            logger.warning(f"⚠️ Unknown function name: {function_name}")
+
+    except Exception as e:
+        # Capture full traceback
+        logger.error(f"❌ CHYBA VE FUNKCI {function_name}: {e}", exc_info=True)
+        result_content = f"Došlo k chybě při zpracování požadavku: {str(e)}"
+
+    return result_content
@@ -7,10 +7,19 @@ class Settings(BaseSettings):
     # Server
     PORT: int = 8000
     ENVIRONMENT: str = "development"
+
+    # Logging: async = stdout written by a background thread (bounded queue, drops INFO when full)
+    LOG_LEVEL: str = "INFO"
+    LOG_ASYNC: bool = True
+    LOG_JSON: bool = False
+    LOG_QUEUE_SIZE: int = 10000
     
     # Vapi
     VAPI_PRIVATE_KEY: str = ""
     VAPI_ORG_ID: str = ""
+    # Tool calls within one webhook run concurrently (limit) and each has a deadline
+    TOOL_CALL_CONCURRENCY: int = 4
+    TOOL_CALL_TIMEOUT_SECONDS: float = 8.0
     
     # OpenAI
     OPENAI_API_KEY: str = ""
@@ -21,20 +30,55 @@ class Settings(BaseSettings):
     # Google
     GOOGLE_CALENDAR_ID: str = "primary"
     GOOGLE_CREDENTIALS_JSON: str = ""
+    CALENDAR_SYNC_INTERVAL_SECONDS: int = 30
+    CALENDAR_CACHE_MAX_STALENESS_SECONDS: int = 90
+
+    # Multi-tenant: one company config per file, routed by Vapi assistant ID or called number
+    TENANTS_DIR: str = "data/tenants"
     
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
-    
+    CLIENT_CACHE_TTL_SECONDS: int = 300
+    CLIENT_CACHE_MAX_SIZE: int = 1024
+
+    # Admin dashboard (admin.py): rows per page, seconds a query result is reused
+    ADMIN_PAGE_SIZE: int = 50
+    ADMIN_CACHE_TTL_SECONDS: int = 60
+
     # Notifications
     GOSMS_CLIENT_ID: str = ""
     GOSMS_CLIENT_SECRET: str = ""
     GOSMS_CHANNEL_ID: str = ""
+    GOSMS_BASE_URL: str = "https://app.gosms.cz"
+    GOSMS_MAX_CONCURRENCY: int = 5
+    GOSMS_MAX_RETRIES: int = 3
+    GOSMS_BACKOFF_BASE_SECONDS: float = 0.5
+    GOSMS_REQUESTS_PER_SECOND: float = 5
+    GOSMS_MAX_RECIPIENTS_PER_REQUEST: int = 100
     
     SMTP_SERVER: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_USERNAME: str = ""
     SMTP_PASSWORD: str = ""
+    SMTP_POOL_SIZE: int = 2
+    SMTP_IDLE_TIMEOUT_SECONDS: int = 240
+
+    # Notification outbox (SQLite next to wellness.db), drained by a background worker
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_PATH: str = "outbox.db"
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_BATCH_SIZE: int = 20
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    # Sent messages are deleted after this long (dead letters are kept)
+    OUTBOX_RETENTION_HOURS: float = 168
+
+    # Appointment reminders (offsets/template in company_config.json -> notifications).
+    # Opt-in: clients get SMS they never asked for only once a deployment turns this on
+    REMINDERS_ENABLED: bool = False
+    REMINDER_REFRESH_INTERVAL_SECONDS: int = 300
+    REMINDER_GRACE_SECONDS: int = 3600
+    REMINDER_PAGE_SIZE: int = 500
 
     class Config:
         env_file = ".env"
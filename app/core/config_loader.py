@@ -1,34 +1,117 @@
 import json
 import os
 import logging
+import threading
+import time
 from typing import Dict, Any, Optional
 
+from pydantic import ValidationError
+
+from app.models.config_models import CompanyConfig
+
 logger = logging.getLogger("app")
 
 CONFIG_PATH = "data/company_config.json"
 
-def load_company_config() -> Dict[str, Any]:
+
+def _read_config(path: str) -> CompanyConfig:
     """
-    Loads company configuration from JSON file.
-    Raises FileNotFoundError if config is missing.
-    Returns: Dict containing config.
+    Reads and validates the config file.
+    Raises FileNotFoundError if config is missing, ValueError if it is invalid.
     """
-    if not os.path.exists(CONFIG_PATH):
-        logger.critical(f"❌ Křehká chyba: Konfigurační soubor '{CONFIG_PATH}' nebyl nalezen! Aplikace nemůže startovat.")
-        raise FileNotFoundError(f"Configuration file not found at {CONFIG_PATH}")
+    if not os.path.exists(path):
+        logger.critical(f"❌ Křehká chyba: Konfigurační soubor '{path}' nebyl nalezen! Aplikace nemůže startovat.")
+        raise FileNotFoundError(f"Configuration file not found at {path}")
 
     try:
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            logger.info(f"✅ Konfigurace načtena pro: {config.get('company_name', 'Unknown')}")
-            return config
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        config = CompanyConfig.from_raw(raw)
+        logger.info(f"✅ Konfigurace načtena pro: {config.company_name}")
+        return config
     except json.JSONDecodeError as e:
         logger.critical(f"❌ Chyba parsování JSON konfigurace: {e}")
         raise ValueError(f"Invalid JSON in config file: {e}")
+    except ValidationError as e:
+        logger.critical(f"❌ Neplatná konfigurace: {e}")
+        raise ValueError(f"Invalid config file: {e}")
     except Exception as e:
         logger.critical(f"❌ Neočekávaná chyba při načítání konfigurace: {e}")
         raise e
 
+
+class CompanyConfigRegistry:
+    """
+    Parses company_config.json once into a typed CompanyConfig.
+    The file is re-read only when its mtime changes (checked at most every
+    check_interval_seconds) or on an explicit reload().
+    A broken edit keeps the last good config running.
+    """
+
+    def __init__(self, path: str = CONFIG_PATH, check_interval_seconds: float = 1.0):
+        self.path = path
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        self._config: Optional[CompanyConfig] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    def get(self) -> CompanyConfig:
+        config = self._config
+        if config is not None and time.monotonic() - self._checked_at < self.check_interval_seconds:
+            return config
+
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+
+            if self._config is None or mtime != self._mtime:
+                self._load(mtime)
+            return self._config
+
+    def reload(self) -> CompanyConfig:
+        """Forces a re-read of the file (admin trigger)."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+            self._load(mtime)
+            self._checked_at = time.monotonic()
+            return self._config
+
+    def _load(self, mtime: Optional[float]):
+        try:
+            self._config = _read_config(self.path)
+            self._mtime = mtime
+        except (FileNotFoundError, ValueError):
+            if self._config is None:
+                raise
+            # Keep serving the last good config, retry when the file changes again
+            self._mtime = mtime
+            logger.error(f"⚠️ Ponechávám předchozí konfiguraci pro: {self._config.company_name}")
+
+
+config_registry = CompanyConfigRegistry()
+
+
+def get_company_config() -> CompanyConfig:
+    """Returns the typed company config (memoized, hot-reloaded)."""
+    return config_registry.get()
+
+
+def load_company_config() -> Dict[str, Any]:
+    """
+    Returns company configuration as a dict (memoized, see CompanyConfigRegistry).
+    Raises FileNotFoundError if config is missing.
+    Returns: Dict containing config.
+    """
+    return config_registry.get().raw
+
+
 def get_business_hours(config: Dict[str, Any], day_name: str) -> Optional[Dict[str, str]]:
     """
     Helper to get business hours for a specific day (monday, tuesday...).
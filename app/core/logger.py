@@ -1,53 +1,199 @@
+import atexit
+import json
+import logging
+import queue
 import sys
+import threading
+import traceback
+from functools import lru_cache
+from typing import Optional, TextIO
+
 from loguru import logger
-import logging
+
+from app.core.config import settings
+from app.core.tracing import get_trace_id
+
+TEXT_FORMAT = "{time} | {level: <8} | {name}:{function}:{line} - {message}"
+
+
+@lru_cache(maxsize=None)
+def _loguru_level(levelname: str, levelno: int):
+    try:
+        return logger.level(levelname).name
+    except ValueError:
+        return levelno
+
+
+@lru_cache(maxsize=4096)
+def _call_site_logger(name: str, function: str, line: int):
+    """Loguru logger pinned to a stdlib call site (one per site, reused for every record)."""
+    return logger.patch(lambda record: record.update(name=name, function=function, line=line))
+
+
+def _add_trace_id(record):
+    trace_id = get_trace_id()
+    if trace_id:
+        record["extra"]["trace_id"] = trace_id
+
 
 class InterceptHandler(logging.Handler):
+    """
+    Forwards stdlib logging (uvicorn, our logging.getLogger users) to Loguru.
+    The call site is taken from the LogRecord instead of walking the stack per record.
+    """
+
     def emit(self, record):
-        # Get corresponding Loguru level if it exists
+        level = _loguru_level(record.levelname, record.levelno)
+        site = _call_site_logger(record.name, record.funcName, record.lineno)
+        site.opt(exception=record.exc_info).log(level, record.getMessage())
+
+
+class BackgroundSink:
+    """
+    Loguru sink that only enqueues the record; a daemon thread formats and writes it.
+    The queue is bounded: when it is full, records below WARNING are dropped (and counted)
+    so logging never blocks a request, WARNING and above wait up to block_timeout.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        json_lines: bool = False,
+        max_queue: int = 10000,
+        block_timeout: float = 0.05,
+    ):
+        self.stream = stream
+        self.json_lines = json_lines
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message):
+        record = message.record
         try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if record["level"].no >= logging.WARNING:
+                try:
+                    self._queue.put(record, timeout=self.block_timeout)
+                    return
+                except queue.Full:
+                    pass
+            self.dropped += 1
 
-        # Find caller from where originated the logged message
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
+    def format(self, record: dict) -> str:
+        if self.json_lines:
+            entry = {
+                "ts": record["time"].isoformat(),
+                "level": record["level"].name,
+                "logger": record["name"],
+                "function": record["function"],
+                "line": record["line"],
+                "msg": record["message"],
+            }
+            if record["extra"]:
+                entry["extra"] = {key: str(value) for key, value in record["extra"].items()}
+            if record["exception"]:
+                entry["exception"] = "".join(traceback.format_exception(*record["exception"])).rstrip()
+            return json.dumps(entry, ensure_ascii=False) + "\n"
+
+        text = TEXT_FORMAT.format(
+            time=record["time"].strftime("%Y-%m-%d %H:%M:%S"),
+            level=record["level"].name,
+            name=record["name"],
+            function=record["function"],
+            line=record["line"],
+            message=record["message"],
+        )
+        if record["exception"]:
+            text += "\n" + "".join(traceback.format_exception(*record["exception"])).rstrip()
+        return text + "\n"
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is None:
+                    return
+                if self.dropped != self._reported_dropped:
+                    self.stream.write(f"⚠️ Log queue full, dropped {self.dropped - self._reported_dropped} records\n")
+                    self._reported_dropped = self.dropped
+                self.stream.write(self.format(record))
+                if self._queue.empty():
+                    self.stream.flush()
+            except Exception:
+                pass
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until everything queued so far is written."""
+        self._queue.join()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join(timeout=2)
+
+
+_sink: Optional[BackgroundSink] = None
 
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
 
 def setup_logging():
+    global _sink
     # Remove all existing handlers
     logging.getLogger().handlers = [InterceptHandler()]
-    
+
     # Configure Loguru
     logger.remove() # Remove default handler
-    
+    # Records logged while handling a Vapi call carry its ID (extra.trace_id, shown in JSON logs)
+    logger.configure(patcher=_add_trace_id)
+
     # Add console handler
-    logger.add(
-        sys.stdout, 
-        level="INFO",
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
-    )
-    
-    # Add file handler for errors
+    if settings.LOG_ASYNC:
+        # Formatting and writing happen on the log-writer thread, the request only enqueues
+        if _sink is None:
+            _sink = BackgroundSink(sys.stdout, json_lines=settings.LOG_JSON, max_queue=settings.LOG_QUEUE_SIZE)
+            atexit.register(flush_logging)
+        logger.add(_sink.write, level=settings.LOG_LEVEL, format="{message}", catch=True)
+    else:
+        logger.add(
+            sys.stdout,
+            level=settings.LOG_LEVEL,
+            serialize=settings.LOG_JSON,
+            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+        )
+
+    # Add file handler for errors (enqueue: writes, rotation and zip run on Loguru's worker thread)
     logger.add(
         "logs/errors.log",
         level="ERROR",
         rotation="10 MB",
         retention="1 month",
         compression="zip",
+        enqueue=settings.LOG_ASYNC,
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
     )
-    
+
     # Intercept standard logging messages (from libraries like Uvicorn)
     logging.basicConfig(handlers=[InterceptHandler()], level=0)
-    
+
     # Silence noisy libraries
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("googleapiclient").setLevel(logging.WARNING)
 
+
+def flush_logging():
+    """Writes out queued log records (call on shutdown)."""
+    if _sink is not None:
+        _sink.flush()
+    logger.complete()
+
+
+def log_stats() -> dict:
+    return {"async": _sink is not None, "dropped": _sink.dropped if _sink else 0, "queued": _sink._queue.qsize() if _sink else 0}
+
 # Export singleton logger
-__all__ = ["logger", "setup_logging"]
+__all__ = ["logger", "setup_logging", "flush_logging", "log_stats"]
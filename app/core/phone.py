@@ -0,0 +1,33 @@
+import re
+from typing import Optional
+
+DEFAULT_COUNTRY_CODE = "420"
+
+_SEPARATORS = re.compile(r"[\s\-\.\(\)/]")
+
+
+def normalize_phone(phone: Optional[str], country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """
+    Normalizes a phone number to E.164 (+420777111222).
+    Accepts '777 111 222', '+420 777-111-222', '00420777111222', '420777111222'.
+    Numbers without a country code are treated as Czech.
+    Returns None for empty input, anything that is not a number is returned cleaned but unchanged.
+    """
+    if not phone:
+        return None
+    cleaned = _SEPARATORS.sub("", phone.strip())
+    if not cleaned:
+        return None
+
+    if cleaned.startswith("+"):
+        digits = cleaned[1:]
+    elif cleaned.startswith("00"):
+        digits = cleaned[2:]
+    elif len(cleaned) == 9:
+        digits = country_code + cleaned
+    else:
+        digits = cleaned
+
+    if not digits.isdigit():
+        return cleaned
+    return "+" + digits
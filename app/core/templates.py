@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+_formatter = Formatter()
+
+
+class TemplateError(ValueError):
+    """Template does not parse or uses a placeholder that is not available."""
+
+
+# Template variables are strings, format specs are tried on this value at compile time
+_SAMPLE_VALUE = "x"
+
+
+class CompiledTemplate:
+    """
+    A str.format template parsed once into literal/field parts.
+    render() only concatenates, placeholders and format specs were checked at compile time.
+    """
+    __slots__ = ("source", "fields", "_parts")
+
+    def __init__(self, source: str, parts: List[Tuple[str, Optional[str], str]]):
+        self.source = source
+        self._parts = parts
+        self.fields = frozenset(field for _, field, _ in parts if field)
+
+    def render(self, variables: Mapping[str, object]) -> str:
+        out = []
+        for literal, field, spec in self._parts:
+            out.append(literal)
+            if field:
+                value = variables[field]
+                out.append(format(value, spec) if spec else str(value))
+        return "".join(out)
+
+
+@lru_cache(maxsize=256)
+def compile_template(source: str, allowed: FrozenSet[str]) -> CompiledTemplate:
+    """Parses and validates a template (cached per source and variable set)."""
+    try:
+        parsed = list(_formatter.parse(source))
+    except ValueError as e:
+        raise TemplateError(f"invalid template '{source}': {e}")
+
+    parts = []
+    for literal, field, spec, conversion in parsed:
+        if field is None:
+            parts.append((literal, None, ""))
+            continue
+        if conversion or not field.isidentifier():
+            raise TemplateError(f"unsupported placeholder '{{{field}}}' in '{source}'")
+        if field not in allowed:
+            raise TemplateError(f"unknown placeholder '{{{field}}}' in '{source}', available: {', '.join(sorted(allowed))}")
+        if spec:
+            # e.g. {time:%H} or {name:d} parse fine but fail on every render
+            try:
+                format(_SAMPLE_VALUE, spec)
+            except (ValueError, TypeError) as e:
+                raise TemplateError(f"invalid format spec '{{{field}:{spec}}}' in '{source}': {e}")
+        parts.append((literal, field, spec or ""))
+    return CompiledTemplate(source, parts)
+
+
+@dataclass(frozen=True)
+class LocaleFormat:
+    """Date/time wording of one language."""
+    months_genitive: Tuple[str, ...]
+    weekdays_accusative: Tuple[str, ...]
+    or_word: str
+
+    def long_date(self, dt: datetime, with_year: bool = True) -> str:
+        text = f"{dt.day}. {self.months_genitive[dt.month - 1]}"
+        return f"{text} {dt.year}" if with_year else text
+
+    @staticmethod
+    def short_date(dt: datetime) -> str:
+        return dt.strftime("%d.%m.%Y")
+
+    @staticmethod
+    def day_month_time(dt: datetime) -> str:
+        return dt.strftime("%d.%m. %H:%M")
+
+    @staticmethod
+    def time(dt: datetime) -> str:
+        return dt.strftime("%H:%M")
+
+    def weekday(self, dt: datetime) -> str:
+        return self.weekdays_accusative[dt.weekday()]
+
+    def join_times(self, times: Iterable[datetime]) -> str:
+        texts = [self.time(t) for t in times]
+        if len(texts) > 1:
+            return ", ".join(texts[:-1]) + f" {self.or_word} " + texts[-1]
+        return texts[0] if texts else ""
+
+
+LOCALES: Dict[str, LocaleFormat] = {
+    "cs": LocaleFormat(
+        months_genitive=("ledna", "února", "března", "dubna", "května", "června",
+                         "července", "srpna", "září", "října", "listopadu", "prosince"),
+        weekdays_accusative=("pondělí", "úterý", "středu", "čtvrtek", "pátek", "sobotu", "neděli"),
+        or_word="nebo",
+    ),
+}
+
+
+def get_locale(code: str) -> LocaleFormat:
+    return LOCALES.get(code, LOCALES["cs"])
+
+
+# Variables of every booking-related message (SMS, email, reminder, spoken confirmation)
+BOOKING_VARIABLES = frozenset({"name", "phone", "service", "date", "time", "long_date", "company_name"})
+
+# Spoken tool responses: key -> (template, variables)
+SPOKEN_TEMPLATES: Dict[str, Dict[str, Tuple[str, FrozenSet[str]]]] = {
+    "cs": {
+        "missing_time": ("Pro zjištění dostupnosti v {company_name} prosím uveďte i čas.", frozenset({"company_name"})),
+        "closed": ("V {weekday} máme bohužel zavřeno.", frozenset({"weekday"})),
+        "outside_hours": ("Máme otevřeno jen od {opens} do {closes}.", frozenset({"opens", "closes"})),
+        "busy_alternatives": ("Je mi líto, ve {time} je plno, ale volno mám v {alternatives}.", frozenset({"time", "alternatives"})),
+        "busy": ("Je mi líto, ale {when} je obsazeno a v okolí jsem nenašel volné místo.", frozenset({"when"})),
+        "available": ("Ano, {day} v {time} mám volno.", frozenset({"day", "time"})),
+        "available_staff": ("Ano, {day} v {time} má volno {staff}.", frozenset({"day", "time", "staff"})),
+        "unknown_staff": ("Je mi líto, {staff} u nás nepracuje. Objednat vás můžu k: {names}.", frozenset({"staff", "names"})),
+        "free_slots": ("{day} mám volno v {times}.", frozenset({"day", "times"})),
+        "no_free_slots": ("Je mi líto, ale {day} už nemám žádný volný termín.", frozenset({"day"})),
+        "booking_confirmed": (
+            "Vaše rezervace na jméno {name} na {long_date} v {time} byla úspěšně vytvořena. Těšíme se na vás.",
+            BOOKING_VARIABLES,
+        ),
+        "booking_cancelled": ("Vaše rezervace na {when} byla zrušena.", frozenset({"when"})),
+    },
+}
+
+NOTIFICATION_FIELDS = ("sms_template", "email_subject", "email_template", "reminder_template")
+
+
+def validate_notification_templates(notifications) -> None:
+    """Compiles the configured templates, raises TemplateError on unknown placeholders or bad format specs."""
+    for field in NOTIFICATION_FIELDS:
+        compile_template(getattr(notifications, field), BOOKING_VARIABLES)
+
+
+class TemplateEngine:
+    """
+    Compiled notification templates (from config) and spoken responses for one locale.
+    Built once per loaded config (see CompanyConfig.templates).
+    """
+
+    def __init__(self, notifications, company_name: str, locale: str = "cs"):
+        self.company_name = company_name
+        self.locale = get_locale(locale)
+        self._notifications = {
+            "sms": compile_template(notifications.sms_template, BOOKING_VARIABLES),
+            "email_subject": compile_template(notifications.email_subject, BOOKING_VARIABLES),
+            "email_body": compile_template(notifications.email_template, BOOKING_VARIABLES),
+            "reminder": compile_template(notifications.reminder_template, BOOKING_VARIABLES),
+        }
+        spoken = SPOKEN_TEMPLATES.get(locale, SPOKEN_TEMPLATES["cs"])
+        self._spoken = {key: compile_template(source, allowed) for key, (source, allowed) in spoken.items()}
+
+    def booking_variables(self, name: str, phone: str, service: str, start: datetime) -> Dict[str, str]:
+        return {
+            "name": name or "",
+            "phone": phone or "",
+            "service": service or "",
+            "date": self.locale.short_date(start),
+            "time": self.locale.time(start),
+            "long_date": self.locale.long_date(start),
+            "company_name": self.company_name,
+        }
+
+    def render(self, key: str, variables: Mapping[str, object]) -> str:
+        """Renders a notification template: sms, email_subject, email_body or reminder."""
+        return self._notifications[key].render(variables)
+
+    def say(self, key: str, **variables) -> str:
+        """Renders a spoken response."""
+        return self._spoken[key].render(variables)
@@ -0,0 +1,150 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Trace ID of the current request (Vapi call.id), copied into worker threads by asyncio.to_thread
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+# Upper bounds in seconds, a Google/Supabase round trip is usually 50-500 ms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def set_trace_id(trace_id: Optional[str]) -> Token:
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token: Token):
+    _trace_id.reset(token)
+
+
+def get_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (cumulative counts are computed when rendering)."""
+    __slots__ = ("bounds", "counts", "count", "sum", "errors")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                if i == len(self.bounds):
+                    # Above the last bound there is nothing to interpolate with
+                    return self.bounds[-1]
+                return lower + (self.bounds[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+
+class MetricsStore:
+    """
+    In-process span durations, one histogram per span name.
+    Names must be low-cardinality (stage names, never phone numbers or IDs).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def observe(self, name: str, seconds: float, error: bool = False):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds, error)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Count, errors and estimated p50/p95/p99 (ms) per span."""
+        with self._lock:
+            items = list(self._histograms.items())
+        result = {}
+        for name, h in sorted(items):
+            result[name] = {
+                "count": h.count,
+                "errors": h.errors,
+                "avg_ms": round(h.sum / h.count * 1000, 1) if h.count else None,
+                **{f"p{int(q * 100)}_ms": round(h.quantile(q) * 1000, 1) for q in (0.5, 0.95, 0.99)},
+            }
+        return result
+
+    def render_prometheus(self, metric: str = "app_span_duration_seconds") -> str:
+        """Prometheus text exposition format (histogram + error counter per span)."""
+        with self._lock:
+            items = [(name, list(h.counts), h.count, h.sum, h.errors) for name, h in sorted(self._histograms.items())]
+
+        lines: List[str] = [
+            f"# HELP {metric} Duration of instrumented calls (webhook, Google Calendar, Supabase, notifications).",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, counts, count, total, _ in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{span="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {count}')
+
+        lines.append("# HELP app_span_errors_total Instrumented calls that raised or reported a failure.")
+        lines.append("# TYPE app_span_errors_total counter")
+        for name, _, _, _, errors in items:
+            lines.append(f'app_span_errors_total{{span="{name}"}} {errors}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsStore()
+
+
+class Span:
+    # No trace ID here: histograms must stay low-cardinality, log records get it from the logger patcher
+    __slots__ = ("name", "error")
+
+    def __init__(self, name: str):
+        self.name = name
+        # Set by the caller when the call "succeeded" with a failure result (e.g. SMS rejected)
+        self.error = False
+
+
+@contextmanager
+def span(name: str, store: Optional[MetricsStore] = None) -> Iterator[Span]:
+    """
+    Times the block and records it under `name`. Works around awaits as well as
+    blocking calls in worker threads; an exception marks the span as failed.
+    """
+    current = Span(name)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        (store or metrics).observe(name, time.perf_counter() - started, current.error)
@@ -1,8 +1,15 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
 from app.api import webhook, tools
-from app.core.logger import setup_logging, logger
+from app.core.logger import setup_logging, flush_logging, log_stats, logger
+from app.core.config_loader import config_registry
+from app.core.tracing import metrics
+from app.services.db_service import db_service
+from app.services.notification_service import gosms_tokens, notification_dispatcher
+from app.core.security import verify_secret_token
+from app.services.container import ServiceContainer
+from app.services.tenants import TenantRegistry
 from contextlib import asynccontextmanager
 from datetime import datetime
 
@@ -12,9 +19,19 @@ setup_logging()
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting AI Receptionist Backend")
+    # One set of services for the whole app, injected into routers via Depends
+    container = ServiceContainer.create()
+    app.state.container = container
+    # Plus one per tenant (data/tenants/*.json), picked per Vapi request
+    tenants = TenantRegistry(container)
+    tenants.load()
+    app.state.tenants = tenants
+    await tenants.start()
     yield
     # Shutdown
     logger.info("🛑 Shutting down backend")
+    await tenants.stop()
+    flush_logging()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -43,6 +60,40 @@ async def health_check():
 async def health_check_std():
     return {"status": "ok", "environment": settings.ENVIRONMENT, "timestamp": datetime.now().isoformat()}
 
+@app.post("/admin/reload-config", dependencies=[Depends(verify_secret_token)])
+async def reload_config():
+    """Re-reads company_config.json now (it is also reloaded automatically when the file changes)."""
+    try:
+        config = config_registry.reload()
+    except (FileNotFoundError, ValueError) as e:
+        return JSONResponse(status_code=400, content={"status": "error", "detail": str(e)})
+    return {"status": "reloaded", "company_name": config.company_name}
+
+@app.get("/admin/cache-stats", dependencies=[Depends(verify_secret_token)])
+async def cache_stats(request: Request):
+    """Hit/miss counters of the in-process caches and GoSMS token refresh metrics."""
+    container = getattr(request.app.state, "container", None)
+    db = container.db if container is not None else db_service
+    return {"clients": db.client_cache.stats(), "gosms_token": gosms_tokens.stats(), "logging": log_stats()}
+
+@app.get("/admin/outbox-stats", dependencies=[Depends(verify_secret_token)])
+async def outbox_stats():
+    """Notification outbox counts by status (pending/sending/sent/dead)."""
+    outbox = notification_dispatcher.outbox
+    if outbox is None:
+        return {"enabled": False}
+    return {"enabled": True, **outbox.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(verify_secret_token)])
+async def metrics_endpoint(format: str = "prometheus"):
+    """
+    Latency histograms of the webhook, Google Calendar, Supabase and notification calls.
+    Prometheus text format by default, ?format=json gives count/p50/p95/p99 per span.
+    """
+    if format == "json":
+        return JSONResponse(metrics.snapshot())
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=settings.PORT, reload=True)
@@ -0,0 +1,173 @@
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, PrivateAttr, field_validator, model_validator
+
+from app.core.templates import TemplateEngine, validate_notification_templates
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def _to_minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class DayHours(BaseModel):
+    start: str
+    end: str
+
+    @field_validator("start", "end")
+    @classmethod
+    def _check_format(cls, value: str) -> str:
+        try:
+            hours, minutes = value.split(":")
+            if len(hours) != 2 or not (0 <= int(hours) <= 24 and 0 <= int(minutes) < 60):
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"time must be HH:MM, got '{value}'")
+        return value
+
+    @model_validator(mode="after")
+    def _check_order(self):
+        if _to_minutes(self.start) >= _to_minutes(self.end):
+            raise ValueError(f"opening {self.start} must be before closing {self.end}")
+        return self
+
+    @property
+    def minutes(self) -> Tuple[int, int]:
+        """(opening, closing) as minutes from midnight."""
+        return _to_minutes(self.start), _to_minutes(self.end)
+
+
+class BookingSettings(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    slot_duration_minutes: int = 30
+    booking_duration_minutes: int = 60
+
+
+class NotificationSettings(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    sms_enabled: bool = False
+    email_enabled: bool = False
+    sms_template: str = "Rezervace na {date} v {time} potvrzena."
+    email_subject: str = "Nová rezervace"
+    email_template: str = "Nová rezervace: {name}, {date} {time}"
+    # Reminder SMS this many hours before the appointment (empty = no reminders)
+    reminder_offsets_hours: List[float] = []
+    reminder_template: str = "Připomínáme vaši rezervaci {date} v {time}. {company_name}"
+    reminder_spread_seconds: int = 600
+
+    @field_validator("reminder_offsets_hours")
+    @classmethod
+    def _check_offsets(cls, value: List[float]) -> List[float]:
+        if any(offset <= 0 for offset in value):
+            raise ValueError("reminder offsets must be positive hours")
+        return value
+
+    @model_validator(mode="after")
+    def _check_templates(self):
+        # Unknown placeholders fail the config load instead of the SMS at booking time
+        validate_notification_templates(self)
+        return self
+
+
+class StaffMember(BaseModel):
+    """A bookable resource (barber, therapist) with its own Google Calendar."""
+    id: str
+    name: str
+    calendar_id: str
+
+
+class TenantSettings(BaseModel):
+    """
+    How Vapi requests reach this company when one process serves many (data/tenants/<id>.json)
+    and which external resources are its own.
+    """
+    assistant_ids: List[str] = []
+    # Numbers customers call, matched normalized (+420...)
+    phone_numbers: List[str] = []
+    calendar_id: Optional[str] = None
+    sms_channel_id: Optional[str] = None
+    google_credentials_file: Optional[str] = None
+
+
+class CompanyConfig(BaseModel):
+    """
+    Typed, validated company_config.json.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    company_name: str = "Naše Firma"
+    phone_contact: Optional[str] = None
+    owner_email: Optional[str] = None
+    timezone: str = "Europe/Prague"
+    locale: str = "cs"
+    business_hours: Dict[str, Optional[DayHours]] = {}
+    settings: BookingSettings = BookingSettings()
+    notifications: NotificationSettings = NotificationSettings()
+    # Empty = the whole shop is one resource (GOOGLE_CALENDAR_ID)
+    staff: List[StaffMember] = []
+    tenant: TenantSettings = TenantSettings()
+
+    # Precomputed at load: weekday (0 = Monday) -> (open, close) minutes or None if closed
+    _weekday_minutes: Dict[int, Optional[Tuple[int, int]]] = PrivateAttr(default_factory=dict)
+    _raw: dict = PrivateAttr(default_factory=dict)
+    _templates: Optional[TemplateEngine] = PrivateAttr(default=None)
+
+    @field_validator("business_hours")
+    @classmethod
+    def _check_days(cls, value: Dict[str, Optional[DayHours]]) -> Dict[str, Optional[DayHours]]:
+        unknown = set(value) - set(WEEKDAYS)
+        if unknown:
+            raise ValueError(f"unknown days in business_hours: {sorted(unknown)}")
+        return value
+
+    @field_validator("staff")
+    @classmethod
+    def _check_staff(cls, value: List[StaffMember]) -> List[StaffMember]:
+        ids = [member.id for member in value]
+        duplicates = sorted({staff_id for staff_id in ids if ids.count(staff_id) > 1})
+        if duplicates:
+            raise ValueError(f"duplicate staff ids: {duplicates}")
+        return value
+
+    def model_post_init(self, __context) -> None:
+        self._weekday_minutes = {
+            index: (self.business_hours[day].minutes if self.business_hours.get(day) else None)
+            for index, day in enumerate(WEEKDAYS)
+        }
+        # Templates were validated with the notifications, compiling again hits the cache
+        self._templates = TemplateEngine(self.notifications, self.company_name, self.locale)
+
+    @classmethod
+    def from_raw(cls, raw: dict) -> "CompanyConfig":
+        config = cls.model_validate(raw)
+        config._raw = raw
+        return config
+
+    @property
+    def raw(self) -> dict:
+        """The original JSON dict (read-only by convention)."""
+        return self._raw
+
+    @property
+    def weekday_minutes(self) -> Dict[int, Optional[Tuple[int, int]]]:
+        return self._weekday_minutes
+
+    @property
+    def templates(self) -> TemplateEngine:
+        """Compiled notification templates and spoken responses for this config."""
+        return self._templates
+
+    def hours_for(self, weekday: int) -> Optional[Tuple[int, int]]:
+        """(open, close) minutes for weekday (0 = Monday), None if closed."""
+        return self._weekday_minutes.get(weekday)
+
+    def find_staff(self, value: str) -> Optional[StaffMember]:
+        """Staff member by id or name (case-insensitive), None if nobody matches."""
+        wanted = value.strip().casefold()
+        for member in self.staff:
+            if wanted in (member.id.casefold(), member.name.casefold()):
+                return member
+        return None
@@ -0,0 +1,183 @@
+import datetime
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+
+class AvailabilityStatus(str, Enum):
+    AVAILABLE = "available"
+    BUSY = "busy"
+    CLOSED = "closed"
+    OUTSIDE_HOURS = "outside_hours"
+    MISSING_TIME = "missing_time"
+    INVALID = "invalid"
+    UNKNOWN_STAFF = "unknown_staff"
+
+
+@dataclass
+class AvailabilityResult:
+    """
+    Structured answer of an availability check.
+    The spoken sentence is rendered separately (BookingService.render_availability).
+    """
+    status: AvailabilityStatus
+    day: Optional[str] = None
+    time: Optional[str] = None
+    start: Optional[datetime.datetime] = None
+    opens: Optional[str] = None
+    closes: Optional[str] = None
+    alternatives: List[datetime.datetime] = field(default_factory=list)
+    # Staff member (name) the slot is free with, or the unknown requested one
+    staff: Optional[str] = None
+
+    @property
+    def is_available(self) -> bool:
+        return self.status == AvailabilityStatus.AVAILABLE
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sorts intervals and merges the overlapping/touching ones."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def opening_windows(
+    weekday_minutes: Dict[int, Optional[Tuple[int, int]]],
+    range_start: datetime.datetime,
+    range_end: datetime.datetime,
+) -> List[Interval]:
+    """
+    Expands business hours per weekday ({0: (540, 1080), 6: None, ...} minutes, 0 = Monday)
+    to concrete opening windows within [range_start, range_end).
+    """
+    tz = range_start.tzinfo
+    windows = []
+    day = range_start.date()
+    while day <= range_end.date():
+        hours = weekday_minutes.get(day.weekday())
+        if hours:
+            midnight = datetime.datetime.combine(day, datetime.time(0, 0), tzinfo=tz)
+            opens = midnight + datetime.timedelta(minutes=hours[0])
+            closes = midnight + datetime.timedelta(minutes=hours[1])
+            if closes > range_start and opens < range_end:
+                # The start is kept so slots stay aligned to the opening time, use not_before to cut it
+                windows.append((opens, min(closes, range_end)))
+        day += datetime.timedelta(days=1)
+    return windows
+
+
+class FreeBusyIndex:
+    """
+    Free/busy index over merged busy intervals.
+    Point queries are O(log n) via bisect, slot search is a single pass over the free gaps.
+    """
+
+    def __init__(self, busy: Iterable[Interval]):
+        merged = merge_intervals(busy)
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def is_free(self, start: datetime.datetime, end: datetime.datetime) -> bool:
+        """True if [start, end) does not overlap any busy interval."""
+        i = bisect_right(self._starts, start) - 1
+        if i >= 0 and self._ends[i] > start:
+            return False
+        j = i + 1
+        return not (j < len(self._starts) and self._starts[j] < end)
+
+    def free_windows(self, start: datetime.datetime, end: datetime.datetime) -> List[Interval]:
+        """Returns the free gaps within [start, end)."""
+        gaps = []
+        cursor = start
+        i = max(bisect_right(self._starts, start) - 1, 0)
+        while i < len(self._starts) and self._starts[i] < end:
+            if self._ends[i] > cursor:
+                if self._starts[i] > cursor:
+                    gaps.append((cursor, self._starts[i]))
+                cursor = self._ends[i]
+            i += 1
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def find_free_slots(
+        self,
+        windows: Iterable[Interval],
+        duration: datetime.timedelta,
+        step: datetime.timedelta,
+        limit: Optional[int] = None,
+        not_before: Optional[datetime.datetime] = None,
+    ) -> List[datetime.datetime]:
+        """
+        Returns start times of free slots of `duration` inside the given opening windows.
+        Slots are aligned to `step` from the opening of each window (09:00, 09:30, ...).
+        """
+        slots: List[datetime.datetime] = []
+        for opens, closes in sorted(windows):
+            for gap_start, gap_end in self.free_windows(opens, closes):
+                earliest = max(gap_start, not_before) if not_before else gap_start
+                # First grid point at or after the earliest possible start
+                steps = -((opens - earliest) // step)
+                slot = opens + steps * step
+                while slot + duration <= gap_end:
+                    slots.append(slot)
+                    if limit is not None and len(slots) >= limit:
+                        return slots
+                    slot += step
+        return slots
+
+
+class ResourceFreeBusyIndex:
+    """
+    One FreeBusyIndex per resource (staff member), built from a single free/busy query.
+    A slot is free if at least one resource is free; resources keep their configured order,
+    so "first free" is deterministic.
+    """
+
+    def __init__(self, busy_by_resource: Dict[str, Iterable[Interval]]):
+        self._indexes = {resource: FreeBusyIndex(busy) for resource, busy in busy_by_resource.items()}
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __getitem__(self, resource: str) -> FreeBusyIndex:
+        return self._indexes[resource]
+
+    def free_resources(self, start: datetime.datetime, end: datetime.datetime) -> List[str]:
+        """Resources free for the whole [start, end), in order."""
+        return [resource for resource, index in self._indexes.items() if index.is_free(start, end)]
+
+    def is_free(self, start: datetime.datetime, end: datetime.datetime) -> bool:
+        return any(index.is_free(start, end) for index in self._indexes.values())
+
+    def find_free_slots(
+        self,
+        windows: Iterable[Interval],
+        duration: datetime.timedelta,
+        step: datetime.timedelta,
+        limit: Optional[int] = None,
+        not_before: Optional[datetime.datetime] = None,
+    ) -> List[datetime.datetime]:
+        """
+        Start times where at least one resource has a free slot (see FreeBusyIndex.find_free_slots).
+        Each resource contributes at most `limit` slots, the union keeps the earliest ones.
+        """
+        windows = list(windows)
+        slots = set()
+        for index in self._indexes.values():
+            slots.update(index.find_free_slots(windows, duration, step, limit=limit, not_before=not_before))
+        merged = sorted(slots)
+        return merged[:limit] if limit is not None else merged
@@ -1,21 +1,26 @@
-from typing import Optional
+from typing import List, Optional
 # from sqlmodel import Session, select
 from app.models.db_models import Booking
 
 from datetime import datetime, timedelta
+from time import perf_counter
+import asyncio
 import traceback
 # import logging # Removed standard logging
 from zoneinfo import ZoneInfo
 from fastapi import BackgroundTasks
 
 # Import calendar functions
-from app.services.calendar_service import check_calendar_availability, create_calendar_event, get_busy_slots, cancel_event_by_description
+from app.services.calendar_service import CalendarService, SlotUnavailableError, calendar_service
 
-from app.services.db_service import db_service
+from app.services.db_service import DBService, db_service
 
 from app.core.logger import logger
-from app.core.config_loader import load_company_config, get_business_hours
-from app.services.notification_service import send_sms, send_email
+from app.core.config_loader import CompanyConfigRegistry, config_registry
+from app.models.config_models import CompanyConfig, StaffMember
+from app.services.availability import AvailabilityResult, AvailabilityStatus, FreeBusyIndex, opening_windows
+from app.services.notification_service import NotificationDispatcher, notification_dispatcher
+from app.services.staff_calendar import StaffCalendars
 
 # logger = logging.getLogger(__name__)
 
@@ -23,114 +28,222 @@ from app.services.notification_service import send_sms, send_email
 
 TZ = ZoneInfo('Europe/Prague')
 
-CZECH_MONTHS = {
-    1: "ledna", 2: "února", 3: "března", 4: "dubna", 5: "května", 6: "června",
-    7: "července", 8: "srpna", 9: "září", 10: "října", 11: "listopadu", 12: "prosince"
-}
+DEFAULT_BOOKING_MINUTES = 60
+
+def _format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
 
 class BookingService:
-    def __init__(self):
-        # self.session = session # Removed SQLModel
-        self.config = load_company_config()
-        # self._ensure_data_dir() # Removed for Supabase migration
+    def __init__(
+        self,
+        db: Optional[DBService] = None,
+        calendar: Optional[CalendarService] = None,
+        config: Optional[CompanyConfigRegistry] = None,
+        notifier: Optional[NotificationDispatcher] = None,
+    ):
+        # Dependencies default to the process-wide singletons, tests inject fakes
+        self.db = db or db_service
+        self.calendar = calendar or calendar_service
+        # Config is parsed once and hot-reloaded by the registry, no file read per instance
+        self._config_registry = config or config_registry
+        self.notifier = notifier or notification_dispatcher
+        self._staff_calendars: Optional[StaffCalendars] = None
+
+    @property
+    def company(self) -> CompanyConfig:
+        """Typed company config (current version)."""
+        return self._config_registry.get()
+
+    @property
+    def config(self) -> dict:
+        """Company config as the raw JSON dict."""
+        return self.company.raw
+
+    @property
+    def booking_duration_minutes(self) -> int:
+        return self.company.settings.booking_duration_minutes
+
+
+    def staff_calendars(self) -> Optional[StaffCalendars]:
+        """
+        Calendars of the configured staff, None if the shop is a single resource (self.calendar).
+        Rebuilt when a config reload changes the staff, calendars that stay keep their caches.
+        """
+        staff = self.company.staff
+        if not staff:
+            return None
+        current = self._staff_calendars
+        if current is None or current.members != staff:
+            calendars = {self.calendar.calendar_id: self.calendar}
+            if current is not None:
+                calendars.update(current.calendars)
+            self._staff_calendars = StaffCalendars(self.calendar.client, staff, calendars)
+        return self._staff_calendars
+
+    def _requested_staff(self, staff: Optional[str]) -> Optional[List[StaffMember]]:
+        """[member] for a requested staff member, [] if nobody of that name works here, None for "anyone"."""
+        if not staff:
+            return None
+        member = self.company.find_staff(staff)
+        return [member] if member else []
 
+    def _unknown_staff(self, staff: Optional[str]) -> bool:
+        """True if a staff member was asked for and the shop has staff, but not this one."""
+        return bool(staff) and bool(self.company.staff) and self.company.find_staff(staff) is None
 
     async def get_caller_name(self, phone_number: str) -> Optional[str]:
-        return await db_service.get_client_by_phone(phone_number)
+        return await self.db.get_client_by_phone(phone_number)
 
-    async def check_availability(self, day: str, time: Optional[str] = None) -> str:
+    async def check_availability(self, day: str, time: Optional[str] = None, staff: Optional[str] = None) -> str:
         """
         Check availability (Async).
         Respects External Configuration (Business Rules).
+        Returns the spoken answer, see evaluate_availability for the structured result.
         """
-        company_name = self.config.get('company_name', 'naše společnost')
+        result = await self.evaluate_availability(day, time, staff=staff)
+        return self.render_availability(result)
 
+    async def evaluate_availability(self, day: str, time: Optional[str] = None, check_calendar: bool = True, staff: Optional[str] = None) -> AvailabilityResult:
+        """
+        Evaluates business rules and (optionally) the calendar for the requested slot.
+        With check_calendar=False only the local business rules are applied (no Google round trip),
+        AVAILABLE then means "open at that time".
+        With staff configured the slot is free if any member (or the requested `staff`) is free,
+        all staff calendars are checked in one free/busy query.
+        """
         # Generic message if only day is provided (simplified for now)
         if not time:
-            return f"Pro zjištění dostupnosti v {company_name} prosím uveďte i čas."
-        
+            return AvailabilityResult(AvailabilityStatus.MISSING_TIME, day=day)
+
         try:
             # Parse Requested Date
             start_dt = datetime.strptime(f"{day} {time}", "%Y-%m-%d %H:%M").replace(tzinfo=TZ)
-            day_name = start_dt.strftime("%A").lower() # e.g. "monday"
-            
-            # 1. Check Business Hours (Config)
-            hours = get_business_hours(self.config, day_name)
-            
-            if not hours:
-                # Closed (null in JSON)
-                days_cz = {
-                    "monday": "pondělí", "tuesday": "úterý", "wednesday": "středu",
-                    "thursday": "čtvrtek", "friday": "pátek", "saturday": "sobotu", "sunday": "neděli"
-                }
-                day_cz = days_cz.get(day_name, day_name)
-                return f"V {day_cz} máme bohužel zavřeno."
-
-            open_start = hours.get('start')
-            open_end = hours.get('end')
-            
-            # Simple Time Comparison (String compare usually works for HH:MM 24h, ensures Leading Zero)
-            req_time = start_dt.strftime("%H:%M")
-            
-            if not (open_start <= req_time < open_end):
-                return f"Máme otevřeno jen od {open_start} do {open_end}."
-
-        except ValueError as e:
+        except (TypeError, ValueError) as e:
             logger.error(f"Date parsing failed for {day} {time}: {e}")
+            return AvailabilityResult(AvailabilityStatus.INVALID, day=day, time=time)
+
+        # 1. Check Business Hours (Config, precomputed per weekday in minutes)
+        hours = self.company.hours_for(start_dt.weekday())
+        if not hours:
+            # Closed (null in JSON)
+            return AvailabilityResult(AvailabilityStatus.CLOSED, day=day, time=time, start=start_dt)
+
+        open_minute, close_minute = hours
+        req_minute = start_dt.hour * 60 + start_dt.minute
+        if not (open_minute <= req_minute < close_minute):
+            return AvailabilityResult(
+                AvailabilityStatus.OUTSIDE_HOURS, day=day, time=time, start=start_dt,
+                opens=_format_minutes(open_minute), closes=_format_minutes(close_minute)
+            )
+
+        staff_calendars = self.staff_calendars()
+        if staff_calendars is not None and self._unknown_staff(staff):
+            return AvailabilityResult(AvailabilityStatus.UNKNOWN_STAFF, day=day, time=time, start=start_dt, staff=staff)
+
+        if not check_calendar:
+            return AvailabilityResult(AvailabilityStatus.AVAILABLE, day=day, time=time, start=start_dt)
+
+        # 2. Check Google Calendar availability (DB check skipped, Calendar is Truth)
+        if staff_calendars is not None:
+            end_dt = start_dt + timedelta(minutes=self.booking_duration_minutes)
+            free = await staff_calendars.free_members(start_dt, end_dt, self._requested_staff(staff))
+            if free:
+                return AvailabilityResult(AvailabilityStatus.AVAILABLE, day=day, time=time, start=start_dt, staff=free[0].name)
+            return await self._busy_result(day, time, start_dt, staff)
+
+        is_calendar_free = await self.calendar.check_availability(start_dt, self.booking_duration_minutes)
+        if is_calendar_free:
+            return AvailabilityResult(AvailabilityStatus.AVAILABLE, day=day, time=time, start=start_dt)
+
+        return await self._busy_result(day, time, start_dt)
+
+    async def _busy_result(self, day: str, time: str, start_dt: datetime, staff: Optional[str] = None) -> AvailabilityResult:
+        """BUSY result with the nearest free slots within +-2 hours (business hours respected)."""
+        # --- Smart Availability Logic ---
+        slots = await self.find_free_slots(start_dt - timedelta(hours=2), start_dt + timedelta(hours=2), limit=3, staff=staff)
+        alternatives = [slot for slot in slots if slot != start_dt][:2]
+        return AvailabilityResult(AvailabilityStatus.BUSY, day=day, time=time, start=start_dt, alternatives=alternatives)
+
+    def render_availability(self, result: AvailabilityResult) -> str:
+        """
+        Renders the spoken (Czech) sentence for an availability result.
+        """
+        say = self.company.templates.say
+        locale = self.company.templates.locale
+
+        if result.status == AvailabilityStatus.MISSING_TIME:
+            return say("missing_time", company_name=self.company.company_name)
+
+        if result.status == AvailabilityStatus.INVALID:
             return f"Invalid date or time format. Please provide YYYY-MM-DD and HH:MM."
 
-        if start_dt:
-             # Check Google Calendar availability ...
-             is_calendar_free = await check_calendar_availability(start_dt)
-             if not is_calendar_free:
-                 formatted_date = start_dt.strftime("%d.%m. %H:%M")
-                 
-                 # --- Smart Availability Logic ---
-                 alternatives = []
-                 window_start = start_dt - timedelta(hours=2)
-                 window_end = start_dt + timedelta(hours=2)
-                 
-                 # Don't suggest times in the past
-                 now = datetime.now(TZ)
-                 if window_start < now:
-                     window_start = now
-                 
-                 busy_slots = await get_busy_slots(window_start, window_end)
-                 
-                 # Scan 30min slots in the window
-                 current_slot = window_start
-                 # Round to next 30 min
-                 if current_slot.minute < 30:
-                     current_slot = current_slot.replace(minute=30, second=0, microsecond=0)
-                 else:
-                     current_slot = (current_slot + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-                     
-                 while current_slot < window_end:
-                     slot_end = current_slot + timedelta(minutes=60) # Assume 1h booking
-                     
-                     # Check overlap with busy_slots
-                     is_busy = False
-                     for b_start, b_end in busy_slots:
-                         if not (slot_end <= b_start or current_slot >= b_end):
-                             is_busy = True
-                             break
-                     
-                     if not is_busy and current_slot != start_dt:
-                         alternatives.append(current_slot.strftime("%H:%M"))
-                     
-                     current_slot += timedelta(minutes=30)
-                     if len(alternatives) >= 2: 
-                         break
-                         
-                 if alternatives:
-                     alt_text = " nebo v ".join(alternatives)
-                     return f"Je mi líto, ve {start_dt.strftime('%H:%M')} je plno, ale volno mám v {alt_text}."
-                 
-                 return f"Je mi líto, ale {formatted_date} je obsazeno a v okolí jsem nenašel volné místo."
-             
-             # DB check skipped (Calendar is Truth)
-
-        return f"Ano, {day} v {time} mám volno."
+        if result.status == AvailabilityStatus.CLOSED:
+            return say("closed", weekday=locale.weekday(result.start))
+
+        if result.status == AvailabilityStatus.OUTSIDE_HOURS:
+            return say("outside_hours", opens=result.opens, closes=result.closes)
+
+        if result.status == AvailabilityStatus.UNKNOWN_STAFF:
+            return say("unknown_staff", staff=result.staff, names=", ".join(member.name for member in self.company.staff))
+
+        if result.status == AvailabilityStatus.BUSY:
+            if result.alternatives:
+                alt_text = " nebo v ".join(locale.time(slot) for slot in result.alternatives)
+                return say("busy_alternatives", time=locale.time(result.start), alternatives=alt_text)
+            return say("busy", when=locale.day_month_time(result.start))
+
+        if result.staff:
+            return say("available_staff", day=result.day, time=result.time, staff=result.staff)
+        return say("available", day=result.day, time=result.time)
+
+    async def find_free_slots(self, range_start: datetime, range_end: datetime, duration_minutes: Optional[int] = None, limit: Optional[int] = None, staff: Optional[str] = None) -> List[datetime]:
+        """
+        Returns start times of all free slots in [range_start, range_end) in one pass.
+        One busy-slot query for the whole range (day or week), slots respect business hours
+        and the slot grid (settings.slot_duration_minutes).
+        With staff configured a slot is free if any member (or the requested `staff`) is free,
+        one free/busy query covers all their calendars.
+        """
+        step = timedelta(minutes=self.company.settings.slot_duration_minutes)
+        duration = timedelta(minutes=duration_minutes or self.booking_duration_minutes)
+
+        # Don't suggest times in the past
+        not_before = max(range_start, datetime.now(TZ))
+        windows = opening_windows(self.company.weekday_minutes, range_start, range_end)
+        if not windows or not_before >= range_end:
+            return []
+
+        query_start, query_end = min(w[0] for w in windows), max(w[1] for w in windows)
+        staff_calendars = self.staff_calendars()
+        if staff_calendars is not None:
+            members = self._requested_staff(staff)
+            if members == []:
+                # Same answer as check_availability: nobody of that name, so no slots with them
+                return []
+            index = await staff_calendars.index(query_start, query_end, members)
+        else:
+            index = FreeBusyIndex(await self.calendar.get_busy_slots(query_start, query_end))
+        return index.find_free_slots(windows, duration, step, limit=limit, not_before=not_before)
+
+    async def get_free_slots(self, day: str, limit: int = 5, staff: Optional[str] = None) -> str:
+        """
+        Vapi Tool: lists free slots for a whole day ("what's free on Friday").
+        """
+        try:
+            day_start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=TZ)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Date parsing failed for {day}: {e}")
+            return "Invalid date format. Please provide YYYY-MM-DD."
+
+        templates = self.company.templates
+        if self._unknown_staff(staff):
+            return templates.say("unknown_staff", staff=staff, names=", ".join(member.name for member in self.company.staff))
+
+        slots = await self.find_free_slots(day_start, day_start + timedelta(days=1), limit=limit, staff=staff)
+        formatted_day = templates.locale.long_date(day_start, with_year=False)
+        if not slots:
+            return templates.say("no_free_slots", day=formatted_day)
+        return templates.say("free_slots", day=formatted_day, times=templates.locale.join_times(slots))
 
     async def get_active_booking(self, phone: str) -> Optional[dict]:
         """
@@ -146,22 +259,21 @@ class BookingService:
         # 1. Clean phone
         phone = phone.replace(" ", "").strip()
         
-        # 2. Get Client ID
-        client_id = await db_service.get_client_id(phone)
-        if not client_id:
-            logger.info(f"🔍 No client found for phone {phone}")
-            return None
-            
-        # 3. Get Booking
-        return await db_service.get_upcoming_booking_by_client_id(client_id)
+        # 2. Client + nearest booking in a single query
+        booking = await self.db.get_upcoming_booking_by_phone(phone)
+        if not booking:
+            logger.info(f"🔍 No upcoming booking found for phone {phone}")
+        return booking
 
-    async def cancel_active_booking(self, phone: str) -> bool:
+    async def cancel_active_booking(self, phone: str, booking: Optional[dict] = None) -> bool:
         """
         Cancels the active booking for the phone number.
+        Pass `booking` when it was already looked up to skip the second query.
         Returns True if a booking was found and cancelled, False otherwise.
         """
         # 1. Find Booking
-        booking = await self.get_active_booking(phone)
+        if booking is None:
+            booking = await self.get_active_booking(phone)
         if not booking:
             logger.warning(f"⚠️ No active booking found for {phone} to cancel.")
             return False
@@ -171,19 +283,16 @@ class BookingService:
         
         # 2. Delete from Google Calendar (Best Effort)
         if gcal_id:
-             try:
-                 from app.services.calendar_service import get_calendar_service, CALENDAR_ID
-                 service = get_calendar_service()
-                 if service:
-                     service.events().delete(calendarId=CALENDAR_ID, eventId=gcal_id).execute()
-                     logger.info(f"🗑️ GCal Event {gcal_id} deleted.")
-             except Exception as e:
-                 logger.error(f"⚠️ Failed to delete GCal event: {e}")
+             staff_calendars = self.staff_calendars()
+             if staff_calendars is not None:
+                 await staff_calendars.delete_event(gcal_id)
+             else:
+                 await self.calendar.delete_event(gcal_id)
         
         # 3. Delete from DB
         success = False
         if booking_id:
-            success = await db_service.delete_booking(booking_id)
+            success = await self.db.delete_booking(booking_id)
             
         return success
 
@@ -199,26 +308,27 @@ class BookingService:
         # Check existence first to get date for message (before deletion)
         booking = await self.get_active_booking(phone_number)
         if not booking:
-             # Fallback legacy check
-             return await cancel_event_by_description(phone_number)
+             # Fallback legacy check (the phone index of the calendar events)
+             staff_calendars = self.staff_calendars()
+             if staff_calendars is not None:
+                 return await staff_calendars.cancel_event_by_phone(phone_number)
+             return await self.calendar.cancel_event_by_description(phone_number)
 
+        templates = self.company.templates
         formatted_date = booking.get('start_time', 'unknown')
         try:
-            formatted_date = datetime.fromisoformat(formatted_date).strftime("%d.%m. %H:%M")
-        except:
+            formatted_date = templates.locale.day_month_time(datetime.fromisoformat(formatted_date))
+        except (TypeError, ValueError):
             pass
 
-        # Perform Cancellation
-        was_cancelled = await self.cancel_active_booking(phone_number)
+        # Perform Cancellation (reuses the booking found above)
+        was_cancelled = await self.cancel_active_booking(phone_number, booking)
         
         if was_cancelled:
-            msg = f"Vaše rezervace na {formatted_date} byla zrušena."
+            msg = templates.say("booking_cancelled", when=formatted_date)
             # Notification
             try:
-                if background_tasks:
-                    background_tasks.add_task(send_sms, phone_number, msg)
-                else:
-                    send_sms(phone_number, msg)
+                self.notifier.sms(phone_number, msg, background_tasks, dedup_key=f"cancel:{booking.get('id')}")
             except Exception as e:
                 logger.error(f"❌ Failed to send cancellation SMS: {e}")
             return msg
@@ -244,65 +354,48 @@ class BookingService:
                 
         return name
 
-    async def send_notifications(self, phone: str, name: str, service: str, start_dt: datetime, background_tasks: Optional[BackgroundTasks] = None):
+    async def send_notifications(
+        self,
+        phone: str,
+        name: str,
+        service: str,
+        start_dt: datetime,
+        background_tasks: Optional[BackgroundTasks] = None,
+        dedup_key: Optional[str] = None,
+    ):
         """
         Sends SMS to client and Email to owner.
-        Uses BackgroundTasks if provided, otherwise synchronous.
+        Queued in the outbox (dedup_key makes a retried booking notify once), see NotificationDispatcher.
         """
-        notifications_config = self.config.get("notifications", {})
-        company_name = self.config.get("company_name", "Naše Firma")
-        
-        # Helper variables
-        date_str = start_dt.strftime("%d.%m.%Y")
-        time_str = start_dt.strftime("%H:%M")
-        
-        # 1. Prepare SMS
-        sms_template = notifications_config.get("sms_template", "Rezervace na {date} v {time} potvrzena.")
-        try:
-            sms_body = sms_template.format(
-                name=name,
-                service=service,
-                date=date_str,
-                time=time_str,
-                company_name=company_name
-            )
-            
-            if background_tasks:
-                logger.info(f"📨 Scheduling SMS for {phone} in background...")
-                background_tasks.add_task(send_sms, phone, sms_body)
-            else:
-                 logger.warning("⚠️ BackgroundTasks not provided, sending SMS synchronously (blocking).")
-                 send_sms(phone, sms_body)
+        # Templates are compiled and validated at config load, rendering cannot hit a missing placeholder
+        templates = self.company.templates
+        variables = templates.booking_variables(name, phone, service, start_dt)
 
+        # 1. SMS to client
+        try:
+            sms_body = templates.render("sms", variables)
+            self.notifier.sms(phone, sms_body, background_tasks, dedup_key=f"{dedup_key}:sms" if dedup_key else None)
         except Exception as e:
             logger.error(f"❌ Error preparing SMS: {e}")
 
-        # 2. Prepare Email
-        email_template = notifications_config.get("email_template", "Nová rezervace: {name}, {date} {time}")
-        email_subject_tmpl = notifications_config.get("email_subject", "Nová rezervace")
+        # 2. Email to owner
         try:
-            email_subject = email_subject_tmpl.format(name=name, date=date_str, time=time_str)
-            email_body = email_template.format(
-                name=name,
-                phone=phone,
-                service=service,
-                date=date_str,
-                time=time_str
-            )
-            
-            if background_tasks:
-                logger.info(f"📨 Scheduling Email for owner in background...")
-                background_tasks.add_task(send_email, email_subject, email_body)
-            else:
-                 logger.warning("⚠️ BackgroundTasks not provided, sending Email synchronously (blocking).")
-                 send_email(email_subject, email_body)
-                 
+            email_subject = templates.render("email_subject", variables)
+            email_body = templates.render("email_body", variables)
+            self.notifier.email(email_subject, email_body, background_tasks, dedup_key=f"{dedup_key}:email" if dedup_key else None)
         except Exception as e:
              logger.error(f"❌ Error preparing Email: {e}")
 
-    async def book_appointment(self, day: str, time: str, name: str, phone: str = "", service: str = "general", background_tasks: Optional[BackgroundTasks] = None) -> str:
+    def _log_stage_timings(self, stage_ms: dict, started: float):
+        total_ms = (perf_counter() - started) * 1000
+        stages = " ".join(f"{stage}={ms:.0f}ms" for stage, ms in stage_ms.items())
+        logger.info(f"🏁 Booking process completed in {total_ms / 1000:.2f}s ({stages})")
+
+    async def book_appointment(self, day: str, time: str, name: str, phone: str = "", service: str = "general", background_tasks: Optional[BackgroundTasks] = None, staff: Optional[str] = None) -> str:
         """
         Book an appointment (Async).
+        With staff configured the booking goes to the requested `staff` member,
+        otherwise to the first free one.
         """
         # Normalize Name
         original_name = name
@@ -316,84 +409,112 @@ class BookingService:
 
         logger.info(f'📥 Booking Request - Day: {day}, Time: {time}')
 
-        # Check availability again
-        availability_msg = await self.check_availability(day, time)
-        if "fully booked" in availability_msg or "busy" in availability_msg or "Je mi líto" in availability_msg:
+        # Business rules only, the calendar is checked together with the insert below
+        availability = await self.evaluate_availability(day, time, check_calendar=False, staff=staff)
+        if availability.status == AvailabilityStatus.INVALID:
+             logger.error(f"Cannot parse booking date: {day} {time}")
              return "Omlouvám se, ale termín se nepodařilo zarezervovat. Zkuste to prosím znovu."
+        if not availability.is_available:
+             return self.render_availability(availability)
 
-        # Parse date
-        try:
-            start_dt = datetime.strptime(f"{day} {time}", "%Y-%m-%d %H:%M").replace(tzinfo=TZ)
-            logger.info(f'📅 Vypočítaný Start Time: {start_dt}')
-            save_day = start_dt.strftime("%Y-%m-%d")
-            save_time = start_dt.strftime("%H:%M")
-        except ValueError as e:
-            logger.error(f"Cannot parse booking date: {day} {time} error: {e}")
-            return "Omlouvám se, ale termín se nepodařilo zarezervovat. Zkuste to prosím znovu."
+        start_dt = availability.start
+        logger.info(f'📅 Vypočítaný Start Time: {start_dt}')
+        save_day = start_dt.strftime("%Y-%m-%d")
+        save_time = start_dt.strftime("%H:%M")
 
-        start_save_process = datetime.now()
+        start_save_process = perf_counter()
+        stage_ms = {}
         logger.info(f"⏳ Začínám booking process pro: {name}, tel: {phone}")
 
         if not phone:
             logger.error("❌ CHYBA: Chybí telefonní číslo! Nelze vytvořit rezervaci.")
             return "Omlouvám se, ale nemám vaše telefonní číslo, které je nutné pro potvrzení rezervace."
 
-        # 1. Supabase Client Management
+        async def timed(stage: str, coro):
+            stage_start = perf_counter()
+            try:
+                return await coro
+            finally:
+                stage_ms[stage] = (perf_counter() - stage_start) * 1000
+
+        # 1. Supabase client upsert and Google Calendar insert are independent -> run concurrently
+        logger.info(f"🔍 Hledám/Vytvářím klienta v DB a zapisuji do kalendáře: {phone}")
+        temp_booking = Booking(name=name, day=save_day, time=save_time, service=service)
+        calendar = self.calendar
+        staff_calendars = self.staff_calendars()
+        if staff_calendars is not None:
+            # One free/busy query over the staff calendars, then the insert into the chosen one
+            create_event = staff_calendars.create_event_if_free(
+                temp_booking, start_dt, duration_minutes=self.booking_duration_minutes, phone=phone,
+                members=self._requested_staff(staff),
+            )
+        else:
+            # Conditional check-and-insert (one Google round trip with a fresh cache)
+            create_event = self.calendar.create_event_if_free(
+                temp_booking, start_dt, duration_minutes=self.booking_duration_minutes, phone=phone
+            )
+        client_result, event_result = await asyncio.gather(
+            timed("client", self.db.get_or_create_client(phone, name)),
+            timed("calendar", create_event),
+            return_exceptions=True,
+        )
+
+        if isinstance(event_result, SlotUnavailableError):
+            # The client upsert is harmless on its own, nothing to compensate
+            logger.info(f"⛔ Termín {day} {time} je obsazený, nabízím alternativy.")
+            busy = await self._busy_result(day, time, start_dt, staff)
+            return self.render_availability(busy)
+
+        if staff_calendars is not None and not isinstance(event_result, Exception):
+            member, event_result = event_result
+            calendar = staff_calendars.calendar_for(member)
+            logger.info(f"💈 Rezervace u: {member.name} ({member.calendar_id})")
+
         client_id = None
-        # if phone: # Condition removed, we enforced phone above
-        try:
-            logger.info(f"🔍 Hledám/Vytvářím klienta v DB: {phone}")
-            client_dict = await db_service.get_or_create_client(phone, name)
-            if client_dict:
-                client_id = client_dict.get('id')
-                logger.info(f"✅ Klient ID {client_id} připraven.")
-            else:
-                logger.warning("⚠️ Nepodařilo se získat ID klienta ze Supabase.")
-        except Exception as e:
-            logger.error(f"❌ Chyba při správě klienta: {e}")
-            # Should we stop? Ideally yes, but maybe Calendar is enough for now?
-            # User wants robust DB, so maybe let's continue but log heavily.
-        
-        # 2. Sync to Google Calendar
-        logger.info('🚀 Calling Google Calendar...')
-        gcal_link = None
+        if isinstance(client_result, Exception):
+            logger.error(f"❌ Chyba při správě klienta: {client_result}")
+        elif client_result:
+            client_id = client_result.get('id')
+            logger.info(f"✅ Klient ID {client_id} připraven.")
+        else:
+            logger.warning("⚠️ Nepodařilo se získat ID klienta ze Supabase.")
+
         gcal_id = None
-        
+        if isinstance(event_result, Exception):
+            logger.error(f"❌ Google Error: {event_result}")
+        elif event_result:
+            gcal_id = event_result.get('id')
+            logger.info(f"✅ Synced to Calendar: {event_result.get('htmlLink')} (ID: {gcal_id})")
+        else:
+            logger.error("❌ Calendar sync failed - no event result returned")
+
+        # 2. Log to Supabase
+        booking_saved = False
+        if client_id and gcal_id:
+            logger.info(f"📝 Zapisuji rezervaci do Supabase: Client {client_id}, Event {gcal_id}")
+            booking_saved = await timed("db_log", self.db.log_booking(client_id, start_dt, service, gcal_id))
+
+        if not booking_saved:
+            logger.warning(f"⚠️ Rezervace nebyla uložena (ClientID={bool(client_id)}, GCalID={bool(gcal_id)})")
+            # Compensate: don't leave an orphaned event blocking the slot
+            if gcal_id:
+                logger.info(f"↩️ Mažu osiřelý event {gcal_id} z kalendáře.")
+                await timed("compensate", calendar.delete_event(gcal_id))
+            self._log_stage_timings(stage_ms, start_save_process)
+            return "Omlouvám se, ale termín se nepodařilo zarezervovat. Zkuste to prosím znovu."
+
+        logger.info("✅ Rezervace úspěšně uložena do DB.")
+
+        # 3. Notifications
+        # NOTE: We pass background_tasks here to offload sending
         try:
-            temp_booking = Booking(name=name, day=save_day, time=save_time, service=service)
-            
-            event_result = await create_calendar_event(temp_booking, start_time=start_dt, phone=phone)
-            
-            if event_result:
-                gcal_link = event_result.get('htmlLink')
-                gcal_id = event_result.get('id')
-                logger.info(f"✅ Synced to Calendar: {gcal_link} (ID: {gcal_id})")
-            else:
-                logger.error("❌ Calendar sync failed - no event result returned")
+            await timed("notify", self.send_notifications(
+                phone, name, service, start_dt, background_tasks=background_tasks, dedup_key=f"booking:{gcal_id}"
+            ))
         except Exception as e:
-            logger.error(f"❌ Google Error: {e}") 
-        
-        # 3. Log to Supabase
-        if client_id and gcal_id:
-             try:
-                 logger.info(f"📝 Zapisuji rezervaci do Supabase: Client {client_id}, Event {gcal_id}")
-                 await db_service.log_booking(client_id, start_dt, service, gcal_id)
-                 logger.info("✅ Rezervace úspěšně uložena do DB.")
-                 
-                 # 4. Notifications
-                 # NOTE: We pass background_tasks here to offload sending
-                 await self.send_notifications(phone, name, service, start_dt, background_tasks=background_tasks)
-                 
-             except Exception as e:
-                 logger.error(f"❌ Chyba při logování rezervace: {e}")
-        else:
-             logger.warning(f"⚠️ Přeskakuji zápis rezervace do DB (Missing: ClientID={bool(client_id)}, GCalID={bool(gcal_id)})")
-        
-        
-        duration = (datetime.now() - start_save_process).total_seconds()
-        logger.info(f"🏁 Booking process completed in {duration:.2f}s")
+            logger.error(f"❌ Chyba při odesílání notifikací: {e}")
 
-        month_name = CZECH_MONTHS.get(start_dt.month, "")
-        formatted_day = f"{start_dt.day}. {month_name} {start_dt.year}"
-        
-        return f"Vaše rezervace na jméno {name} na {formatted_day} v {time} byla úspěšně vytvořena. Těšíme se na vás."
+        self._log_stage_timings(stage_ms, start_save_process)
+
+        templates = self.company.templates
+        return templates.say("booking_confirmed", **templates.booking_variables(name, phone, service, start_dt))
@@ -0,0 +1,128 @@
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from app.core.tracing import span
+from app.services.calendar_cache import BusyIntervalCache
+
+logger = logging.getLogger(__name__)
+
+# Google allows up to 1000 calls per batch but recommends keeping Calendar batches small
+MAX_BATCH_SIZE = 50
+
+# Deleting an event that is already gone is treated as done
+GONE_STATUSES = {404, 410}
+
+
+@dataclass
+class BatchItemResult:
+    op: str
+    event_id: Optional[str]
+    ok: bool
+    event: Optional[dict] = None
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+class CalendarBatch:
+    """
+    Collects event inserts, patches and deletes for one calendar and sends them as
+    multipart batch requests (new_batch_http_request), MAX_BATCH_SIZE calls per HTTP round trip.
+    execute() is blocking (call it from a worker thread) and returns one BatchItemResult per
+    queued operation, in order. Successful writes are applied to the busy-interval cache.
+    """
+
+    def __init__(self, service_provider: Callable, calendar_id: str, cache: Optional[BusyIntervalCache] = None):
+        self._get_service = service_provider
+        self.calendar_id = calendar_id
+        self.cache = cache
+        self._ops: List[Tuple[str, Optional[str], Optional[dict]]] = []
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def insert(self, body: dict) -> int:
+        """Queues an insert, returns the index of its result."""
+        self._ops.append(("insert", None, body))
+        return len(self._ops) - 1
+
+    def patch(self, event_id: str, body: dict) -> int:
+        """Queues a partial update (e.g. new start/end for a reschedule)."""
+        self._ops.append(("patch", event_id, body))
+        return len(self._ops) - 1
+
+    def delete(self, event_id: str) -> int:
+        self._ops.append(("delete", event_id, None))
+        return len(self._ops) - 1
+
+    def _request(self, service, op: str, event_id: Optional[str], body: Optional[dict]):
+        events = service.events()
+        if op == "insert":
+            return events.insert(calendarId=self.calendar_id, body=body)
+        if op == "patch":
+            return events.patch(calendarId=self.calendar_id, eventId=event_id, body=body)
+        return events.delete(calendarId=self.calendar_id, eventId=event_id)
+
+    def _record(self, results: List[Optional[BatchItemResult]], index: int, response, exception):
+        op, event_id, _ = self._ops[index]
+        if exception is None:
+            event = response if isinstance(response, dict) else None
+            event_id = (event or {}).get('id', event_id)
+            results[index] = BatchItemResult(op, event_id, True, event=event, status=200)
+            if self.cache is not None:
+                if op == "delete":
+                    self.cache.remove_event(event_id)
+                elif event:
+                    self.cache.apply_event(event)
+            return
+
+        status = exception.resp.status if isinstance(exception, HttpError) else None
+        if op == "delete" and status in GONE_STATUSES:
+            results[index] = BatchItemResult(op, event_id, True, status=status)
+            if self.cache is not None:
+                self.cache.remove_event(event_id)
+            return
+        results[index] = BatchItemResult(op, event_id, False, status=status, error=str(exception))
+
+    def execute(self) -> List[BatchItemResult]:
+        """Sends all queued operations. Never raises, failures are reported per item."""
+        results: List[Optional[BatchItemResult]] = [None] * len(self._ops)
+        if not self._ops:
+            return []
+
+        service = self._get_service()
+        if not service:
+            return [BatchItemResult(op, event_id, False, error="calendar unavailable") for op, event_id, _ in self._ops]
+
+        for chunk_start in range(0, len(self._ops), MAX_BATCH_SIZE):
+            indexes = range(chunk_start, min(chunk_start + MAX_BATCH_SIZE, len(self._ops)))
+            batch = service.new_batch_http_request()
+            for index in indexes:
+                op, event_id, body = self._ops[index]
+                batch.add(
+                    self._request(service, op, event_id, body),
+                    callback=lambda request_id, response, exception: self._record(results, int(request_id), response, exception),
+                    request_id=str(index),
+                )
+            try:
+                with span("google.batch"):
+                    batch.execute()
+            except Exception as e:
+                # The whole round trip failed, some operations may still have been applied
+                logger.error(f"❌ Google Calendar batch failed: {e}")
+                if self.cache is not None:
+                    self.cache.invalidate()
+                for index in indexes:
+                    if results[index] is None:
+                        op, event_id, _ = self._ops[index]
+                        results[index] = BatchItemResult(op, event_id, False, error=str(e))
+            for index in indexes:
+                if results[index] is None:
+                    op, event_id, _ = self._ops[index]
+                    results[index] = BatchItemResult(op, event_id, False, error="no response in batch")
+
+        failed = sum(1 for r in results if not r.ok)
+        logger.info(f"📦 Calendar batch: {len(results) - failed}/{len(results)} operations succeeded")
+        return results
@@ -0,0 +1,329 @@
+import asyncio
+import datetime
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from app.core.phone import normalize_phone
+from app.services.availability import FreeBusyIndex
+from app.core.tracing import span
+
+PRAGUE_TZ = ZoneInfo('Europe/Prague')
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+
+# Private extended property with the caller's normalized phone, written by CalendarService
+PHONE_PROPERTY = 'phone'
+
+# Events created before the property existed only carry "Telefon: +420 777 ..." in the description
+_DESCRIPTION_PHONE = re.compile(r"Tel(?:efon)?\.?:\s*(\+?[\d][\d \-]{7,}\d)")
+
+
+def parse_event_time(value: dict) -> Optional[datetime.datetime]:
+    """
+    Parses a Google event 'start'/'end' object to an aware datetime.
+    All-day events ('date' only) start at midnight Prague time.
+    """
+    if not value:
+        return None
+    try:
+        if value.get('dateTime'):
+            dt = datetime.datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        elif value.get('date'):
+            dt = datetime.datetime.fromisoformat(value['date'])
+        else:
+            return None
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=PRAGUE_TZ)
+    return dt
+
+
+def event_phone(event: dict) -> Optional[str]:
+    """Normalized phone of the client an event belongs to (extended property, else description)."""
+    phone = ((event.get('extendedProperties') or {}).get('private') or {}).get(PHONE_PROPERTY)
+    if not phone:
+        match = _DESCRIPTION_PHONE.search(event.get('description') or '')
+        phone = match.group(1) if match else None
+    return normalize_phone(phone)
+
+
+def event_interval(event: dict) -> Optional[Interval]:
+    """Returns (start, end) of an event or None if it is cancelled/unparseable."""
+    if event.get('status') == 'cancelled':
+        return None
+    start = parse_event_time(event.get('start'))
+    end = parse_event_time(event.get('end'))
+    if not start or not end:
+        return None
+    return start, end
+
+
+class BusyIntervalCache:
+    """
+    Local copy of the busy intervals of one calendar, plus an index from the client's
+    normalized phone to its event IDs (see event_phone).
+    Kept current by Google Calendar incremental sync (syncToken) on a background task
+    and by our own writes (apply_event / remove_event).
+    Queries return None when the cache is stale so callers fall back to a live query.
+    """
+
+    def __init__(
+        self,
+        service_provider: Callable,
+        calendar_id: str,
+        max_staleness_seconds: float = 90,
+        lookback_days: int = 1,
+    ):
+        self._get_service = service_provider
+        self.calendar_id = calendar_id
+        self.max_staleness_seconds = max_staleness_seconds
+        self.lookback = datetime.timedelta(days=lookback_days)
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._events: Dict[str, Interval] = {}
+        self._phones: Dict[str, Set[str]] = {}
+        self._event_phone: Dict[str, str] = {}
+        # Query indexes over _events, rebuilt on the first query after a change (None = dirty)
+        self._by_start: Optional[List[Tuple[datetime.datetime, datetime.datetime, str]]] = None
+        self._starts: List[datetime.datetime] = []
+        self._longest = datetime.timedelta(0)
+        self._free_busy: Optional[FreeBusyIndex] = None
+        self._sync_token: Optional[str] = None
+        self._synced_at: Optional[float] = None
+        self._window_start: Optional[datetime.datetime] = None
+        # Local writes made while a sync is running (event, or None if deleted), re-applied after it finishes
+        self._syncing = False
+        self._overlay: Dict[str, Optional[dict]] = {}
+
+    # --- Sync ---
+
+    def _list_all(self, service, **params) -> Tuple[List[dict], Optional[str]]:
+        """Lists all pages. Returns (items, nextSyncToken)."""
+        items = []
+        page_token = None
+        while True:
+            request_params = dict(params)
+            if page_token:
+                request_params['pageToken'] = page_token
+            with span("google.events.sync"):
+                result = service.events().list(
+                    calendarId=self.calendar_id,
+                    singleEvents=True,
+                    maxResults=2500,
+                    **request_params
+                ).execute()
+            items.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return items, result.get('nextSyncToken')
+
+    def sync(self) -> bool:
+        """
+        Runs one sync round (blocking, call from a worker thread).
+        Incremental if we have a sync token, full otherwise (or when Google expires the token).
+        Returns True if the cache is fresh afterwards.
+        """
+        service = self._get_service()
+        if not service:
+            return False
+
+        with self._sync_lock:
+            with self._lock:
+                token = self._sync_token
+                self._syncing = True
+                self._overlay = {}
+
+            try:
+                full = token is None
+                if not full:
+                    try:
+                        items, next_token = self._list_all(service, syncToken=token)
+                    except HttpError as e:
+                        if e.resp.status != 410:
+                            raise
+                        logger.info("♻️ Calendar sync token expired, running full sync.")
+                        full = True
+
+                if full:
+                    window_start = datetime.datetime.now(PRAGUE_TZ) - self.lookback
+                    items, next_token = self._list_all(service, timeMin=window_start.isoformat())
+
+                with self._lock:
+                    if full:
+                        self._events = {}
+                        self._by_start = None
+                        self._phones = {}
+                        self._event_phone = {}
+                        self._window_start = window_start
+                    for event in items:
+                        self._store(event)
+                    for event_id, event in self._overlay.items():
+                        if event is None:
+                            self._remove(event_id)
+                        else:
+                            self._store(event)
+                    self._prune()
+                    self._sync_token = next_token
+                    self._synced_at = time.monotonic()
+                    logger.debug(f"📅 Calendar cache synced ({'full' if full else 'incremental'}, {len(items)} changes)")
+                return True
+
+            except Exception as e:
+                logger.error(f"❌ Calendar cache sync failed: {e}")
+                return False
+            finally:
+                with self._lock:
+                    self._syncing = False
+                    self._overlay = {}
+
+    def _store(self, event: dict):
+        event_id = event.get('id')
+        if not event_id:
+            return
+        interval = event_interval(event)
+        if interval is None:
+            self._remove(event_id)
+            return
+        if self._events.get(event_id) != interval:
+            self._events[event_id] = interval
+            self._by_start = None
+        phone = event_phone(event)
+        if phone != self._event_phone.get(event_id):
+            self._unindex(event_id)
+            if phone:
+                self._event_phone[event_id] = phone
+                self._phones.setdefault(phone, set()).add(event_id)
+
+    def _unindex(self, event_id: str):
+        phone = self._event_phone.pop(event_id, None)
+        if phone:
+            event_ids = self._phones.get(phone)
+            if event_ids:
+                event_ids.discard(event_id)
+                if not event_ids:
+                    del self._phones[phone]
+
+    def _remove(self, event_id: str):
+        if self._events.pop(event_id, None) is not None:
+            self._by_start = None
+        self._unindex(event_id)
+
+    def _indexed(self) -> List[Tuple[datetime.datetime, datetime.datetime, str]]:
+        """Events as (start, end, event_id) sorted by start; call with _lock held."""
+        if self._by_start is None:
+            self._by_start = sorted((s, e, event_id) for event_id, (s, e) in self._events.items())
+            self._starts = [s for s, _, _ in self._by_start]
+            self._longest = max((e - s for s, e, _ in self._by_start), default=datetime.timedelta(0))
+            self._free_busy = FreeBusyIndex((s, e) for s, e, _ in self._by_start)
+        return self._by_start
+
+    def _prune(self):
+        """Forgets events that ended before the cached window."""
+        cutoff = datetime.datetime.now(PRAGUE_TZ) - self.lookback
+        self._window_start = max(self._window_start, cutoff) if self._window_start else cutoff
+        for event_id in [eid for eid, (_, end) in self._events.items() if end < cutoff]:
+            self._remove(event_id)
+
+    async def run(self, interval_seconds: float = 30):
+        """Background task: keeps the cache in sync until cancelled."""
+        logger.info(f"🔄 Calendar cache sync started (every {interval_seconds}s)")
+        while True:
+            await asyncio.to_thread(self.sync)
+            await asyncio.sleep(interval_seconds)
+
+    # --- Local writes ---
+
+    def apply_event(self, event: dict):
+        """Records an event we have just written so it blocks its slot immediately."""
+        event_id = event.get('id')
+        if not event_id:
+            self.invalidate()
+            return
+        with self._lock:
+            self._store(event)
+            if self._syncing:
+                self._overlay[event_id] = event
+
+    def remove_event(self, event_id: str):
+        """Forgets an event we have just deleted."""
+        with self._lock:
+            self._remove(event_id)
+            if self._syncing:
+                self._overlay[event_id] = None
+
+    def invalidate(self):
+        """Marks the cache stale (e.g. after a write with unknown outcome). Next sync refreshes it."""
+        with self._lock:
+            self._synced_at = None
+
+    # --- Queries ---
+
+    def is_fresh(self) -> bool:
+        synced_at = self._synced_at
+        return synced_at is not None and time.monotonic() - synced_at <= self.max_staleness_seconds
+
+    def _covers(self, start: datetime.datetime) -> bool:
+        return self.is_fresh() and self._window_start is not None and start >= self._window_start
+
+    def busy_between(self, start: datetime.datetime, end: datetime.datetime) -> Optional[List[Interval]]:
+        """
+        Returns busy (start, end) intervals overlapping [start, end) sorted by start,
+        or None if the cache cannot answer (stale or outside the cached window).
+        """
+        with self._lock:
+            if not self._covers(start):
+                return None
+            events = self._indexed()
+            # Nothing starting before start - longest can still reach past start
+            lo = bisect_left(self._starts, start - self._longest)
+            hi = bisect_left(self._starts, end)
+            return [(s, e) for s, e, _ in events[lo:hi] if e > start]
+
+    def event_ids_between(self, start: datetime.datetime, end: datetime.datetime) -> Optional[List[str]]:
+        """IDs of events starting in [start, end), by start time, or None if the cache cannot answer."""
+        with self._lock:
+            if not self._covers(start):
+                return None
+            events = self._indexed()
+            lo = bisect_left(self._starts, start)
+            hi = bisect_left(self._starts, end)
+            return [event_id for _, _, event_id in events[lo:hi]]
+
+    def has_event(self, event_id: str) -> bool:
+        """True if the event is known to be on this calendar (False may also mean a stale cache)."""
+        with self._lock:
+            return event_id in self._events
+
+    def is_free(self, start: datetime.datetime, end: datetime.datetime) -> Optional[bool]:
+        """True/False if the cache can answer, None if the caller must query Google."""
+        with self._lock:
+            if not self._covers(start):
+                return None
+            self._indexed()
+            return self._free_busy.is_free(start, end)
+
+    def events_for_phone(self, phone: str, after: Optional[datetime.datetime] = None) -> Optional[List[Tuple[str, Interval]]]:
+        """
+        Returns (event_id, (start, end)) of the phone's events starting at or after `after`,
+        nearest first, or None if the cache is stale.
+        """
+        key = normalize_phone(phone)
+        with self._lock:
+            if not self.is_fresh():
+                return None
+            found = [(event_id, self._events[event_id]) for event_id in self._phones.get(key, ()) if event_id in self._events]
+        if after is not None:
+            found = [item for item in found if item[1][0] >= after]
+        found.sort(key=lambda item: item[1][0])
+        return found
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.phone import normalize_phone
+
+_MISSING = object()
+
+
+class ClientCache:
+    """
+    Read-through TTL + LRU cache of client records keyed by E.164 phone number.
+    A cached None means "no such client" and is kept as well, so an unknown caller
+    does not hit Supabase on every tool call. Concurrent lookups of one number
+    share a single in-flight query.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Optional[dict]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(phone: str) -> Optional[str]:
+        return normalize_phone(phone)
+
+    def _get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, phone: str, record: Optional[dict]):
+        """Stores (or replaces) the record for a phone, e.g. after an insert or a name update."""
+        key = self.key(phone)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, record)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, phone: Optional[str] = None):
+        """Drops one phone, or everything when called without arguments."""
+        with self._lock:
+            if phone is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.key(phone), None)
+
+    async def get_or_load(self, phone: str, loader: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        """
+        Returns the cached record or awaits loader() once for all concurrent callers.
+        Loader exceptions are propagated to every waiter and nothing is cached.
+        """
+        key = self.key(phone)
+        if not key:
+            return await loader()
+
+        value = self._get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            record = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited is not reported as "never retrieved"
+            future.exception()
+            raise
+        else:
+            self.put(phone, record)
+            future.set_result(record)
+            return record
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,101 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+from app.core.config import settings
+from app.core.config_loader import CompanyConfigRegistry, config_registry
+from app.core.logger import logger
+from app.services.booking_service import BookingService
+from app.services.calendar_service import CalendarService, calendar_service
+from app.services.db_service import DBService, db_service
+from app.services.notification_service import NotificationDispatcher, notification_dispatcher
+from app.services.outbox import OutboxWorker
+from app.services.reminder_service import ReminderScheduler
+
+
+@dataclass
+class ServiceContainer:
+    """
+    Application-scoped services, created once in the FastAPI lifespan
+    and injected into routers through Depends (see app/api/deps.py).
+    Each tenant gets its own container (see TenantRegistry), tenant_id is None for the default one.
+    """
+    config: CompanyConfigRegistry
+    calendar: CalendarService
+    db: DBService
+    notifier: NotificationDispatcher
+    booking: BookingService
+    tenant_id: Optional[str] = None
+    _tasks: List[asyncio.Task] = field(default_factory=list)
+
+    @classmethod
+    def create(
+        cls,
+        config: Optional[CompanyConfigRegistry] = None,
+        calendar: Optional[CalendarService] = None,
+        db: Optional[DBService] = None,
+        notifier: Optional[NotificationDispatcher] = None,
+        tenant_id: Optional[str] = None,
+    ) -> "ServiceContainer":
+        """Builds the container, missing services default to the process-wide singletons."""
+        config = config or config_registry
+        calendar = calendar or calendar_service
+        db = db or db_service
+        notifier = notifier or notification_dispatcher
+        booking = BookingService(db=db, calendar=calendar, config=config, notifier=notifier)
+        return cls(config=config, calendar=calendar, db=db, notifier=notifier, booking=booking, tenant_id=tenant_id)
+
+    def use_db(self, db: DBService):
+        """Swaps the database view of this container (before start(), background tasks keep theirs)."""
+        self.db = db
+        self.booking.db = db
+
+    async def start(self, outbox_worker: bool = True, dispatchers: Optional[Callable[[str], Any]] = None):
+        """
+        Warms up clients and starts background tasks.
+        The outbox is shared by all tenants, only the default container runs its worker
+        (`dispatchers` maps a tenant id to the tenant's dispatcher).
+        """
+        self.config.get()
+        # Build the Google Calendar client once (credentials + token) instead of per tool call
+        await asyncio.to_thread(self.calendar.client.initialize)
+        # Keep a local copy of busy intervals in sync so availability checks skip Google
+        self._tasks.append(asyncio.create_task(self.calendar.cache.run(settings.CALENDAR_SYNC_INTERVAL_SECONDS)))
+        staff_calendars = self.booking.staff_calendars()
+        if staff_calendars is not None:
+            for staff_calendar in staff_calendars.calendars.values():
+                if staff_calendar is not self.calendar:
+                    self._tasks.append(asyncio.create_task(staff_calendar.cache.run(settings.CALENDAR_SYNC_INTERVAL_SECONDS)))
+        # Deliver queued notifications off the request path
+        if getattr(self.notifier, "outbox", None) is not None:
+            if outbox_worker:
+                worker = OutboxWorker(
+                    self.notifier.outbox,
+                    self.notifier,
+                    batch_size=settings.OUTBOX_BATCH_SIZE,
+                    poll_interval_seconds=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+                    dispatchers=dispatchers,
+                    retention_seconds=settings.OUTBOX_RETENTION_HOURS * 3600,
+                )
+                self._tasks.append(asyncio.create_task(worker.run()))
+            if settings.REMINDERS_ENABLED:
+                reminders = ReminderScheduler(
+                    self.db,
+                    self.notifier.outbox,
+                    self.config,
+                    refresh_interval_seconds=settings.REMINDER_REFRESH_INTERVAL_SECONDS,
+                    grace_seconds=settings.REMINDER_GRACE_SECONDS,
+                    page_size=settings.REMINDER_PAGE_SIZE,
+                    tenant_id=self.tenant_id,
+                )
+                self._tasks.append(asyncio.create_task(reminders.run()))
+        suffix = f" (tenant {self.tenant_id})" if self.tenant_id else ""
+        logger.info(f"🧩 Service container started{suffix}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        # Let pending notifications finish and close the GoSMS connection pool
+        await self.notifier.aclose()
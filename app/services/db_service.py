@@ -1,7 +1,11 @@
 from supabase import create_async_client, AsyncClient
 from app.core.config import settings
+from app.core.phone import normalize_phone
+from app.core.tracing import span
+from app.services.client_cache import ClientCache
 import logging
 from datetime import datetime
+from typing import List, Optional
 
 logger = logging.getLogger("app")
 
@@ -13,6 +17,11 @@ class DBService:
         if cls._instance is None:
             cls._instance = super(DBService, cls).__new__(cls)
             # Async client init is tricky in __new__ (sync), will init on first usage or explicit init
+            # Client records by phone, one conversation asks for the same caller several times
+            cls._instance.client_cache = ClientCache(
+                ttl_seconds=settings.CLIENT_CACHE_TTL_SECONDS,
+                max_size=settings.CLIENT_CACHE_MAX_SIZE,
+            )
         return cls._instance
 
     async def get_client(self):
@@ -27,6 +36,60 @@ class DBService:
                 logger.error(f"❌ Failed to initialize Supabase Async: {e}")
         return self._client
 
+    @staticmethod
+    async def _execute(name: str, query):
+        """Runs a PostgREST query as a traced span (supabase.<name>)."""
+        with span(f"supabase.{name}"):
+            return await query.execute()
+
+    def _scope(self, query):
+        """Restricts a clients/bookings query to this service's tenant (the base service sees every row)."""
+        return query
+
+    def _row(self, data: dict) -> dict:
+        """Row to insert, tagged with this service's tenant."""
+        return data
+
+    def scoped(self, tenant_id: str) -> "TenantDBService":
+        """View of the database limited to one tenant's rows, sharing this Supabase client (pool)."""
+        return TenantDBService(self, tenant_id)
+
+    def untenanted(self) -> "TenantDBService":
+        """View of the rows without a tenant_id: the default shop once tenants are registered."""
+        return TenantDBService(self, None)
+
+    @staticmethod
+    def _phone(phone: str) -> str:
+        """
+        Phone as stored in clients.phone_number (E.164, see normalize_phone) and used as the
+        cache key, so '777 111 222' and '+420777111222' are the same client.
+        """
+        return normalize_phone(phone) or phone
+
+    async def _fetch_client(self, phone: str) -> Optional[dict]:
+        """Loads {'id', 'full_name'} of a client from Supabase. Raises on DB errors."""
+        client = await self.get_client()
+        if not client:
+            raise RuntimeError("Supabase client not available")
+        response = await self._execute("clients.select", self._scope(client.table('clients').select("id, full_name").eq('phone_number', phone)).limit(1))
+        if response.data:
+            return {'id': response.data[0]['id'], 'full_name': response.data[0].get('full_name')}
+        return None
+
+    async def find_client(self, phone: str) -> Optional[dict]:
+        """
+        Returns {'id', 'full_name'} of the client with this phone or None.
+        Read-through cached (see ClientCache), errors are logged and not cached.
+        """
+        if not phone:
+            return None
+        phone = self._phone(phone)
+        try:
+            return await self.client_cache.get_or_load(phone, lambda: self._fetch_client(phone))
+        except Exception as e:
+            logger.error(f"❌ DB Error (find_client): {e}")
+            return None
+
     async def get_or_create_client(self, phone: str, name: str) -> dict:
         """
         Finds a client by phone. If not found, creates a new one.
@@ -36,33 +99,36 @@ class DBService:
         if not client:
             return None
 
+        phone = self._phone(phone)
         try:
             # Check if exists
-            response = await client.table('clients').select("*").eq('phone_number', phone).execute()
+            client_data = await self.client_cache.get_or_load(phone, lambda: self._fetch_client(phone))
             
-            if response.data:
-                client_data = response.data[0]
+            if client_data:
                 existing_name = client_data.get('full_name') or ""
                 final_name = existing_name
 
                 # Smart Name Update: If new name is provided and is longer (e.g. "Petr" -> "Petr Novák")
                 if name and len(name.strip()) > len(existing_name.strip()):
                     try:
-                        await client.table('clients').update({'full_name': name}).eq('id', client_data['id']).execute()
+                        await self._execute("clients.update", self._scope(client.table('clients').update({'full_name': name}).eq('id', client_data['id'])))
                         logger.info(f"✨ Vylepšuji jméno klienta (ID {client_data['id']}): '{existing_name}' -> '{name}'")
                         final_name = name
+                        self.client_cache.put(phone, {'id': client_data['id'], 'full_name': name})
                     except Exception as e:
                         logger.warning(f"⚠️ Failed to update client name: {e}")
                 
                 return {'id': client_data['id'], 'name': final_name}
             
             # Create new
-            new_client = {'phone_number': phone, 'full_name': name}
-            response = await client.table('clients').insert(new_client).execute()
+            new_client = self._row({'phone_number': phone, 'full_name': name})
+            response = await self._execute("clients.insert", client.table('clients').insert(new_client))
             
             if response.data:
                 logger.info(f"🆕 New client created: {name} ({phone})")
-                return {'id': response.data[0]['id'], 'name': response.data[0].get('full_name', name)}
+                created = {'id': response.data[0]['id'], 'full_name': response.data[0].get('full_name', name)}
+                self.client_cache.put(phone, created)
+                return {'id': created['id'], 'name': created['full_name']}
             
         except Exception as e:
             logger.error(f"❌ DB Error (get_or_create_client): {e}")
@@ -72,53 +138,39 @@ class DBService:
         """
         Returns client name or None.
         """
-        client = await self.get_client()
-        if not client:
-            return None
-            
-        try:
-            response = await client.table('clients').select("full_name").eq('phone_number', phone).execute()
-            if response.data:
-                return response.data[0]['full_name']
-        except Exception as e:
-            logger.error(f"❌ DB Error (get_client_by_phone): {e}")
-            
-        return None
+        record = await self.find_client(phone)
+        return record.get('full_name') if record else None
 
-    async def log_booking(self, client_id: int, time: datetime, service_type: str, gcal_id: str):
+    async def log_booking(self, client_id: int, time: datetime, service_type: str, gcal_id: str) -> bool:
         """
         Logs a booking to the database.
+        Returns True if the booking row was written.
         """
         client = await self.get_client()
         if not client or not client_id:
-            return
+            return False
 
         try:
-            booking_data = {
+            booking_data = self._row({
                 'client_id': client_id,
                 'start_time': time.isoformat(),
                 'service_type': service_type,
                 'gcal_event_id': gcal_id
-            }
+            })
             
-            response = await client.table('bookings').insert(booking_data).execute()
+            response = await self._execute("bookings.insert", client.table('bookings').insert(booking_data))
             if response.data:
                 logger.info(f"✅ Booking logged to DB for client {client_id}")
+                return True
                 
         except Exception as e:
             logger.error(f"❌ DB Error (log_booking): {e}")
+        return False
 
     async def get_client_id(self, phone: str) -> int:
         """Helper to get client ID from phone (if exists)."""
-        client = await self.get_client()
-        if not client: return None
-        try:
-             response = await client.table('clients').select("id").eq('phone_number', phone).execute()
-             if response.data:
-                 return response.data[0]['id']
-        except Exception:
-             return None
-        return None
+        record = await self.find_client(phone)
+        return record.get('id') if record else None
 
     async def get_upcoming_booking_by_client_id(self, client_id: int) -> dict:
         """
@@ -130,13 +182,12 @@ class DBService:
         try:
             now_iso = datetime.now().isoformat()
             # Select bookings where start_time >= now
-            response = await client.table('bookings')\
-                .select("*")\
+            response = await self._execute("bookings.upcoming", self._scope(client.table('bookings')\
+                .select("*"))\
                 .eq('client_id', client_id)\
                 .gte('start_time', now_iso)\
                 .order('start_time', desc=False)\
-                .limit(1)\
-                .execute()
+                .limit(1))
                 
             if response.data:
                 return response.data[0]
@@ -145,6 +196,69 @@ class DBService:
             
         return None
 
+    async def get_upcoming_booking_by_phone(self, phone: str) -> Optional[dict]:
+        """
+        Returns the nearest future booking of the client with this phone in one round trip
+        (clients row with the bookings embedded, filtered/ordered/limited server-side).
+        """
+        client = await self.get_client()
+        if not client: return None
+
+        phone = self._phone(phone)
+        try:
+            now_iso = datetime.now().isoformat()
+            response = await self._execute("bookings.upcoming_by_phone", self._scope(client.table('clients')\
+                .select("id, full_name, bookings(*)"))\
+                .eq('phone_number', phone)\
+                .gte('bookings.start_time', now_iso)\
+                .order('start_time', desc=False, foreign_table='bookings')\
+                .limit(1, foreign_table='bookings')\
+                .limit(1))
+
+            if not response.data:
+                self.client_cache.put(phone, None)
+                return None
+
+            row = response.data[0]
+            # The client row came along for free, keep the cache warm
+            self.client_cache.put(phone, {'id': row['id'], 'full_name': row.get('full_name')})
+            bookings = row.get('bookings') or []
+            if bookings:
+                return bookings[0]
+        except Exception as e:
+            logger.error(f"❌ DB Error (get_upcoming_booking_by_phone): {e}")
+
+        return None
+
+    async def get_bookings_between(self, start: datetime, end: datetime, page_size: int = 500) -> List[dict]:
+        """
+        Returns bookings starting in [start, end) with the client's name and phone embedded,
+        read in pages of page_size rows (ordered by start_time, id).
+        """
+        client = await self.get_client()
+        if not client: return []
+
+        rows: List[dict] = []
+        offset = 0
+        try:
+            while True:
+                response = await self._execute("bookings.between", self._scope(client.table('bookings')\
+                    .select("id, start_time, service_type, clients(full_name, phone_number)"))\
+                    .gte('start_time', start.isoformat())\
+                    .lt('start_time', end.isoformat())\
+                    .order('start_time')\
+                    .order('id')\
+                    .range(offset, offset + page_size - 1))
+                page = response.data or []
+                rows.extend(page)
+                if len(page) < page_size:
+                    break
+                offset += page_size
+        except Exception as e:
+            logger.error(f"❌ DB Error (get_bookings_between): {e}")
+            raise
+        return rows
+
     async def delete_booking(self, booking_id: int) -> bool:
         """
         Deletes a booking from the database.
@@ -153,11 +267,52 @@ class DBService:
         if not client: return False
         
         try:
-            await client.table('bookings').delete().eq('id', booking_id).execute()
+            await self._execute("bookings.delete", self._scope(client.table('bookings').delete().eq('id', booking_id)))
             logger.info(f"🗑️ Booking {booking_id} deleted from DB.")
             return True
         except Exception as e:
             logger.error(f"❌ DB Error (delete_booking): {e}")
             return False
 
+
+class TenantDBService(DBService):
+    """
+    DBService of one tenant: every clients/bookings query is filtered by tenant_id and every
+    insert is tagged with it (sql/tenants.sql). Shares the Supabase client of the base service,
+    so all tenants use one connection pool, but keeps its own client cache.
+    tenant_id None is the default shop next to tenants: only rows without a tenant_id, inserted untagged.
+    """
+
+    def __new__(cls, base: DBService, tenant_id: Optional[str]):
+        # Not a singleton, one instance per tenant
+        return object.__new__(cls)
+
+    def __init__(self, base: DBService, tenant_id: Optional[str]):
+        self.base = base
+        self.tenant_id = tenant_id
+        self.client_cache = ClientCache(
+            ttl_seconds=settings.CLIENT_CACHE_TTL_SECONDS,
+            max_size=settings.CLIENT_CACHE_MAX_SIZE,
+        )
+
+    async def get_client(self):
+        return await self.base.get_client()
+
+    def _scope(self, query):
+        if self.tenant_id is None:
+            return query.is_('tenant_id', 'null')
+        return query.eq('tenant_id', self.tenant_id)
+
+    def _row(self, data: dict) -> dict:
+        if self.tenant_id is None:
+            return data
+        return {**data, 'tenant_id': self.tenant_id}
+
+    def scoped(self, tenant_id: str) -> "TenantDBService":
+        return self.base.scoped(tenant_id)
+
+    def untenanted(self) -> "TenantDBService":
+        return self.base.untenanted()
+
+
 db_service = DBService()
@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.core.logger import logger
+
+# fetch functions return the OAuth2 response body: {"access_token": ..., "expires_in": ...}
+SyncFetch = Callable[[], Dict[str, Any]]
+AsyncFetch = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class GoSMSTokenManager:
+    """
+    OAuth2 access token cache shared by sync (worker threads) and async callers.
+    At most one refresh runs at a time: threads queue on a lock, coroutines on one in-flight task,
+    and an async refresh makes threads wait for it (a thread refresh makes the coroutine wait
+    in a worker thread, never on the event loop).
+    Within refresh_margin_seconds of expiry the current token is still returned and a single
+    background refresh is started, so callers only wait when the token is actually unusable.
+    """
+
+    def __init__(
+        self,
+        fetch_sync: Optional[SyncFetch] = None,
+        fetch_async: Optional[AsyncFetch] = None,
+        refresh_margin_seconds: float = 300,
+        expiry_margin_seconds: float = 60,
+    ):
+        self._fetch_sync = fetch_sync
+        self._fetch_async = fetch_async
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.expiry_margin_seconds = expiry_margin_seconds
+
+        # Held by a thread for its whole refresh; async refreshes only take it briefly
+        self._lock = threading.Lock()
+        self._refreshed = threading.Condition(self._lock)
+        # Thread (event loop) running an async refresh, guarded by _lock
+        self._async_refresh_thread: Optional[int] = None
+        # (token, expires_at) replaced as a whole, readers need no lock
+        self._state: Tuple[Optional[str], float] = (None, 0.0)
+        self._inflight: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.last_refresh_ms: Optional[float] = None
+        self._total_refresh_ms = 0.0
+
+    def set_async_fetch(self, fetch_async: AsyncFetch):
+        """Async callers fetch the token with `fetch_async` (e.g. over the GoSMS client's pool)."""
+        self._fetch_async = fetch_async
+
+    @property
+    def has_async_fetch(self) -> bool:
+        return self._fetch_async is not None
+
+    # --- State ---
+
+    def _usable(self) -> Optional[str]:
+        token, expires_at = self._state
+        if token and time.time() < expires_at - self.expiry_margin_seconds:
+            return token
+        return None
+
+    def _fresh(self) -> Optional[str]:
+        token, expires_at = self._state
+        if token and time.time() < expires_at - self.refresh_margin_seconds:
+            return token
+        return None
+
+    def invalidate(self, token: Optional[str] = None):
+        """
+        Drops the token (e.g. the API answered 401). With `token`, only if it is still the
+        current one, a concurrent refresh may already have replaced it.
+        """
+        with self._lock:
+            if token is None or self._state[0] == token:
+                self._state = (None, 0.0)
+
+    def _store(self, data: Dict[str, Any], started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        token = data.get("access_token")
+        if not token:
+            raise ValueError("token response without access_token")
+        expires_in = data.get("expires_in", 3600)
+        self._state = (token, time.time() + expires_in)
+        self.refresh_count += 1
+        self.last_refresh_ms = elapsed_ms
+        self._total_refresh_ms += elapsed_ms
+        logger.info(f"🔑 GoSMS Token obtained (expires in {expires_in}s, {elapsed_ms:.0f}ms)")
+
+    def _failed(self, e: Exception):
+        self.failure_count += 1
+        logger.error(f"❌ Failed to get GoSMS token: {e}")
+
+    # --- Sync callers ---
+
+    def _refresh_sync(self):
+        started = time.perf_counter()
+        try:
+            self._store(self._fetch_sync(), started)
+        except Exception as e:
+            self._failed(e)
+
+    def _wait_for_async_refresh(self):
+        # _lock held. The event loop thread itself (sync caller during its own async refresh) must not wait.
+        while self._async_refresh_thread not in (None, threading.get_ident()):
+            self._refreshed.wait()
+
+    def get_token(self) -> Optional[str]:
+        """Returns a valid token, refreshing it (once for all threads) when needed."""
+        token = self._fresh()
+        if token:
+            return token
+
+        token = self._usable()
+        if token:
+            # Still valid: one thread refreshes ahead of expiry, the others keep using the token
+            if self._lock.acquire(blocking=False):
+                try:
+                    if not self._fresh() and self._async_refresh_thread is None:
+                        self._refresh_sync()
+                finally:
+                    self._lock.release()
+            return self._usable() or token
+
+        with self._lock:
+            # Another thread or coroutine may have refreshed while we waited
+            self._wait_for_async_refresh()
+            if not self._usable():
+                self._refresh_sync()
+            return self._usable()
+
+    # --- Async callers ---
+
+    def _claim_refresh(self, owner: int) -> bool:
+        # _lock held. False if somebody refreshed in the meantime.
+        if self._fresh():
+            return False
+        self._async_refresh_thread = owner
+        return True
+
+    def _claim_refresh_blocking(self, owner: int) -> bool:
+        with self._lock:
+            return self._claim_refresh(owner)
+
+    async def _refresh_async(self):
+        owner = threading.get_ident()
+        if self._lock.acquire(blocking=False):
+            try:
+                claimed = self._claim_refresh(owner)
+            finally:
+                self._lock.release()
+        else:
+            # A thread is fetching a token right now, wait for it off the event loop
+            claimed = await asyncio.to_thread(self._claim_refresh_blocking, owner)
+        if not claimed:
+            return
+
+        try:
+            started = time.perf_counter()
+            try:
+                if self._fetch_async:
+                    data = await self._fetch_async()
+                else:
+                    data = await asyncio.to_thread(self._fetch_sync)
+                self._store(data, started)
+            except Exception as e:
+                self._failed(e)
+        finally:
+            with self._lock:
+                self._async_refresh_thread = None
+                self._refreshed.notify_all()
+
+    def _start_refresh(self) -> asyncio.Task:
+        task = self._inflight
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.get_running_loop().create_task(self._refresh_async())
+            self._inflight = task
+        return task
+
+    async def aget_token(self) -> Optional[str]:
+        """Async variant of get_token: concurrent coroutines share one refresh request."""
+        token = self._fresh()
+        if token:
+            return token
+
+        token = self._usable()
+        if token:
+            task = self._start_refresh()
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return token
+
+        await asyncio.shield(self._start_refresh())
+        return self._usable()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "refreshes": self.refresh_count,
+            "failures": self.failure_count,
+            "last_refresh_ms": round(self.last_refresh_ms, 1) if self.last_refresh_ms is not None else None,
+            "avg_refresh_ms": round(self._total_refresh_ms / self.refresh_count, 1) if self.refresh_count else None,
+            "expires_in_seconds": max(0, round(self._state[1] - time.time())) if self._state[0] else 0,
+        }
@@ -1,10 +1,17 @@
+from typing import Optional
+
+from app.models.config_models import CompanyConfig
 from app.tools.definitions import ALL_TOOLS
 
-def get_assistant_config():
+def get_assistant_config(company: Optional[CompanyConfig] = None):
     """
     Returns the Vapi assistant configuration.
     This separates the prompt/personality logic from the API handler.
+    With a tenant's company config the greeting and prompt name that shop; an optional
+    "assistant" block in its JSON (first_message, system_prompt, voice) overrides them.
     """
+    if company is not None:
+        return _company_assistant_config(company)
     return {
         "firstMessage": "Hello, doing great! Welcome to Smart Dental. How can I help you today?",
         "model": {
@@ -20,3 +27,22 @@ def get_assistant_config():
         },
         "voice": "jennifer-playht"
     }
+
+
+def _company_assistant_config(company: CompanyConfig) -> dict:
+    assistant = company.raw.get("assistant") or {}
+    first_message = assistant.get("first_message") or f"Dobrý den, {company.company_name}, jak vám mohu pomoci?"
+    system_prompt = assistant.get("system_prompt") or (
+        f"You are a helpful receptionist at {company.company_name}. You help customers book appointments. "
+        "Check availability first before booking. Be polite and concise."
+    )
+    return {
+        "firstMessage": first_message,
+        "model": {
+            "provider": "openai",
+            "model": "gpt-4-turbo",
+            "messages": [{"role": "system", "content": system_prompt}],
+            "tools": ALL_TOOLS
+        },
+        "voice": assistant.get("voice") or "jennifer-playht"
+    }
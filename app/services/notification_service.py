@@ -1,12 +1,21 @@
+import asyncio
 import os
 import smtplib
+import threading
 import requests
-import time
+from typing import List, Optional, Set, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from app.core.config import settings
 from app.core.logger import logger
-from app.core.config_loader import load_company_config
+from app.core.tracing import span
+from app.core.config_loader import CompanyConfigRegistry, load_company_config
 from dotenv import load_dotenv
+from fastapi import BackgroundTasks
+from app.services.gosms_token import GoSMSTokenManager
+from app.services.sms_client import GoSMSClient, SmsResult
+from app.services.smtp_pool import SMTPConnectionPool
+from app.services.outbox import Outbox
 
 # Load environment variables
 load_dotenv()
@@ -22,50 +31,40 @@ SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_USERNAME = os.getenv("SMTP_USERNAME")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 
-# Helper for caching GoSMS token
-_gosms_token = None
-_gosms_token_expires_at = 0
-
 def get_notification_config():
     """Laws notification config from company_config.json"""
     config = load_company_config()
     return config.get("notifications", {})
 
+def _fetch_gosms_token() -> dict:
+    """Requests a new OAuth2 access token from GoSMS (blocking)."""
+    with span("gosms.token"):
+        response = requests.post(
+            f"{settings.GOSMS_BASE_URL}/oauth/v2/token",
+            data={
+                "client_id": GOSMS_CLIENT_ID,
+                "client_secret": GOSMS_CLIENT_SECRET,
+                "grant_type": "client_credentials"
+            },
+            timeout=10,
+        )
+        response.raise_for_status()
+    return response.json()
+
+
+# One token for the sync send_sms path and the async GoSMS client. The client registers its
+# pooled _fetch_token for async refreshes, _fetch_gosms_token only serves sync callers.
+gosms_tokens = GoSMSTokenManager(fetch_sync=_fetch_gosms_token)
+
+
 def _get_gosms_token() -> str:
     """
-    Retrieves or refreshes OAuth2 access_token for GoSMS.
+    Retrieves or refreshes OAuth2 access_token for GoSMS (see GoSMSTokenManager).
     """
-    global _gosms_token, _gosms_token_expires_at
-    
-    # Check if token is valid (with 60sec buffer)
-    if _gosms_token and time.time() < _gosms_token_expires_at - 60:
-        return _gosms_token
-    
     if not GOSMS_CLIENT_ID or not GOSMS_CLIENT_SECRET:
          logger.error("❌ GoSMS Credentials missing (GOSMS_CLIENT_ID or GOSMS_CLIENT_SECRET).")
          return None
-
-    url = "https://app.gosms.cz/oauth/v2/token"
-    payload = {
-        "client_id": GOSMS_CLIENT_ID,
-        "client_secret": GOSMS_CLIENT_SECRET,
-        "grant_type": "client_credentials"
-    }
-    
-    try:
-        response = requests.post(url, data=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        _gosms_token = data.get("access_token")
-        expires_in = data.get("expires_in", 3600)
-        _gosms_token_expires_at = time.time() + expires_in
-        
-        logger.info(f"🔑 GoSMS Token obtained (expires in {expires_in}s)")
-        return _gosms_token
-    except Exception as e:
-        logger.error(f"❌ Failed to get GoSMS token: {e}")
-        return None
+    return gosms_tokens.get_token()
 
 def send_sms(to_number: str, message: str) -> bool:
     """
@@ -88,7 +87,7 @@ def send_sms(to_number: str, message: str) -> bool:
     # Clean phone number (remove spaces)
     clean_number = to_number.replace(" ", "").strip()
     
-    url = "https://app.gosms.cz/api/v1/messages"
+    url = f"{settings.GOSMS_BASE_URL}/api/v1/messages"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
@@ -108,7 +107,9 @@ def send_sms(to_number: str, message: str) -> bool:
     
     try:
         logger.info(f"📤 Sending SMS to {clean_number} via GoSMS...")
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        with span("gosms.send") as sp:
+            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            sp.error = response.status_code not in (200, 201)
         
         if response.status_code == 201 or response.status_code == 200:
              logger.info(f"✅ SMS successfully sent to {clean_number}.")
@@ -121,46 +122,245 @@ def send_sms(to_number: str, message: str) -> bool:
         logger.error(f"❌ Exception sending SMS via GoSMS: {e}")
         return False
 
-def send_email(subject: str, body: str, to_email: str = None) -> bool:
+_smtp_pool: Optional[SMTPConnectionPool] = None
+_smtp_pool_lock = threading.Lock()
+
+
+def _get_smtp_pool() -> SMTPConnectionPool:
+    """Shared SMTP session pool, rebuilt if the server or credentials change."""
+    global _smtp_pool
+    with _smtp_pool_lock:
+        key = (SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD)
+        if _smtp_pool is None or (_smtp_pool.host, _smtp_pool.port, _smtp_pool.username, _smtp_pool.password) != key:
+            if _smtp_pool is not None:
+                _smtp_pool.close()
+            _smtp_pool = SMTPConnectionPool(
+                SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD,
+                size=settings.SMTP_POOL_SIZE,
+                idle_timeout_seconds=settings.SMTP_IDLE_TIMEOUT_SECONDS,
+            )
+        return _smtp_pool
+
+
+def close_smtp_pool():
+    global _smtp_pool
+    with _smtp_pool_lock:
+        if _smtp_pool is not None:
+            _smtp_pool.close()
+            _smtp_pool = None
+
+
+def _build_email(subject: str, body: str, to_email: str) -> str:
+    msg = MIMEMultipart()
+    msg['From'] = SMTP_USERNAME
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg.as_string()
+
+
+def send_emails(emails: List[Tuple[str, str, Optional[str]]], config: Optional[dict] = None) -> int:
     """
-    Sends an email using SMTP (e.g., Gmail).
-    defaults `to_email` to the owner_email from config if not provided.
-    Returns: True if successful, False otherwise.
+    Sends (subject, body, to_email) emails over one pooled SMTP session.
+    `to_email` None means owner_email from config (a tenant's raw config, default company_config.json).
+    Returns the number of emails sent.
     """
-    config = load_company_config()
+    config = config if config is not None else load_company_config()
     notif_config = config.get("notifications", {})
-    
+
     if not notif_config.get("email_enabled", False):
          logger.info("ℹ️ Email notifications are disabled in config.")
-         return False
-
-    if not to_email:
-        to_email = config.get("owner_email")
-        if not to_email:
-             logger.error("❌ No recipient email found (owner_email missing in config).")
-             return False
+         return 0
 
     if not SMTP_USERNAME or not SMTP_PASSWORD:
         logger.error("❌ SMTP credentials missing in .env.")
-        return False
+        return 0
+
+    messages = []
+    for subject, body, to_email in emails:
+        to_email = to_email or config.get("owner_email")
+        if not to_email:
+             logger.error("❌ No recipient email found (owner_email missing in config).")
+             continue
+        messages.append((SMTP_USERNAME, [to_email], _build_email(subject, body, to_email)))
 
     try:
-        msg = MIMEMultipart()
-        msg['From'] = SMTP_USERNAME
-        msg['To'] = to_email
-        msg['Subject'] = subject
-
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(SMTP_USERNAME, to_email, text)
-        server.quit()
-        
-        logger.info(f"✅ Email odeslán na {to_email} with subject: '{subject}'")
-        return True
+        with span("smtp.send") as sp:
+            sent = _get_smtp_pool().send_many(messages)
+            sp.error = sent < len(messages)
+        logger.info(f"✅ Odesláno {sent}/{len(emails)} emailů")
+        return sent
     except Exception as e:
         logger.error(f"❌ Chyba odeslání Emailu: {e}")
-        return False
+        return 0
+
+
+def send_email(subject: str, body: str, to_email: str = None, config: Optional[dict] = None) -> bool:
+    """
+    Sends an email using SMTP (e.g., Gmail) over a pooled, already authenticated session.
+    defaults `to_email` to the owner_email from config if not provided.
+    Returns: True if successful, False otherwise.
+    """
+    sent = send_emails([(subject, body, to_email)], config) == 1
+    if sent:
+        logger.info(f"✅ Email odeslán with subject: '{subject}'")
+    return sent
+
+
+class NotificationDispatcher:
+    """
+    Sends client SMS and owner emails off the request path.
+    SMS go through the async GoSMS client (pooled connections, bounded concurrency, retries),
+    emails run in a worker thread. Nothing here blocks the event loop.
+    A tenant's dispatcher shares the GoSMS client (pool, token) and the outbox of the default one,
+    but reads its own company config and sends from its own SMS channel.
+    """
+
+    def __init__(
+        self,
+        sms_client: Optional[GoSMSClient] = None,
+        outbox: Optional[Outbox] = None,
+        config: Optional[CompanyConfigRegistry] = None,
+        tenant_id: Optional[str] = None,
+        sms_channel_id: Optional[str] = None,
+    ):
+        # With an outbox, sms()/email() only record the message and OutboxWorker delivers it
+        self.outbox = outbox
+        self.config = config
+        self.tenant_id = tenant_id
+        self.sms_channel_id = sms_channel_id
+        self.sms_client = sms_client or GoSMSClient(
+            GOSMS_CLIENT_ID,
+            GOSMS_CLIENT_SECRET,
+            GOSMS_CHANNEL_ID,
+            base_url=settings.GOSMS_BASE_URL,
+            max_concurrency=settings.GOSMS_MAX_CONCURRENCY,
+            max_retries=settings.GOSMS_MAX_RETRIES,
+            backoff_base_seconds=settings.GOSMS_BACKOFF_BASE_SECONDS,
+            requests_per_second=settings.GOSMS_REQUESTS_PER_SECOND,
+            max_recipients_per_request=settings.GOSMS_MAX_RECIPIENTS_PER_REQUEST,
+            token_manager=gosms_tokens,
+        )
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _company_config(self) -> Optional[dict]:
+        """Raw config of this dispatcher's tenant, None = company_config.json."""
+        return self.config.get().raw if self.config is not None else None
+
+    def _notification_config(self) -> dict:
+        if self.config is None:
+            return get_notification_config()
+        return self._company_config().get("notifications", {})
+
+    def for_tenant(self, tenant_id: str, config: CompanyConfigRegistry, sms_channel_id: Optional[str] = None) -> "NotificationDispatcher":
+        """Dispatcher of a tenant on this dispatcher's GoSMS client and outbox."""
+        return NotificationDispatcher(
+            sms_client=self.sms_client,
+            outbox=self.outbox,
+            config=config,
+            tenant_id=tenant_id,
+            sms_channel_id=sms_channel_id,
+        )
+
+    async def send_sms(self, to_number: str, message: str) -> bool:
+        return (await self.deliver_sms(to_number, message)).ok
+
+    async def deliver_sms(self, to_number: str, message: str) -> SmsResult:
+        """Sends one SMS, telling retryable failures from final ones (see GoSMSClient.send_one)."""
+        if not self._notification_config().get("sms_enabled", False):
+            logger.info("ℹ️ SMS notifications are disabled in config.")
+            return SmsResult(to_number, False, "sms disabled")
+        return await self.sms_client.send_one(to_number, message, channel_id=self.sms_channel_id)
+
+    async def send_sms_bulk(self, messages: List[Tuple[str, str]]) -> List[SmsResult]:
+        """Sends (to_number, message) pairs, batching identical texts (see GoSMSClient.send_bulk)."""
+        if not self._notification_config().get("sms_enabled", False):
+            logger.info("ℹ️ SMS notifications are disabled in config.")
+            return [SmsResult(to_number, False, "sms disabled") for to_number, _ in messages]
+        return await self.sms_client.send_bulk(messages, channel_id=self.sms_channel_id)
+
+    async def send_email(self, subject: str, body: str, to_email: str = None) -> bool:
+        return await asyncio.to_thread(send_email, subject, body, to_email, self._company_config())
+
+    def _schedule(self, background_tasks: Optional[BackgroundTasks], func, *args):
+        if background_tasks is not None:
+            background_tasks.add_task(func, *args)
+            return
+        # No request context (e.g. webhook deadline path), run it as a tracked task
+        task = asyncio.get_running_loop().create_task(func(*args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _enqueue(self, kind: str, payload: dict, dedup_key: Optional[str], fallback) -> bool:
+        """
+        Stores the message in the outbox. Returns False if there is no outbox or it failed.
+        On the event loop the SQLite write runs in a worker thread (tracked task, see drain())
+        and `fallback()` sends the message directly if it fails.
+        """
+        if self.outbox is None:
+            return False
+        if self.tenant_id is not None:
+            # The shared OutboxWorker hands the message back to this tenant's dispatcher
+            payload = {**payload, "tenant": self.tenant_id}
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            task = loop.create_task(self._enqueue_off_loop(kind, payload, dedup_key, fallback))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return True
+        try:
+            self.outbox.enqueue(kind, payload, dedup_key)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Outbox enqueue failed, sending directly: {e}")
+            return False
+
+    async def _enqueue_off_loop(self, kind: str, payload: dict, dedup_key: Optional[str], fallback):
+        try:
+            await self.outbox.aenqueue(kind, payload, dedup_key)
+        except Exception as e:
+            logger.error(f"❌ Outbox enqueue failed, sending directly: {e}")
+            await fallback()
+
+    def sms(self, to_number: str, message: str, background_tasks: Optional[BackgroundTasks] = None, dedup_key: Optional[str] = None):
+        if self.outbox is not None and not self._notification_config().get("sms_enabled", False):
+            logger.info("ℹ️ SMS notifications are disabled in config.")
+            return
+        if self._enqueue("sms", {"to": to_number, "message": message}, dedup_key, lambda: self.send_sms(to_number, message)):
+            logger.info(f"📮 SMS for {to_number} queued in outbox")
+            return
+        logger.info(f"📨 Scheduling SMS for {to_number} in background...")
+        self._schedule(background_tasks, self.send_sms, to_number, message)
+
+    def email(self, subject: str, body: str, background_tasks: Optional[BackgroundTasks] = None, to_email: str = None, dedup_key: Optional[str] = None):
+        if self.outbox is not None and not self._notification_config().get("email_enabled", False):
+            logger.info("ℹ️ Email notifications are disabled in config.")
+            return
+        if self._enqueue("email", {"subject": subject, "body": body, "to_email": to_email}, dedup_key, lambda: self.send_email(subject, body, to_email)):
+            logger.info(f"📮 Email '{subject}' queued in outbox")
+            return
+        logger.info(f"📨 Scheduling Email for owner in background...")
+        self._schedule(background_tasks, self.send_email, subject, body, to_email)
+
+    async def drain(self):
+        """Waits for outbox writes and notifications scheduled without BackgroundTasks."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def aclose(self):
+        await self.drain()
+        if self.tenant_id is not None:
+            # GoSMS client, SMTP pool and outbox belong to the default dispatcher
+            return
+        await self.sms_client.aclose()
+        await asyncio.to_thread(close_smtp_pool)
+        if self.outbox is not None:
+            self.outbox.close()
+
+
+notification_dispatcher = NotificationDispatcher(
+    outbox=Outbox(settings.OUTBOX_PATH, max_attempts=settings.OUTBOX_MAX_ATTEMPTS) if settings.OUTBOX_ENABLED else None
+)
@@ -0,0 +1,337 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedup_key TEXT UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS outbox_dead (
+    id INTEGER PRIMARY KEY,
+    dedup_key TEXT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    failed_at REAL NOT NULL,
+    last_error TEXT
+);
+"""
+
+
+@dataclass
+class OutboxMessage:
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+    dedup_key: Optional[str] = None
+
+
+class Outbox:
+    """
+    Durable notification queue in SQLite (WAL mode).
+    Messages are written before anything is sent, a worker drains them with retries;
+    a message that keeps failing is moved to the outbox_dead table.
+    dedup_key makes enqueueing idempotent (e.g. one confirmation SMS per booking).
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5, backoff_base_seconds: float = 5.0, backoff_max_seconds: float = 600.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module does not create the file
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- Producer side ---
+
+    def _insert(self, kind: str, payload: Dict[str, Any], dedup_key: Optional[str]) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._db().execute(
+                "INSERT OR IGNORE INTO outbox (dedup_key, kind, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (dedup_key, kind, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+            return cursor.rowcount == 1
+
+    def _enqueued(self, kind: str, dedup_key: Optional[str], created: bool) -> bool:
+        if created:
+            self.notify()
+        else:
+            logger.info(f"♻️ Outbox: duplicate {kind} '{dedup_key}' ignored")
+        return created
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], dedup_key: Optional[str] = None) -> bool:
+        """Stores a message (blocking). Returns False if a message with the same dedup_key already exists."""
+        return self._enqueued(kind, dedup_key, self._insert(kind, payload, dedup_key))
+
+    async def aenqueue(self, kind: str, payload: Dict[str, Any], dedup_key: Optional[str] = None) -> bool:
+        """enqueue() with the SQLite write and commit in a worker thread, for the request path."""
+        created = await asyncio.to_thread(self._insert, kind, payload, dedup_key)
+        return self._enqueued(kind, dedup_key, created)
+
+    def _insert_many(self, items: List[Tuple[str, Dict[str, Any], Optional[str]]]) -> int:
+        now = time.time()
+        created = 0
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                for kind, payload, dedup_key in items:
+                    cursor = db.execute(
+                        "INSERT OR IGNORE INTO outbox (dedup_key, kind, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                        (dedup_key, kind, json.dumps(payload, ensure_ascii=False), now, now),
+                    )
+                    created += cursor.rowcount
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return created
+
+    async def aenqueue_many(self, items: List[Tuple[str, Dict[str, Any], Optional[str]]]) -> int:
+        """
+        Stores (kind, payload, dedup_key) messages in one transaction, in a worker thread.
+        Returns how many were new (duplicates are skipped).
+        """
+        if not items:
+            return 0
+        created = await asyncio.to_thread(self._insert_many, items)
+        if created:
+            self.notify()
+        return created
+
+    def notify(self):
+        """Wakes the worker (call from the event loop thread)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_for_work(self, timeout: float):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    # --- Worker side ---
+
+    def recover(self) -> int:
+        """Returns messages left 'sending' by a previous process to the queue."""
+        with self._lock:
+            cursor = self._db().execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+            return cursor.rowcount
+
+    def claim_batch(self, limit: int) -> List[OutboxMessage]:
+        """Marks up to `limit` due messages as 'sending' and returns them (oldest first)."""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = db.execute(
+                    "SELECT id, kind, payload, attempts, dedup_key FROM outbox "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at, id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                db.executemany("UPDATE outbox SET status = 'sending' WHERE id = ?", [(row[0],) for row in rows])
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return [OutboxMessage(row[0], row[1], json.loads(row[2]), row[3], row[4]) for row in rows]
+
+    def mark_sent(self, message_id: int):
+        with self._lock:
+            self._db().execute("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?", (time.time(), message_id))
+
+    def mark_failed(self, message: OutboxMessage, error: str, retry: bool = True):
+        """
+        Schedules a retry with exponential backoff, or dead-letters the message after max_attempts.
+        retry=False dead-letters it right away (rejected for good, or it may already have been sent).
+        """
+        attempts = message.attempts + 1
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            if not retry or attempts >= self.max_attempts:
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO outbox_dead (id, dedup_key, kind, payload, attempts, created_at, failed_at, last_error) "
+                        "SELECT id, dedup_key, kind, payload, ?, created_at, ?, ? FROM outbox WHERE id = ?",
+                        (attempts, now, error, message.id),
+                    )
+                    # Keep the row (status 'dead') so the dedup key stays taken
+                    db.execute("UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?", (attempts, error, message.id))
+                    db.execute("COMMIT")
+                except Exception:
+                    db.execute("ROLLBACK")
+                    raise
+                reason = f"after {attempts} attempts" if retry else "without retry"
+                logger.error(f"☠️ Outbox: {message.kind} #{message.id} dead-lettered {reason}: {error}")
+                return
+            delay = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** (attempts - 1)))
+            db.execute(
+                "UPDATE outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, now + delay, error, message.id),
+            )
+        logger.warning(f"🔁 Outbox: {message.kind} #{message.id} failed ({error}), retry in {delay:.0f}s")
+
+    def prune(self, retention_seconds: float, now: Optional[float] = None) -> int:
+        """
+        Deletes messages sent more than retention_seconds ago (their dedup keys become free again).
+        Dead messages stay, they are kept for inspection. Returns the number of deleted rows.
+        """
+        cutoff = (time.time() if now is None else now) - retention_seconds
+        with self._lock:
+            cursor = self._db().execute("DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?", (cutoff,))
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+            dead = self._db().execute("SELECT COUNT(*) FROM outbox_dead").fetchone()[0]
+        counts = {"pending": 0, "sending": 0, "sent": 0, "dead": 0}
+        counts.update(dict(rows))
+        counts["dead_letters"] = dead
+        return counts
+
+
+class OutboxWorker:
+    """
+    Drains the outbox in batches through the notification dispatcher.
+    Messages queued by a tenant carry its id and go through that tenant's dispatcher (`dispatchers`).
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        dispatcher,
+        batch_size: int = 20,
+        poll_interval_seconds: float = 2.0,
+        dispatchers: Optional[Callable[[str], Any]] = None,
+        retention_seconds: float = 7 * 24 * 3600,
+        prune_interval_seconds: float = 3600,
+    ):
+        self.outbox = outbox
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.dispatchers = dispatchers
+        self.retention_seconds = retention_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+
+    def _dispatcher_for(self, message: OutboxMessage):
+        tenant_id = message.payload.get("tenant")
+        if tenant_id is None or self.dispatchers is None:
+            return self.dispatcher
+        return self.dispatchers(tenant_id) or self.dispatcher
+
+    async def _deliver(self, message: OutboxMessage):
+        payload = message.payload
+        dispatcher = self._dispatcher_for(message)
+        retry = True
+        try:
+            if message.kind == "sms":
+                result = await dispatcher.deliver_sms(payload["to"], payload["message"])
+                error = None if result.ok else (result.error or "provider rejected")
+                retry = result.retryable
+            elif message.kind == "email":
+                ok = await dispatcher.send_email(payload["subject"], payload["body"], payload.get("to_email"))
+                error = None if ok else "provider rejected or unavailable"
+            else:
+                raise ValueError(f"unknown message kind '{message.kind}'")
+        except Exception as e:
+            error = repr(e)
+        await self._finish(message, error, retry)
+
+    async def _finish(self, message: OutboxMessage, error: Optional[str], retry: bool = True):
+        if error is None:
+            await asyncio.to_thread(self.outbox.mark_sent, message.id)
+        else:
+            await asyncio.to_thread(self.outbox.mark_failed, message, error, retry)
+
+    async def _deliver_sms_bulk(self, messages: List[OutboxMessage], dispatcher=None):
+        """Several SMS at once go out through the bulk API (identical texts share a request)."""
+        dispatcher = dispatcher or self.dispatcher
+        try:
+            results = await dispatcher.send_sms_bulk([(m.payload["to"], m.payload["message"]) for m in messages])
+            outcomes = [(None if result.ok else (result.error or "provider rejected"), result.retryable) for result in results]
+        except Exception as e:
+            outcomes = [(repr(e), True)] * len(messages)
+        await asyncio.gather(*(self._finish(message, error, retry) for message, (error, retry) in zip(messages, outcomes)))
+
+    async def drain_once(self) -> int:
+        """Sends one batch of due messages. Returns the batch size."""
+        batch = await asyncio.to_thread(self.outbox.claim_batch, self.batch_size)
+        sms = [message for message in batch if message.kind == "sms"]
+        if len(sms) > 1 and hasattr(self.dispatcher, "send_sms_bulk"):
+            others = [message for message in batch if message.kind != "sms"]
+            # One bulk send per dispatcher (tenants have their own SMS channel)
+            by_dispatcher: Dict[int, Tuple[Any, List[OutboxMessage]]] = {}
+            for message in sms:
+                dispatcher = self._dispatcher_for(message)
+                by_dispatcher.setdefault(id(dispatcher), (dispatcher, []))[1].append(message)
+            await asyncio.gather(
+                *(self._deliver_sms_bulk(messages, dispatcher) for dispatcher, messages in by_dispatcher.values()),
+                *(self._deliver(message) for message in others),
+            )
+        elif batch:
+            await asyncio.gather(*(self._deliver(message) for message in batch))
+        return len(batch)
+
+    async def run(self):
+        """Background task: drains the outbox until cancelled."""
+        recovered = await asyncio.to_thread(self.outbox.recover)
+        logger.info(f"📮 Outbox worker started ({recovered} interrupted messages requeued)")
+        prune_at = 0.0
+        while True:
+            try:
+                while await self.drain_once() == self.batch_size:
+                    pass
+                if time.time() >= prune_at:
+                    prune_at = time.time() + self.prune_interval_seconds
+                    pruned = await asyncio.to_thread(self.outbox.prune, self.retention_seconds)
+                    if pruned:
+                        logger.info(f"🧹 Outbox: {pruned} sent messages pruned")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Outbox worker error: {e}")
+            await self.outbox.wait_for_work(self.poll_interval_seconds)
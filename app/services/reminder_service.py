@@ -0,0 +1,144 @@
+import asyncio
+import heapq
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.core.config_loader import CompanyConfigRegistry
+from app.core.logger import logger
+from app.services.db_service import DBService
+from app.services.outbox import Outbox
+
+TZ = ZoneInfo('Europe/Prague')
+
+# (due timestamp, dedup key, phone, message)
+Reminder = Tuple[float, str, str, str]
+
+
+def _parse_start(value: str) -> Optional[datetime]:
+    try:
+        start = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    return start if start.tzinfo else start.replace(tzinfo=TZ)
+
+
+class ReminderScheduler:
+    """
+    Sends appointment reminders at the offsets from notifications.reminder_offsets_hours.
+    Upcoming bookings are read from Supabase in pages and kept in a min-heap of due times;
+    due reminders go to the outbox with key reminder:<booking>:<offset>, so a restart
+    rebuilds the heap without sending anything twice. Each reminder is shifted by a stable
+    per-booking delay within reminder_spread_seconds so a busy day does not burst at once.
+    """
+
+    def __init__(
+        self,
+        db: DBService,
+        outbox: Outbox,
+        config: CompanyConfigRegistry,
+        refresh_interval_seconds: float = 300,
+        grace_seconds: float = 3600,
+        page_size: int = 500,
+        tenant_id: Optional[str] = None,
+    ):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.outbox = outbox
+        self.config = config
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.grace_seconds = grace_seconds
+        self.page_size = page_size
+        self._heap: List[Reminder] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _render(self, booking: dict, start: datetime) -> Optional[str]:
+        templates = self.config.get().templates
+        client = booking.get('clients') or {}
+        variables = templates.booking_variables(
+            client.get('full_name'), client.get('phone_number'), booking.get('service_type'), start.astimezone(TZ)
+        )
+        try:
+            return templates.render("reminder", variables)
+        except (KeyError, ValueError, TypeError) as e:
+            # One broken reminder must not stop the whole schedule
+            logger.error(f"❌ Error preparing reminder SMS for booking {booking.get('id')}: {e}")
+            return None
+
+    async def refresh(self, now: Optional[float] = None) -> int:
+        """Rebuilds the heap from upcoming bookings (cancelled bookings simply drop out)."""
+        now = time.time() if now is None else now
+        notifications = self.config.get().notifications
+        offsets = sorted(set(notifications.reminder_offsets_hours))
+        if not offsets:
+            self._heap = []
+            return 0
+
+        window_start = datetime.fromtimestamp(now, TZ)
+        window_end = window_start + timedelta(hours=max(offsets), seconds=self.refresh_interval_seconds + notifications.reminder_spread_seconds)
+        bookings = await self.db.get_bookings_between(window_start, window_end, page_size=self.page_size)
+
+        heap: List[Reminder] = []
+        for booking in bookings:
+            phone = (booking.get('clients') or {}).get('phone_number')
+            start = _parse_start(booking.get('start_time'))
+            if not phone or not start:
+                continue
+            message = None
+            for offset in offsets:
+                key = f"reminder:{booking['id']}:{offset:g}h"
+                spread = zlib.crc32(key.encode()) % notifications.reminder_spread_seconds if notifications.reminder_spread_seconds else 0
+                due = start.timestamp() - offset * 3600 + spread
+                # Booked too late for this reminder (or we were down for too long)
+                if due < now - self.grace_seconds or due >= start.timestamp():
+                    continue
+                message = message or self._render(booking, start)
+                if message:
+                    heap.append((due, key, phone, message))
+
+        heapq.heapify(heap)
+        self._heap = heap
+        logger.info(f"⏰ Reminder schedule refreshed: {len(heap)} reminders from {len(bookings)} bookings")
+        return len(heap)
+
+    async def fire_due(self, now: Optional[float] = None) -> int:
+        """Queues every reminder that is due (one outbox transaction). Returns how many were newly queued."""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, key, phone, message = heapq.heappop(self._heap)
+            payload = {"to": phone, "message": message}
+            if self.tenant_id is not None:
+                payload["tenant"] = self.tenant_id
+            due.append(("sms", payload, key))
+        queued = await self.outbox.aenqueue_many(due)
+        if queued:
+            logger.info(f"⏰ Queued {queued} reminder SMS")
+        return queued
+
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    async def run(self):
+        """Background task: refreshes the schedule periodically and fires reminders on time."""
+        logger.info("⏰ Reminder scheduler started")
+        refresh_at = 0.0
+        while True:
+            try:
+                if time.time() >= refresh_at:
+                    await self.refresh()
+                    refresh_at = time.time() + self.refresh_interval_seconds
+                await self.fire_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Reminder scheduler error: {e}")
+                refresh_at = time.time() + self.refresh_interval_seconds
+
+            next_due = self.next_due()
+            wake_at = min(refresh_at, next_due) if next_due is not None else refresh_at
+            await asyncio.sleep(max(0.0, min(wake_at - time.time(), self.refresh_interval_seconds)))
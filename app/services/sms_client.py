@@ -0,0 +1,313 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.core.logger import logger
+from app.core.tracing import span
+from app.services.gosms_token import GoSMSTokenManager
+
+GOSMS_BASE_URL = "https://app.gosms.cz"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Transport errors raised before the request reached GoSMS, safe to retry even for a send
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+@dataclass
+class SmsResult:
+    """
+    Outcome of one SMS: sent (ok), not sent but safe to send again (retryable),
+    or final - rejected by GoSMS, or possibly sent (the request went out but no answer came back).
+    """
+    to: str
+    ok: bool
+    error: Optional[str] = None
+    retryable: bool = False
+
+
+class GoSMSUnreachable(httpx.TransportError):
+    """Every attempt failed before the request reached GoSMS, nothing was sent."""
+
+
+def _is_retryable_status(status_code: int) -> bool:
+    # 401 = token revoked early, the next attempt fetches a new one
+    return status_code in RETRY_STATUSES or status_code == 401
+
+
+class RateLimiter:
+    """Spaces out requests to at most `rate` per second (async, no bursts)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class GoSMSClient:
+    """
+    Async GoSMS API client on one keep-alive connection pool.
+    Concurrency is bounded by a semaphore, 5xx/429 and transport errors are retried
+    with full-jitter exponential backoff (Retry-After is honoured when present).
+    """
+
+    def __init__(
+        self,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        channel_id: Optional[str],
+        base_url: str = GOSMS_BASE_URL,
+        max_concurrency: int = 5,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 10.0,
+        timeout_seconds: float = 10.0,
+        requests_per_second: float = 0,
+        max_recipients_per_request: int = 100,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        token_manager: Optional[GoSMSTokenManager] = None,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.channel_id = channel_id
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.timeout_seconds = timeout_seconds
+        self.requests_per_second = requests_per_second
+        self.max_recipients_per_request = max_recipients_per_request
+        self._rate_limiter = RateLimiter(requests_per_second)
+        self._transport = transport
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # May be shared with the sync send_sms path, async refreshes always go over this pool
+        self.token_manager = token_manager or GoSMSTokenManager()
+        if not self.token_manager.has_async_fetch:
+            self.token_manager.set_async_fetch(self._fetch_token)
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # The pool and asyncio primitives belong to one event loop, rebuild them if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            self._loop = loop
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout_seconds,
+                transport=self._transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._rate_limiter = RateLimiter(self.requests_per_second)
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max_seconds)
+        cap = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    async def _request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """
+        Sends a request, retrying 5xx/429/transport errors. Returns the last response.
+        Non-idempotent requests (sending messages) are only retried on transport errors raised
+        before the request went out, a read timeout may mean GoSMS already sent the SMS.
+        """
+        http = self._ensure_client()
+        attempt = 0
+        while True:
+            response = None
+            try:
+                await self._rate_limiter.acquire()
+                async with self._semaphore:
+                    response = await http.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                if not idempotent and not isinstance(e, NOT_SENT_ERRORS):
+                    raise
+                error = repr(e)
+
+            if attempt >= self.max_retries:
+                if response is not None:
+                    return response
+                raise GoSMSUnreachable(f"GoSMS unreachable after {attempt + 1} attempts: {error}")
+
+            delay = self._backoff(attempt, response)
+            logger.warning(f"🔁 GoSMS {method} {url} failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _fetch_token(self) -> dict:
+        with span("gosms.token"):
+            response = await self._request("POST", "/oauth/v2/token", data={
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "client_credentials",
+            })
+            response.raise_for_status()
+        return response.json()
+
+    async def get_token(self) -> Optional[str]:
+        """Returns a cached OAuth2 access token (see GoSMSTokenManager)."""
+        if not self.client_id or not self.client_secret:
+            logger.error("❌ GoSMS Credentials missing (GOSMS_CLIENT_ID or GOSMS_CLIENT_SECRET).")
+            return None
+        self._ensure_client()
+        return await self.token_manager.aget_token()
+
+    def _channel(self, channel_id: Optional[str] = None):
+        # API expects an int channel, fall back to the raw value
+        channel_id = channel_id or self.channel_id
+        try:
+            return int(channel_id)
+        except (TypeError, ValueError):
+            return channel_id
+
+    async def send_sms(self, to_number: str, message: str, channel_id: Optional[str] = None) -> bool:
+        """Sends one SMS (from `channel_id`, default the client's channel). Returns True if GoSMS accepted it."""
+        return (await self.send_one(to_number, message, channel_id)).ok
+
+    async def send_one(self, to_number: str, message: str, channel_id: Optional[str] = None) -> SmsResult:
+        """Like send_sms, but tells a retryable failure from a final one (see SmsResult)."""
+        if not (channel_id or self.channel_id):
+            logger.error("❌ GOSMS_CHANNEL_ID is missing in .env.")
+            return SmsResult(to_number, False, "channel missing")
+
+        token = await self.get_token()
+        if not token:
+            return SmsResult(to_number, False, "no token", retryable=True)
+
+        clean_number = to_number.replace(" ", "").strip()
+        payload = {"message": message, "recipients": [clean_number], "channel": self._channel(channel_id)}
+
+        try:
+            logger.info(f"📤 Sending SMS to {clean_number} via GoSMS...")
+            with span("gosms.send") as sp:
+                response = await self._request(
+                    "POST", "/api/v1/messages", idempotent=False, json=payload, headers={"Authorization": f"Bearer {token}"}
+                )
+                sp.error = response.status_code not in (200, 201)
+            if response.status_code == 401:
+                # Token revoked early, drop it so the next send fetches a new one
+                self.token_manager.invalidate(token)
+            if response.status_code in (200, 201):
+                logger.info(f"✅ SMS successfully sent to {clean_number}.")
+                return SmsResult(clean_number, True)
+            logger.error(f"❌ GoSMS Error {response.status_code}: {response.text}")
+            return SmsResult(
+                clean_number, False, f"GoSMS Error {response.status_code}: {response.text}",
+                retryable=_is_retryable_status(response.status_code),
+            )
+        except GoSMSUnreachable as e:
+            logger.error(f"❌ GoSMS unreachable: {e}")
+            return SmsResult(clean_number, False, repr(e), retryable=True)
+        except Exception as e:
+            # E.g. a read timeout after the request went out: GoSMS may have sent it
+            logger.error(f"❌ Exception sending SMS via GoSMS: {e}")
+            return SmsResult(clean_number, False, f"outcome unknown: {e!r}")
+
+    async def _send_batch(self, token: str, message: str, recipients: List[str], channel_id: Optional[str] = None) -> Dict[str, SmsResult]:
+        """Sends one text to several recipients in one request. Returns {number: SmsResult}."""
+        payload = {"message": message, "recipients": recipients, "channel": self._channel(channel_id)}
+        try:
+            with span("gosms.send_batch") as sp:
+                response = await self._request(
+                    "POST", "/api/v1/messages", idempotent=False, json=payload, headers={"Authorization": f"Bearer {token}"}
+                )
+                sp.error = response.status_code not in (200, 201)
+        except GoSMSUnreachable as e:
+            return {number: SmsResult(number, False, repr(e), retryable=True) for number in recipients}
+        except Exception as e:
+            return {number: SmsResult(number, False, f"outcome unknown: {e!r}") for number in recipients}
+
+        if response.status_code not in (200, 201):
+            if response.status_code == 401:
+                self.token_manager.invalidate(token)
+            error = f"GoSMS Error {response.status_code}: {response.text}"
+            retryable = _is_retryable_status(response.status_code)
+            return {number: SmsResult(number, False, error, retryable=retryable) for number in recipients}
+
+        # GoSMS accepts the message and lists the numbers it could not use
+        try:
+            invalid = set(response.json().get("recipients", {}).get("invalid", []))
+        except Exception:
+            invalid = set()
+        return {
+            number: SmsResult(number, False, "invalid recipient") if number in invalid else SmsResult(number, True)
+            for number in recipients
+        }
+
+    async def send_bulk(self, messages: Iterable[Tuple[str, str]], channel_id: Optional[str] = None) -> List[SmsResult]:
+        """
+        Sends many (to_number, message) SMS with as few requests as possible:
+        recipients of an identical text share a request (up to max_recipients_per_request).
+        Returns one SmsResult per input message, in input order.
+        """
+        messages = [(to_number.replace(" ", "").strip(), text) for to_number, text in messages]
+        if not messages:
+            return []
+        if not (channel_id or self.channel_id):
+            logger.error("❌ GOSMS_CHANNEL_ID is missing in .env.")
+            return [SmsResult(to, False, "channel missing") for to, _ in messages]
+
+        token = await self.get_token()
+        if not token:
+            return [SmsResult(to, False, "no token", retryable=True) for to, _ in messages]
+
+        by_text: Dict[str, List[str]] = {}
+        for to_number, text in messages:
+            recipients = by_text.setdefault(text, [])
+            if to_number not in recipients:
+                recipients.append(to_number)
+
+        batches = []
+        for text, recipients in by_text.items():
+            for i in range(0, len(recipients), self.max_recipients_per_request):
+                batches.append((text, recipients[i:i + self.max_recipients_per_request]))
+
+        logger.info(f"📤 Sending {len(messages)} SMS via GoSMS in {len(batches)} requests...")
+        outcomes = await asyncio.gather(*(self._send_batch(token, text, recipients, channel_id) for text, recipients in batches))
+
+        by_message: Dict[Tuple[str, str], SmsResult] = {}
+        for (text, _), outcome in zip(batches, outcomes):
+            for number, result in outcome.items():
+                by_message[(number, text)] = result
+
+        results = [by_message[(to, text)] for to, text in messages]
+        failed = sum(1 for r in results if not r.ok)
+        if failed:
+            logger.error(f"❌ Bulk SMS: {failed}/{len(results)} failed")
+        else:
+            logger.info(f"✅ Bulk SMS: all {len(results)} sent.")
+        return results
@@ -0,0 +1,155 @@
+import smtplib
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from app.core.logger import logger
+
+# Errors after which the session is dropped (the next message opens a fresh one).
+# Not OSError as such: every smtplib.SMTPException is one, server replies keep the session.
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Keeps authenticated SMTP sessions open between emails (blocking, thread-safe).
+    Idle sessions are health-checked with NOOP before reuse and closed after idle_timeout.
+    A session that fails mid-send is replaced for the next message, but that message is not
+    resent: the server may already have accepted it.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 2,
+        idle_timeout_seconds: float = 240,
+        health_check_after_seconds: float = 30,
+        use_starttls: bool = True,
+        timeout_seconds: float = 10,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.health_check_after_seconds = health_check_after_seconds
+        self.use_starttls = use_starttls
+        self.timeout_seconds = timeout_seconds
+
+        self._idle: List[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connects = 0
+
+    # --- Sessions ---
+
+    def _connect(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout_seconds)
+        try:
+            if self.use_starttls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        self.connects += 1
+        logger.debug(f"📬 SMTP session opened to {self.host}:{self.port}")
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _is_alive(self, conn: _PooledConnection) -> bool:
+        try:
+            return conn.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> _PooledConnection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+
+            idle_for = time.monotonic() - conn.last_used
+            if idle_for > self.idle_timeout_seconds:
+                self._close(conn.smtp)
+                continue
+            if idle_for > self.health_check_after_seconds and not self._is_alive(conn):
+                self._close(conn.smtp)
+                continue
+            return conn
+
+    def _release(self, conn: _PooledConnection):
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    # --- Sending ---
+
+    def send_many(self, messages: List[Tuple[str, List[str], str]]) -> int:
+        """
+        Sends (from_addr, to_addrs, message) tuples over one session.
+        Returns the number of messages accepted by the server.
+        """
+        if not messages:
+            return 0
+        sent = 0
+        with self._slots:
+            conn = None
+            try:
+                conn = self._acquire()
+                for from_addr, to_addrs, text in messages:
+                    if conn is None:
+                        conn = self._connect()
+                    try:
+                        conn.smtp.sendmail(from_addr, to_addrs, text)
+                    except _CONNECTION_ERRORS as e:
+                        # Lost after DATA may have started: resending could deliver it twice
+                        logger.error(f"❌ SMTP session lost while sending to {to_addrs} ({e}), not resending")
+                        self._close(conn.smtp)
+                        conn = None
+                        continue
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                        # The server answered (refused recipient/sender/data, policy...), the session
+                        # is fine and sending the same message again would get the same answer
+                        logger.error(f"❌ SMTP rejected message to {to_addrs}: {e}")
+                        continue
+                    sent += 1
+            except Exception:
+                if conn is not None:
+                    self._close(conn.smtp)
+                    conn = None
+                raise
+            finally:
+                if conn is not None:
+                    self._release(conn)
+        return sent
+
+    def send(self, from_addr: str, to_addrs: List[str], text: str) -> bool:
+        return self.send_many([(from_addr, to_addrs, text)]) == 1
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn.smtp)
@@ -0,0 +1,180 @@
+import asyncio
+import datetime
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.tracing import span
+from app.models.config_models import StaffMember
+from app.models.db_models import Booking
+from app.services.availability import Interval, ResourceFreeBusyIndex
+from app.services.calendar_service import PRAGUE_TZ, CalendarService, SlotUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Google answers at most 50 calendars per freebusy query (calendarExpansionMax)
+MAX_FREEBUSY_CALENDARS = 50
+
+
+def _parse_busy(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(PRAGUE_TZ)
+
+
+class StaffCalendars:
+    """
+    Calendars of the staff members (one Google Calendar per barber) behind one client.
+    Availability over all of them is one freebusy().query round trip, or none when every
+    busy cache is fresh. Bookings go to the first free member or to the requested one.
+    """
+
+    def __init__(self, client, staff: Iterable[StaffMember], calendars: Optional[Dict[str, CalendarService]] = None):
+        self.client = client
+        self.members: List[StaffMember] = list(staff)
+        # calendar_id -> CalendarService, passing existing instances keeps their busy caches
+        self._calendars: Dict[str, CalendarService] = {}
+        for member in self.members:
+            if member.calendar_id not in self._calendars:
+                existing = (calendars or {}).get(member.calendar_id)
+                self._calendars[member.calendar_id] = existing or CalendarService(client, member.calendar_id)
+
+    @property
+    def calendars(self) -> Dict[str, CalendarService]:
+        """calendar_id -> CalendarService of every staff calendar."""
+        return dict(self._calendars)
+
+    def calendar_for(self, member: StaffMember) -> CalendarService:
+        return self._calendars[member.calendar_id]
+
+    def _query_freebusy(self, calendar_ids: Sequence[str], start: datetime.datetime, end: datetime.datetime) -> Dict[str, List[Interval]]:
+        """Busy intervals of the calendars from freebusy().query, one round trip per 50 calendars."""
+        service = self.client.get_service()
+        if not service:
+            return {calendar_id: [] for calendar_id in calendar_ids}
+
+        busy: Dict[str, List[Interval]] = {}
+        for chunk_start in range(0, len(calendar_ids), MAX_FREEBUSY_CALENDARS):
+            chunk = calendar_ids[chunk_start:chunk_start + MAX_FREEBUSY_CALENDARS]
+            body = {
+                'timeMin': start.isoformat(),
+                'timeMax': end.isoformat(),
+                'items': [{'id': calendar_id} for calendar_id in chunk],
+            }
+            try:
+                with span("google.freebusy"):
+                    result = service.freebusy().query(body=body).execute()
+            except Exception as e:
+                # Same fallback as get_busy_slots, the insert still checks its slot live
+                logger.error(f"❌ Error querying free/busy: {e}")
+                busy.update({calendar_id: [] for calendar_id in chunk})
+                continue
+
+            calendars = result.get('calendars', {})
+            for calendar_id in chunk:
+                entry = calendars.get(calendar_id)
+                if entry is None or entry.get('errors'):
+                    # A calendar we cannot read must not look free
+                    logger.warning(f"⚠️ Free/busy unavailable for {calendar_id}: {(entry or {}).get('errors')}")
+                    busy[calendar_id] = [(start, end)]
+                    continue
+                busy[calendar_id] = [(_parse_busy(b['start']), _parse_busy(b['end'])) for b in entry.get('busy', [])]
+        return busy
+
+    async def busy_by_calendar(self, start: datetime.datetime, end: datetime.datetime, calendar_ids: Optional[Iterable[str]] = None) -> Dict[str, List[Interval]]:
+        """
+        calendar_id -> busy intervals in [start, end).
+        Fresh caches answer locally, the rest is fetched together in one freebusy query.
+        """
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=PRAGUE_TZ)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=PRAGUE_TZ)
+
+        ids = list(dict.fromkeys(calendar_ids if calendar_ids is not None else self._calendars))
+        busy = {calendar_id: self._calendars[calendar_id].cache.busy_between(start, end) for calendar_id in ids}
+        stale = [calendar_id for calendar_id, intervals in busy.items() if intervals is None]
+        if stale:
+            busy.update(await asyncio.to_thread(self._query_freebusy, stale, start, end))
+        return busy
+
+    async def index(self, start: datetime.datetime, end: datetime.datetime, members: Optional[Sequence[StaffMember]] = None) -> ResourceFreeBusyIndex:
+        """Per-member free/busy index (keyed by staff id, in configured order)."""
+        members = members or self.members
+        busy = await self.busy_by_calendar(start, end, [member.calendar_id for member in members])
+        return ResourceFreeBusyIndex({member.id: busy[member.calendar_id] for member in members})
+
+    async def free_members(self, start: datetime.datetime, end: datetime.datetime, members: Optional[Sequence[StaffMember]] = None) -> List[StaffMember]:
+        """Members free for the whole [start, end), in configured order."""
+        members = members or self.members
+        free = set((await self.index(start, end, members)).free_resources(start, end))
+        return [member for member in members if member.id in free]
+
+    async def create_event_if_free(
+        self,
+        booking: Booking,
+        start_time: datetime.datetime,
+        duration_minutes: int = 60,
+        phone: str = "",
+        members: Optional[Sequence[StaffMember]] = None,
+    ) -> Tuple[StaffMember, Optional[dict]]:
+        """
+        Books the first free member (of `members`, default all staff) with a conditional insert
+        into their calendar. Returns (member, event) like CalendarService.create_event_if_free,
+        raises SlotUnavailableError if nobody is free.
+        """
+        if start_time.tzinfo is None:
+            start_time = start_time.replace(tzinfo=PRAGUE_TZ)
+        end_time = start_time + datetime.timedelta(minutes=duration_minutes)
+
+        for member in await self.free_members(start_time, end_time, members):
+            try:
+                event = await self.calendar_for(member).create_event_if_free(
+                    booking, start_time, duration_minutes=duration_minutes, phone=phone
+                )
+                return member, event
+            except SlotUnavailableError:
+                # Taken since the free/busy answer, try the next one
+                logger.info(f"⛔ {member.name} is no longer free at {start_time.isoformat()}")
+        raise SlotUnavailableError(start_time.isoformat())
+
+    async def delete_event(self, event_id: str) -> bool:
+        """
+        Deletes the event from the staff calendar holding it. Bookings don't store the calendar,
+        so the owner is looked up in the busy caches, then the calendars are tried in order.
+        """
+        calendars = list(self._calendars.values())
+        owner = next((calendar for calendar in calendars if calendar.cache.has_event(event_id)), None)
+        if owner is not None:
+            return await owner.delete_event(event_id)
+        for calendar in calendars:
+            if await calendar.delete_event(event_id):
+                return True
+        return False
+
+    def _nearest_owner(self, phone_number: str) -> Tuple[Optional[CalendarService], bool]:
+        """
+        (calendar holding the phone's nearest future event, whether every index could be read).
+        Blocking: stale caches are synced first, call from a worker thread.
+        """
+        now = datetime.datetime.now(PRAGUE_TZ)
+        owner, owner_start, complete = None, None, True
+        for calendar in self._calendars.values():
+            matches = calendar.cache.events_for_phone(phone_number, after=now)
+            if matches is None:
+                calendar.cache.sync()
+                matches = calendar.cache.events_for_phone(phone_number, after=now)
+            if matches is None:
+                logger.warning(f"⚠️ Phone index of {calendar.calendar_id} unavailable")
+                complete = False
+                continue
+            if matches and (owner_start is None or matches[0][1][0] < owner_start):
+                owner, owner_start = calendar, matches[0][1][0]
+        return owner, complete
+
+    async def cancel_event_by_phone(self, phone_number: str) -> str:
+        """
+        Deletes the phone's nearest future event on any staff calendar (fallback when the DB
+        has no booking), see CalendarService.cancel_event_by_description.
+        """
+        owner, complete = await asyncio.to_thread(self._nearest_owner, phone_number)
+        if owner is None:
+            return "Na toto číslo nemám žádnou rezervaci." if complete else "Došlo k chybě při rušení rezervace."
+        return await owner.cancel_event_by_description(phone_number)
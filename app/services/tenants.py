@@ -0,0 +1,116 @@
+import asyncio
+import glob
+import os
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.config_loader import CompanyConfigRegistry
+from app.core.logger import logger
+from app.core.phone import normalize_phone
+from app.services.calendar_service import CALENDAR_ID, CREDENTIALS_FILE, CalendarClient, CalendarService
+from app.services.container import ServiceContainer
+from app.services.db_service import TenantDBService
+from app.services.notification_service import NotificationDispatcher
+
+
+class TenantRegistry:
+    """
+    In-memory registry of the companies served by this process (one data/tenants/<id>.json each).
+    Every tenant gets its own ServiceContainer: company config, Google Calendar client and busy
+    cache, DB view scoped by tenant_id and notification dispatcher. The Supabase client, the GoSMS
+    connection pool and the outbox are shared with the default container.
+    Requests are routed by Vapi assistant ID or the called number (dict lookups), anything
+    unknown stays on the default container, i.e. the single-tenant deployment keeps working.
+    """
+
+    def __init__(self, default: ServiceContainer, directory: Optional[str] = None):
+        self.default = default
+        self.directory = directory if directory is not None else settings.TENANTS_DIR
+        self._tenants: Dict[str, ServiceContainer] = {}
+        self._by_assistant: Dict[str, str] = {}
+        self._by_number: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    @property
+    def tenant_ids(self) -> List[str]:
+        return list(self._tenants)
+
+    def get(self, tenant_id: str) -> Optional[ServiceContainer]:
+        return self._tenants.get(tenant_id)
+
+    def add(self, tenant_id: str, config: CompanyConfigRegistry, calendar: Optional[CalendarService] = None) -> ServiceContainer:
+        """
+        Builds and registers the container of one tenant.
+        Raises ValueError if its assistant IDs or numbers already belong to another tenant.
+        """
+        routing = config.get().tenant
+        numbers = [normalize_phone(number) for number in routing.phone_numbers if number]
+        claims = [(self._by_assistant, assistant_id) for assistant_id in routing.assistant_ids]
+        claims += [(self._by_number, number) for number in numbers]
+        for owners, key in claims:
+            owner = owners.get(key)
+            if owner is not None and owner != tenant_id:
+                raise ValueError(f"'{key}' is already routed to tenant {owner}")
+
+        if calendar is None:
+            if not routing.calendar_id:
+                logger.warning(f"⚠️ Tenant {tenant_id} has no tenant.calendar_id, using {CALENDAR_ID}")
+            # Own client (token, per-thread services) and busy cache per tenant
+            client = CalendarClient(credentials_file=routing.google_credentials_file or CREDENTIALS_FILE)
+            calendar = CalendarService(client, routing.calendar_id or CALENDAR_ID)
+
+        container = ServiceContainer.create(
+            config=config,
+            calendar=calendar,
+            db=self.default.db.scoped(tenant_id),
+            notifier=self.default.notifier.for_tenant(tenant_id, config, routing.sms_channel_id),
+            tenant_id=tenant_id,
+        )
+        self._tenants[tenant_id] = container
+        if not isinstance(self.default.db, TenantDBService):
+            # The default shop must not see (remind, cancel, reuse clients of) other shops' rows.
+            # Its own view, the process-wide db_service keeps seeing everything
+            self.default.use_db(self.default.db.untenanted())
+        self._by_assistant.update({assistant_id: tenant_id for assistant_id in routing.assistant_ids})
+        self._by_number.update({number: tenant_id for number in numbers})
+        return container
+
+    def load(self) -> int:
+        """Registers a tenant per *.json in the tenants directory. Broken files are logged and skipped."""
+        if not os.path.isdir(self.directory):
+            return 0
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            tenant_id = os.path.splitext(os.path.basename(path))[0]
+            try:
+                self.add(tenant_id, CompanyConfigRegistry(path))
+            except (FileNotFoundError, ValueError) as e:
+                logger.error(f"❌ Tenant {tenant_id} skipped: {e}")
+        logger.info(f"🏢 {len(self._tenants)} tenants loaded from {self.directory}")
+        return len(self._tenants)
+
+    def find(self, assistant_id: Optional[str] = None, phone_number: Optional[str] = None) -> Optional[ServiceContainer]:
+        """Container of the tenant owning the assistant (or else the called number), None if unknown."""
+        tenant_id = self._by_assistant.get(assistant_id) if assistant_id else None
+        if tenant_id is None and phone_number:
+            tenant_id = self._by_number.get(normalize_phone(phone_number))
+        return self._tenants.get(tenant_id) if tenant_id else None
+
+    def resolve(self, assistant_id: Optional[str] = None, phone_number: Optional[str] = None) -> ServiceContainer:
+        """Like find(), falling back to the default container."""
+        return self.find(assistant_id, phone_number) or self.default
+
+    def dispatcher(self, tenant_id: str) -> Optional[NotificationDispatcher]:
+        """Notification dispatcher of a tenant (used by the shared OutboxWorker)."""
+        container = self._tenants.get(tenant_id)
+        return container.notifier if container is not None else None
+
+    async def start(self):
+        # The default container runs the one outbox worker for everybody
+        await self.default.start(dispatchers=self.dispatcher)
+        await asyncio.gather(*(container.start(outbox_worker=False) for container in self._tenants.values()))
+
+    async def stop(self):
+        await asyncio.gather(*(container.stop() for container in self._tenants.values()))
+        await self.default.stop()
@@ -15,6 +15,10 @@ CHECK_AVAILABILITY_TOOL = {
                 "time": {
                     "type": "string",
                     "description": "The specific time to check in HH:MM format (e.g., '14:00')."
+                },
+                "staff": {
+                    "type": "string",
+                    "description": "Optional name of the preferred staff member (e.g. 'Petr'). Omit for anyone who is free."
                 }
             },
             "required": ["day", "time"]
@@ -22,6 +26,28 @@ CHECK_AVAILABILITY_TOOL = {
     }
 }
 
+FIND_FREE_SLOTS_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "find_free_slots",
+        "description": "List free appointment times for a whole day (e.g. 'what is free on Friday').",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "day": {
+                    "type": "string",
+                    "description": "The day to list free times for, in ISO 8601 format YYYY-MM-DD."
+                },
+                "staff": {
+                    "type": "string",
+                    "description": "Optional name of the preferred staff member (e.g. 'Petr'). Omit for anyone who is free."
+                }
+            },
+            "required": ["day"]
+        }
+    }
+}
+
 BOOK_APPOINTMENT_TOOL = {
     "type": "function",
     "function": {
@@ -45,6 +71,10 @@ BOOK_APPOINTMENT_TOOL = {
                 "service": {
                     "type": "string",
                     "description": "The service requested (e.g. 'dental checkup')."
+                },
+                "staff": {
+                    "type": "string",
+                    "description": "Optional name of the preferred staff member (e.g. 'Petr'). Omit for anyone who is free."
                 }
             },
             "required": ["day", "time", "name"]
@@ -70,4 +100,4 @@ CANCEL_BOOKING_TOOL = {
     }
 }
 
-ALL_TOOLS = [CHECK_AVAILABILITY_TOOL, BOOK_APPOINTMENT_TOOL, CANCEL_BOOKING_TOOL]
+ALL_TOOLS = [CHECK_AVAILABILITY_TOOL, FIND_FREE_SLOTS_TOOL, BOOK_APPOINTMENT_TOOL, CANCEL_BOOKING_TOOL]
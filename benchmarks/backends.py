@@ -0,0 +1,267 @@
+"""
+In-process fake backends for the benchmarks, each with an injected per-call latency:
+Google Calendar (googleapiclient-shaped service), Supabase (a PostgREST-compatible ASGI app
+behind the real supabase client) and GoSMS (the FakeGoSMS app from the tests).
+"""
+import asyncio
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from supabase import AsyncClient, create_async_client
+from supabase.lib.client_options import AsyncClientOptions
+
+from app.services.notification_service import NotificationDispatcher
+from app.services.sms_client import GoSMSClient
+from tests.fakes import FakeCalendarClient, FakeCalendarService, FakeGoSMS
+
+__all__ = [
+    "LatencyCalendarService",
+    "FakeCalendarClient",
+    "FakePostgREST",
+    "FakeGoSMS",
+    "BenchmarkDispatcher",
+]
+
+
+class LatencyCalendarService(FakeCalendarService):
+    """FakeCalendarService that sleeps `latency` seconds per API call and is safe to call from worker threads."""
+
+    def __init__(self, latency: float = 0.0, page_size: int = 250):
+        super().__init__(page_size=page_size)
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def _call(self, fn, *args):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            return fn(*args)
+
+    def _list(self, params: dict) -> dict:
+        return self._call(super()._list, params)
+
+    def _insert(self, calendar_id: str, body: dict) -> dict:
+        return self._call(super()._insert, calendar_id, body)
+
+    def _delete(self, calendar_id: str, event_id: str):
+        return self._call(super()._delete, calendar_id, event_id)
+
+
+# (parent table, embedded table) -> (parent column, embedded column, to-many)
+RELATIONS = {
+    ("clients", "bookings"): ("id", "client_id", True),
+    ("bookings", "clients"): ("client_id", "id", False),
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset"}
+
+
+def _split_select(select: str) -> Tuple[List[str], Dict[str, List[str]]]:
+    """'id,full_name,bookings(*)' -> (['id', 'full_name'], {'bookings': ['*']})"""
+    columns, embeds = [], {}
+    depth, current = 0, ""
+    for char in select + ",":
+        if char == "," and depth == 0:
+            item = current.strip()
+            current = ""
+            if not item:
+                continue
+            if "(" in item:
+                name, inner = item.split("(", 1)
+                embeds[name.strip()] = [c.strip() for c in inner.rstrip(")").split(",")]
+            else:
+                columns.append(item)
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    return columns or ["*"], embeds
+
+
+def _coerce(stored: Any, raw: str) -> Tuple[Any, Any]:
+    """Makes a stored value and a filter literal comparable (ints, timestamps, text)."""
+    if isinstance(stored, bool):
+        return stored, raw == "true"
+    if isinstance(stored, int):
+        return stored, int(raw)
+    if isinstance(stored, str) and stored[4:5] == "-" and stored[:4].isdigit():
+        try:
+            left, right = datetime.fromisoformat(stored), datetime.fromisoformat(raw)
+        except ValueError:
+            return stored, raw
+        # timestamptz semantics: a value without offset is UTC
+        left = left if left.tzinfo else left.replace(tzinfo=timezone.utc)
+        right = right if right.tzinfo else right.replace(tzinfo=timezone.utc)
+        return left, right
+    return stored, raw
+
+
+def _matches(row: dict, column: str, expression: str) -> bool:
+    op, _, raw = expression.partition(".")
+    value = row.get(column)
+    if op == "is":
+        return value is None if raw == "null" else value is not None
+    if value is None:
+        return False
+    left, right = _coerce(value, raw)
+    if op == "eq":
+        return left == right
+    if op == "neq":
+        return left != right
+    if op == "gt":
+        return left > right
+    if op == "gte":
+        return left >= right
+    if op == "lt":
+        return left < right
+    if op == "lte":
+        return left <= right
+    raise ValueError(f"unsupported operator {op}")
+
+
+def _order(rows: List[dict], spec: Optional[str]) -> List[dict]:
+    if not spec:
+        return rows
+    # Stable sorts from the last key to the first
+    for key in reversed(spec.split(",")):
+        column, _, direction = key.partition(".")
+        rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith("desc"))
+    return rows
+
+
+def _page(rows: List[dict], offset: Optional[str], limit: Optional[str]) -> List[dict]:
+    start = int(offset or 0)
+    return rows[start:start + int(limit)] if limit is not None else rows[start:]
+
+
+def _project(row: dict, columns: List[str]) -> dict:
+    if "*" in columns:
+        return dict(row)
+    return {column: row.get(column) for column in columns}
+
+
+class FakePostgREST:
+    """
+    Minimal PostgREST (Supabase REST) for the clients/bookings schema: select with embedded
+    resources, eq/neq/gt/gte/lt/lte/is filters (also on embedded tables), order, limit/offset,
+    insert, update and delete with return=representation. Each request waits `latency` seconds.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: Dict[str, List[dict]] = {"clients": [], "bookings": []}
+        self._ids = {name: itertools.count(1) for name in self.tables}
+        self.requests = 0
+        self.app = Starlette(routes=[
+            Route("/rest/v1/{table}", self._handle, methods=["GET", "POST", "PATCH", "DELETE"]),
+        ])
+
+    # --- Seeding ---
+
+    def insert_row(self, table: str, row: dict) -> dict:
+        row = dict(row)
+        row.setdefault("id", next(self._ids[table]))
+        self.tables[table].append(row)
+        return row
+
+    async def client(self, url: str = "http://supabase.test") -> AsyncClient:
+        """Real supabase AsyncClient whose REST calls are served by this app."""
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        return await create_async_client(url, "benchmark-key", options=AsyncClientOptions(httpx_client=http))
+
+    # --- REST ---
+
+    def _filters(self, params: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], Dict[str, Dict[str, List]]]:
+        own, embedded = [], {}
+        for key, value in params:
+            if key in RESERVED_PARAMS:
+                continue
+            if "." in key:
+                embed, column = key.split(".", 1)
+                bucket = embedded.setdefault(embed, {"filters": [], "order": None, "limit": None, "offset": None})
+                if column in RESERVED_PARAMS:
+                    bucket[column] = value
+                else:
+                    bucket["filters"].append((column, value))
+            else:
+                own.append((key, value))
+        return own, embedded
+
+    def _select(self, table: str, rows: List[dict], request: Request) -> List[dict]:
+        params = request.query_params.multi_items()
+        columns, embeds = _split_select(request.query_params.get("select", "*"))
+        own, embedded = self._filters(params)
+
+        rows = [r for r in rows if all(_matches(r, c, e) for c, e in own)]
+        rows = _page(_order(rows, request.query_params.get("order")), request.query_params.get("offset"), request.query_params.get("limit"))
+
+        result = []
+        for row in rows:
+            out = _project(row, columns)
+            for embed, embed_columns in embeds.items():
+                parent_column, child_column, to_many = RELATIONS[(table, embed)]
+                spec = embedded.get(embed, {"filters": [], "order": None, "limit": None, "offset": None})
+                children = [
+                    child for child in self.tables[embed]
+                    if child.get(child_column) == row.get(parent_column)
+                    and all(_matches(child, c, e) for c, e in spec["filters"])
+                ]
+                children = _page(_order(children, spec["order"]), spec["offset"], spec["limit"])
+                children = [_project(child, embed_columns) for child in children]
+                out[embed] = children if to_many else (children[0] if children else None)
+            result.append(out)
+        return result
+
+    async def _handle(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        table = request.path_params["table"]
+        if table not in self.tables:
+            return JSONResponse({"message": f"relation {table} does not exist"}, status_code=404)
+        rows = self.tables[table]
+
+        if request.method == "GET":
+            return JSONResponse(self._select(table, rows, request))
+
+        if request.method == "POST":
+            body = await request.json()
+            created = [self.insert_row(table, row) for row in (body if isinstance(body, list) else [body])]
+            return JSONResponse(created, status_code=201)
+
+        own, _ = self._filters(request.query_params.multi_items())
+        matched = [r for r in rows if all(_matches(r, c, e) for c, e in own)]
+        if request.method == "PATCH":
+            changes = await request.json()
+            for row in matched:
+                row.update(changes)
+        else:
+            self.tables[table] = [r for r in rows if not any(r is m for m in matched)]
+        return JSONResponse(matched)
+
+
+class BenchmarkDispatcher(NotificationDispatcher):
+    """NotificationDispatcher with SMS going to a FakeGoSMS app and email replaced by a fixed delay."""
+
+    def __init__(self, gosms: FakeGoSMS, smtp_latency: float = 0.0):
+        super().__init__(sms_client=GoSMSClient(
+            "benchmark-id", "benchmark-secret", "1",
+            base_url="http://gosms.test",
+            transport=httpx.ASGITransport(app=gosms.app),
+        ))
+        self.smtp_latency = smtp_latency
+        self.emails_sent = 0
+
+    async def send_email(self, subject: str, body: str, to_email: str = None) -> bool:
+        await asyncio.sleep(self.smtp_latency)
+        self.emails_sent += 1
+        return True
@@ -0,0 +1,403 @@
+"""
+Offline benchmark of the tool-call hot paths.
+
+    python -m benchmarks.run --requests 200 --concurrency 8
+
+Drives /api/webhook and /tools/* in-process (httpx ASGITransport) against fake Google Calendar,
+Supabase and GoSMS backends with injected latency (see benchmarks/backends.py), prints throughput
+and p50/p95/p99 per scenario and exits with status 1 when a limit from benchmarks/thresholds.json
+or the allowed regression against a saved baseline (--baseline) is exceeded.
+The thresholds assume the default backend latencies.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import httpx
+
+from app.core.config import settings
+from app.core.tracing import metrics
+from app.services.calendar_service import CalendarService
+from app.services.client_cache import ClientCache
+from app.services.container import ServiceContainer
+from app.services.db_service import DBService
+from benchmarks.backends import BenchmarkDispatcher, FakeCalendarClient, FakeGoSMS, FakePostgREST, LatencyCalendarService
+
+TZ = ZoneInfo("Europe/Prague")
+THRESHOLDS_FILE = Path(__file__).with_name("thresholds.json")
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class BenchmarkConfig:
+    requests: int = 200
+    concurrency: int = 8
+    calendar_latency_ms: float = 80
+    supabase_latency_ms: float = 30
+    gosms_latency_ms: float = 50
+    smtp_latency_ms: float = 100
+    scenarios: Optional[List[str]] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: str
+    payload: Callable[[int], dict]
+    # Validates the response body, a False counts as an error
+    ok: Callable[[dict], bool] = lambda body: True
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    seconds: float
+    latencies_ms: List[float] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.requests / self.seconds, 1) if self.seconds else 0.0,
+            **{f"p{p}_ms": round(percentile(self.latencies_ms, p), 2) for p in PERCENTILES},
+            "max_ms": round(max(self.latencies_ms), 2) if self.latencies_ms else 0.0,
+        }
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class ResponseTimer:
+    """
+    ASGI wrapper that records when the response body is complete.
+    ASGITransport only returns after Starlette background tasks (SMS, email) have run,
+    while a real caller has its answer as soon as the body is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sent_at: Dict[bytes, float] = {}
+
+    async def __call__(self, scope, receive, send):
+        key = dict(scope.get("headers") or []).get(b"x-benchmark-request")
+
+        async def timed_send(message):
+            await send(message)
+            if key and message["type"] == "http.response.body" and not message.get("more_body"):
+                self.sent_at[key] = time.perf_counter()
+
+        await self.app(scope, receive, timed_send)
+
+
+def _working_slots(first_day: date) -> Iterator[datetime]:
+    """Hourly 09:00-16:00 starts on weekdays, all inside business hours."""
+    for offset in itertools.count():
+        day = first_day + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for hour in range(9, 17):
+            yield datetime(day.year, day.month, day.day, hour, tzinfo=TZ)
+
+
+def _tool_call(name: str, arguments: dict, call_id: str, caller: Optional[str] = None) -> dict:
+    call = {"id": call_id}
+    if caller:
+        call["customer"] = {"number": caller}
+    return {"message": {
+        "type": "tool-calls",
+        "call": call,
+        "toolCalls": [{"id": "call-1", "type": "function", "function": {"name": name, "arguments": arguments}}],
+    }}
+
+
+def _tool_result(body: dict) -> str:
+    return body["results"][0]["result"]
+
+
+class Workload:
+    """
+    Deterministic inputs for all scenarios: distinct free slots for bookings and, for lookups
+    and cancellations, one pre-seeded client with a booking (DB row + calendar event) per request.
+    """
+
+    def __init__(self, requests: int, first_day: date):
+        slots = _working_slots(first_day)
+        self.requests = requests
+        self.free_slots = [next(slots) for _ in range(2 * requests)]
+        self.seeded: List[Tuple[str, datetime]] = [(f"+420600{i:06d}", next(slots)) for i in range(3 * requests)]
+        self.days = sorted({slot.date() for slot in self.free_slots + [start for _, start in self.seeded]})
+
+    def seed(self, calendar: LatencyCalendarService, supabase: FakePostgREST):
+        for i, (phone, start) in enumerate(self.seeded):
+            event = calendar.add_event(start, start + timedelta(hours=1), summary=f"Klient {i}", description=f"Tel: {phone}")
+            client = supabase.insert_row("clients", {"phone_number": phone, "full_name": f"Klient {i}"})
+            supabase.insert_row("bookings", {
+                "client_id": client["id"],
+                "start_time": start.isoformat(),
+                "service_type": "Střih",
+                "gcal_event_id": event["id"],
+            })
+
+    def check_slot(self, i: int) -> datetime:
+        # Alternate free and taken slots so both availability paths are measured
+        return self.free_slots[i % len(self.free_slots)] if i % 2 else self.seeded[i % len(self.seeded)][1]
+
+    def day(self, i: int) -> str:
+        return self.days[i % len(self.days)].isoformat()
+
+    def scenarios(self) -> List[Scenario]:
+        n = self.requests
+
+        def slot_args(slot: datetime) -> dict:
+            return {"day": slot.strftime("%Y-%m-%d"), "time": slot.strftime("%H:%M")}
+
+        def booking_args(slot: datetime, i: int) -> dict:
+            return {**slot_args(slot), "name": f"Nový Klient {i}", "phone": f"+420700{i:06d}", "service": "Střih"}
+
+        return [
+            Scenario(
+                "webhook.check_availability", "/api/webhook",
+                lambda i: _tool_call("check_availability", slot_args(self.check_slot(i)), f"bench-check-{i}"),
+                lambda body: not _tool_result(body).startswith("Došlo k chybě"),
+            ),
+            Scenario(
+                "webhook.find_free_slots", "/api/webhook",
+                lambda i: _tool_call("find_free_slots", {"day": self.day(i)}, f"bench-slots-{i}"),
+                lambda body: not _tool_result(body).startswith("Došlo k chybě"),
+            ),
+            Scenario(
+                "webhook.book_appointment", "/api/webhook",
+                lambda i: _tool_call("book_appointment", booking_args(self.free_slots[i], i), f"bench-book-{i}"),
+                lambda body: "vytvořena" in _tool_result(body),
+            ),
+            Scenario(
+                "webhook.cancel_booking", "/api/webhook",
+                lambda i: _tool_call("cancel_booking", {}, f"bench-cancel-{i}", caller=self.seeded[n + i][0]),
+                lambda body: "zrušena" in _tool_result(body),
+            ),
+            Scenario(
+                "tools.check_availability", "/tools/check_availability",
+                lambda i: slot_args(self.check_slot(i + 1)),
+                lambda body: isinstance(body.get("result"), str),
+            ),
+            Scenario(
+                "tools.find_free_slots", "/tools/find_free_slots",
+                lambda i: {"day": self.day(i + 1)},
+                lambda body: isinstance(body.get("result"), str),
+            ),
+            Scenario(
+                "tools.book_appointment", "/tools/book_appointment",
+                lambda i: booking_args(self.free_slots[n + i], n + i),
+                lambda body: "vytvořena" in body.get("message", ""),
+            ),
+            Scenario(
+                "tools.get_booking", "/tools/get_booking",
+                lambda i: {"phone": self.seeded[i][0]},
+                lambda body: body.get("exists") is True,
+            ),
+            Scenario(
+                "tools.cancel_booking", "/tools/cancel_booking",
+                lambda i: {"phone": self.seeded[2 * n + i][0]},
+                lambda body: body.get("success") is True,
+            ),
+        ]
+
+
+async def _run_scenario(http: httpx.AsyncClient, timer: ResponseTimer, scenario: Scenario, requests: int, concurrency: int) -> ScenarioResult:
+    result = ScenarioResult(scenario.name, requests, 0, 0.0)
+    indexes = iter(range(requests))
+
+    async def worker():
+        for i in indexes:
+            key = f"{scenario.name}-{i}"
+            started = time.perf_counter()
+            try:
+                response = await http.post(scenario.path, json=scenario.payload(i), headers={"x-benchmark-request": key})
+                ok = response.status_code == 200 and scenario.ok(response.json())
+            except Exception:
+                ok = False
+            finished = timer.sent_at.pop(key.encode(), time.perf_counter())
+            result.latencies_ms.append((finished - started) * 1000)
+            if not ok:
+                result.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+async def run_benchmark(config: BenchmarkConfig) -> dict:
+    """Runs the selected scenarios against fresh fake backends. Returns summaries per scenario and span."""
+    from app.main import app
+
+    calendar_backend = LatencyCalendarService(latency=config.calendar_latency_ms / 1000)
+    supabase = FakePostgREST(latency=config.supabase_latency_ms / 1000)
+    gosms = FakeGoSMS(latency=config.gosms_latency_ms / 1000)
+
+    # Far enough ahead that no slot is in the past or collides with the current day
+    workload = Workload(config.requests, date.today() + timedelta(days=7))
+    workload.seed(calendar_backend, supabase)
+    scenarios = [s for s in workload.scenarios() if not config.scenarios or s.name in config.scenarios]
+
+    # DBService is a process-wide singleton: point it at the fake and restore it afterwards
+    db = DBService()
+    previous_db = (db._client, db.client_cache)
+    previous_container = getattr(app.state, "container", None)
+    db._client = await supabase.client()
+    db.client_cache = ClientCache(ttl_seconds=settings.CLIENT_CACHE_TTL_SECONDS, max_size=settings.CLIENT_CACHE_MAX_SIZE)
+
+    calendar = CalendarService(FakeCalendarClient(calendar_backend), "primary")
+    notifier = BenchmarkDispatcher(gosms, smtp_latency=config.smtp_latency_ms / 1000)
+    container = ServiceContainer.create(calendar=calendar, db=db, notifier=notifier)
+    app.state.container = container
+
+    results = {}
+    try:
+        await container.start()
+        await asyncio.to_thread(calendar.cache.sync)
+        metrics.reset()
+
+        timer = ResponseTimer(app)
+        transport = httpx.ASGITransport(app=timer)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as http:
+            for scenario in scenarios:
+                outcome = await _run_scenario(http, timer, scenario, config.requests, config.concurrency)
+                results[scenario.name] = outcome.summary()
+    finally:
+        await container.stop()
+        app.state.container = previous_container
+        db._client, db.client_cache = previous_db
+
+    return {
+        "config": asdict(config),
+        "scenarios": results,
+        "spans": metrics.snapshot(),
+        "backend_requests": {
+            "calendar": len(calendar_backend.calls),
+            "supabase": supabase.requests,
+            "gosms": gosms.requests,
+            "email": notifier.emails_sent,
+        },
+    }
+
+
+def evaluate(
+    scenarios: Dict[str, dict],
+    thresholds: Dict[str, dict],
+    baseline: Optional[Dict[str, dict]] = None,
+    max_regression: float = 0.25,
+    regression_slack_ms: float = 5.0,
+) -> List[str]:
+    """
+    Returns the violations: absolute limits (p50_ms/p95_ms/p99_ms/min_rps/max_error_rate, with
+    "default" applying to every scenario) and, with a baseline, p95/p99 growth above max_regression
+    (plus regression_slack_ms so sub-millisecond jitter on fast paths does not fail the run).
+    """
+    failures = []
+    defaults = thresholds.get("default", {})
+    for name, summary in scenarios.items():
+        limits = {**defaults, **thresholds.get(name, {})}
+        for p in PERCENTILES:
+            metric = f"p{p}_ms"
+            if metric in limits and summary[metric] > limits[metric]:
+                failures.append(f"{name}: {metric} {summary[metric]:.1f} > limit {limits[metric]}")
+        if "min_rps" in limits and summary["rps"] < limits["min_rps"]:
+            failures.append(f"{name}: rps {summary['rps']:.1f} < limit {limits['min_rps']}")
+        error_rate = summary["errors"] / summary["requests"] if summary["requests"] else 0.0
+        if error_rate > limits.get("max_error_rate", 0.0):
+            failures.append(f"{name}: error rate {error_rate:.1%} > limit {limits.get('max_error_rate', 0.0):.1%}")
+
+        previous = (baseline or {}).get(name)
+        if previous:
+            for metric in ("p95_ms", "p99_ms"):
+                allowed = previous[metric] * (1 + max_regression) + regression_slack_ms
+                if summary[metric] > allowed:
+                    failures.append(f"{name}: {metric} {summary[metric]:.1f} regressed from baseline {previous[metric]:.1f} (allowed {allowed:.1f})")
+    return failures
+
+
+def format_report(report: dict) -> str:
+    header = f"{'scenario':<28} {'req':>5} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)"
+    lines = [header, "-" * len(header)]
+    for name, s in report["scenarios"].items():
+        lines.append(
+            f"{name:<28} {s['requests']:>5} {s['errors']:>4} {s['rps']:>8.1f} "
+            f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['max_ms']:>8.1f}"
+        )
+    if report.get("spans"):
+        lines += ["", f"{'span':<36} {'count':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8}  (ms, bucket estimate)"]
+        for name, s in report["spans"].items():
+            lines.append(f"{name:<36} {s['count']:>6} {s['errors']:>4} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the webhook and /tools hot paths.")
+    parser.add_argument("--requests", type=int, default=BenchmarkConfig.requests, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=BenchmarkConfig.concurrency)
+    parser.add_argument("--calendar-latency-ms", type=float, default=BenchmarkConfig.calendar_latency_ms)
+    parser.add_argument("--supabase-latency-ms", type=float, default=BenchmarkConfig.supabase_latency_ms)
+    parser.add_argument("--gosms-latency-ms", type=float, default=BenchmarkConfig.gosms_latency_ms)
+    parser.add_argument("--smtp-latency-ms", type=float, default=BenchmarkConfig.smtp_latency_ms)
+    parser.add_argument("--scenario", action="append", dest="scenarios", help="run only this scenario (repeatable)")
+    parser.add_argument("--thresholds", type=Path, default=THRESHOLDS_FILE, help="JSON with per-scenario limits")
+    parser.add_argument("--baseline", type=Path, help="report JSON of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p95/p99 growth vs baseline (0.25 = 25%%)")
+    parser.add_argument("--save", type=Path, help="write the report JSON here (usable as a later --baseline)")
+    parser.add_argument("--verbose", action="store_true", help="keep application INFO logs")
+    args = parser.parse_args(argv)
+
+    from app.core.logger import logger
+    import app.main  # noqa: F401  (configures logging on import)
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    config = BenchmarkConfig(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        calendar_latency_ms=args.calendar_latency_ms,
+        supabase_latency_ms=args.supabase_latency_ms,
+        gosms_latency_ms=args.gosms_latency_ms,
+        smtp_latency_ms=args.smtp_latency_ms,
+        scenarios=args.scenarios,
+    )
+    report = asyncio.run(run_benchmark(config))
+    print(format_report(report))
+
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    thresholds = json.loads(args.thresholds.read_text()) if args.thresholds and args.thresholds.exists() else {}
+    baseline = json.loads(args.baseline.read_text())["scenarios"] if args.baseline else None
+    failures = evaluate(report["scenarios"], thresholds, baseline, args.max_regression)
+    if failures:
+        print("\n❌ Benchmark thresholds exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ All scenarios within thresholds.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
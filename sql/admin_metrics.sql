@@ -0,0 +1,71 @@
+-- Admin dashboard (admin.py): filters, paging and aggregates run in Postgres, the dashboard
+-- only receives one page of rows plus a few numbers. Apply after sql/tenants.sql.
+
+create extension if not exists pg_trgm;
+
+-- Date range scans and the service filter
+create index if not exists bookings_start_idx on bookings (start_time desc, id desc);
+create index if not exists bookings_service_start_idx on bookings (service_type, start_time);
+-- Client search (ilike '%...%') on name and phone
+create index if not exists clients_full_name_trgm_idx on clients using gin (full_name gin_trgm_ops);
+create index if not exists clients_phone_trgm_idx on clients using gin (phone_number gin_trgm_ops);
+
+-- Bookings matching the dashboard filters (NULL = no filter). Plain SQL, inlined by the planner.
+create or replace function admin_filtered_bookings(
+    p_from timestamptz,
+    p_to timestamptz,
+    p_service text default null,
+    p_client text default null,
+    p_tenant text default null
+)
+returns setof bookings
+language sql stable
+as $$
+    select b.*
+    from bookings b
+    join clients c on c.id = b.client_id
+    where b.start_time >= p_from
+      and b.start_time < p_to
+      and (p_service is null or b.service_type = p_service)
+      and (p_tenant is null or b.tenant_id = p_tenant)
+      and (p_client is null
+           or c.full_name ilike '%' || p_client || '%'
+           or c.phone_number ilike '%' || p_client || '%')
+$$;
+
+-- Bookings and distinct clients per service; the row with is_total = true covers all services
+create or replace function admin_booking_metrics(
+    p_from timestamptz,
+    p_to timestamptz,
+    p_service text default null,
+    p_client text default null,
+    p_tenant text default null
+)
+returns table (service_type text, bookings bigint, clients bigint, is_total boolean)
+language sql stable
+as $$
+    select b.service_type::text,
+           count(*),
+           count(distinct b.client_id),
+           grouping(b.service_type) = 1
+    from admin_filtered_bookings(p_from, p_to, p_service, p_client, p_tenant) b
+    group by grouping sets ((b.service_type), ())
+    order by grouping(b.service_type) desc, count(*) desc
+$$;
+
+-- Bookings per day (Europe/Prague) for the chart
+create or replace function admin_bookings_per_day(
+    p_from timestamptz,
+    p_to timestamptz,
+    p_service text default null,
+    p_client text default null,
+    p_tenant text default null
+)
+returns table (day date, bookings bigint)
+language sql stable
+as $$
+    select (b.start_time at time zone 'Europe/Prague')::date, count(*)
+    from admin_filtered_bookings(p_from, p_to, p_service, p_client, p_tenant) b
+    group by 1
+    order by 1
+$$;
@@ -0,0 +1,24 @@
+-- clients.phone_number is stored in E.164 (+420777111222): DBService normalizes every phone
+-- before it queries or inserts (app/core/phone.py). Backfill rows written in another format.
+
+update clients c
+set phone_number = n.normalized
+from (
+    select id,
+           case
+               when p ~ '^\+[0-9]+$' then p
+               when p ~ '^00[0-9]+$' then '+' || substr(p, 3)
+               when p ~ '^[0-9]{9}$' then '+420' || p
+               when p ~ '^[0-9]+$' then '+' || p
+               else p
+           end as normalized
+    from (select id, regexp_replace(phone_number, '[\s\-\.\(\)/]', '', 'g') as p from clients) raw
+) n
+where c.id = n.id and c.phone_number is distinct from n.normalized;
+
+-- Clients that now share a number (duplicates created from differently formatted input).
+-- Move their bookings to the oldest row and delete the rest by hand.
+select tenant_id, phone_number, array_agg(id order by id) as ids
+from clients
+group by tenant_id, phone_number
+having count(*) > 1;
@@ -0,0 +1,12 @@
+-- Multi-tenant scope for clients and bookings (TenantDBService filters and tags every row).
+-- Rows of the default (single-tenant) service keep tenant_id NULL. Once tenants are configured
+-- the default service only reads rows with tenant_id IS NULL.
+
+alter table clients add column if not exists tenant_id text;
+alter table bookings add column if not exists tenant_id text;
+
+-- Caller lookup is per tenant: the same phone number can be a client of several shops.
+-- Also serves the default service's tenant_id IS NULL lookups.
+create index if not exists clients_tenant_phone_idx on clients (tenant_id, phone_number);
+-- Reminder and admin range scans
+create index if not exists bookings_tenant_start_idx on bookings (tenant_id, start_time);
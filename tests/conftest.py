@@ -0,0 +1,36 @@
+import httpx
+import pytest
+
+from app.services.calendar_service import CalendarService
+from app.services.sms_client import GoSMSClient
+from fakes import FakeCalendarClient, FakeCalendarService, FakeGoSMS
+
+
+@pytest.fixture
+def fake_calendar():
+    return FakeCalendarService(page_size=2)
+
+
+@pytest.fixture
+def calendar(fake_calendar):
+    """CalendarService backed by the fake calendar, with a synced busy cache."""
+    service = CalendarService(FakeCalendarClient(fake_calendar), "primary")
+    service.cache.sync()
+    return service
+
+
+@pytest.fixture
+def fake_gosms():
+    return FakeGoSMS()
+
+
+@pytest.fixture
+def gosms_client(fake_gosms):
+    """GoSMSClient talking to the local fake GoSMS app, without backoff delays."""
+    return GoSMSClient(
+        "client-id", "client-secret", "123",
+        base_url="http://gosms.test",
+        max_concurrency=2,
+        backoff_base_seconds=0,
+        transport=httpx.ASGITransport(app=fake_gosms.app),
+    )
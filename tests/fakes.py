@@ -0,0 +1,368 @@
+"""
+In-process fakes of the external backends, shared by tests.
+"""
+import datetime
+import email
+import itertools
+import json
+import re
+import time
+import urllib.parse
+
+import httplib2
+import httpx
+from googleapiclient.errors import HttpError
+
+
+class _FakeRequest:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self, **kwargs):
+        return self._fn()
+
+
+class _FakeEvents:
+    def __init__(self, backend: "FakeCalendarService"):
+        self._backend = backend
+
+    def list(self, **params):
+        return _FakeRequest(lambda: self._backend._list(params))
+
+    def insert(self, calendarId, body):
+        return _FakeRequest(lambda: self._backend._insert(calendarId, body))
+
+    def patch(self, calendarId, eventId, body):
+        return _FakeRequest(lambda: self._backend._patch(calendarId, eventId, body))
+
+    def delete(self, calendarId, eventId):
+        return _FakeRequest(lambda: self._backend._delete(calendarId, eventId))
+
+
+class FakeCalendarClient:
+    """Stand-in for CalendarClient that hands out a FakeCalendarService."""
+
+    def __init__(self, service: "FakeCalendarService"):
+        self.service = service
+
+    def initialize(self) -> bool:
+        return True
+
+    def get_service(self):
+        return self.service
+
+    def invalidate(self):
+        pass
+
+
+class FakeCalendarService:
+    """
+    In-memory stand-in for the googleapiclient Calendar v3 service (events collection).
+    Supports paging, syncToken incremental sync and 410 for expired tokens.
+    """
+
+    def __init__(self, page_size: int = 50, id_prefix: str = "evt"):
+        self.page_size = page_size
+        self.id_prefix = id_prefix
+        self.events_by_id = {}
+        self.seq = 0
+        self.expired_tokens = set()
+        self.calls = []
+        self._ids = itertools.count(1)
+
+    def events(self):
+        return _FakeEvents(self)
+
+    # --- Server-side changes (e.g. the owner editing the calendar) ---
+
+    def add_event(self, start: datetime.datetime, end: datetime.datetime, **extra) -> dict:
+        event = {
+            'id': f"{self.id_prefix}{next(self._ids)}",
+            'status': 'confirmed',
+            'start': {'dateTime': start.isoformat()},
+            'end': {'dateTime': end.isoformat()},
+            **extra,
+        }
+        self._touch(event)
+        return event
+
+    def remove_event(self, event_id: str):
+        event = self.events_by_id[event_id]
+        event['status'] = 'cancelled'
+        self._touch(event)
+
+    def _touch(self, event: dict):
+        self.seq += 1
+        event['_seq'] = self.seq
+        self.events_by_id[event['id']] = event
+
+    # --- API ---
+
+    def _list(self, params: dict) -> dict:
+        self.calls.append(('list', params))
+        token = params.get('syncToken')
+        if token is not None:
+            if token in self.expired_tokens:
+                raise HttpError(httplib2.Response({'status': 410}), b'{"error": "fullSyncRequired"}')
+            since = int(token)
+            items = [e for e in self.events_by_id.values() if e['_seq'] > since]
+        else:
+            items = [e for e in self.events_by_id.values() if e['status'] != 'cancelled']
+            if params.get('timeMin'):
+                time_min = datetime.datetime.fromisoformat(params['timeMin'])
+                items = [e for e in items if datetime.datetime.fromisoformat(e['end']['dateTime']) > time_min]
+            if params.get('timeMax'):
+                time_max = datetime.datetime.fromisoformat(params['timeMax'])
+                items = [e for e in items if datetime.datetime.fromisoformat(e['start']['dateTime']) < time_max]
+        items.sort(key=lambda e: e['_seq'])
+
+        offset = int(params.get('pageToken') or 0)
+        page = items[offset:offset + self.page_size]
+        result = {'items': [{k: v for k, v in e.items() if k != '_seq'} for e in page]}
+        if offset + self.page_size < len(items):
+            result['nextPageToken'] = str(offset + self.page_size)
+        else:
+            result['nextSyncToken'] = str(self.seq)
+        return result
+
+    def _insert(self, calendar_id: str, body: dict) -> dict:
+        self.calls.append(('insert', body))
+        event = dict(body, id=f"{self.id_prefix}{next(self._ids)}", status='confirmed', htmlLink='http://fake')
+        self._touch(event)
+        return {k: v for k, v in event.items() if k != '_seq'}
+
+    def _patch(self, calendar_id: str, event_id: str, body: dict) -> dict:
+        self.calls.append(('patch', event_id))
+        event = self.events_by_id.get(event_id)
+        if event is None or event['status'] == 'cancelled':
+            raise HttpError(httplib2.Response({'status': 404}), b'{"error": "notFound"}')
+        event.update(body)
+        self._touch(event)
+        return {k: v for k, v in event.items() if k != '_seq'}
+
+    def _delete(self, calendar_id: str, event_id: str):
+        self.calls.append(('delete', event_id))
+        if event_id not in self.events_by_id:
+            raise HttpError(httplib2.Response({'status': 404}), b'{"error": "notFound"}')
+        self.remove_event(event_id)
+        return ''
+
+
+class _RoutedEvents:
+    def __init__(self, backend: "FakeStaffCalendarService"):
+        self._backend = backend
+
+    def list(self, **params):
+        return self._backend.calendar(params['calendarId']).events().list(**params)
+
+    def insert(self, calendarId, body):
+        return self._backend.calendar(calendarId).events().insert(calendarId, body)
+
+    def patch(self, calendarId, eventId, body):
+        return self._backend.calendar(calendarId).events().patch(calendarId, eventId, body)
+
+    def delete(self, calendarId, eventId):
+        return self._backend.calendar(calendarId).events().delete(calendarId, eventId)
+
+
+class _FakeFreeBusy:
+    def __init__(self, backend: "FakeStaffCalendarService"):
+        self._backend = backend
+
+    def query(self, body):
+        return _FakeRequest(lambda: self._backend._freebusy(body))
+
+
+class FakeStaffCalendarService:
+    """
+    Several FakeCalendarService calendars behind one service: events() is routed by calendarId,
+    freebusy().query answers all of them at once (unknown calendars get a notFound error).
+    """
+
+    def __init__(self, calendar_ids, page_size: int = 50):
+        self.calendars = {
+            calendar_id: FakeCalendarService(page_size=page_size, id_prefix=f"{calendar_id}-evt")
+            for calendar_id in calendar_ids
+        }
+        self.freebusy_calls = []
+
+    def calendar(self, calendar_id: str) -> FakeCalendarService:
+        return self.calendars[calendar_id]
+
+    def events(self):
+        return _RoutedEvents(self)
+
+    def freebusy(self):
+        return _FakeFreeBusy(self)
+
+    def _freebusy(self, body: dict) -> dict:
+        ids = [item['id'] for item in body['items']]
+        self.freebusy_calls.append(ids)
+        time_min = datetime.datetime.fromisoformat(body['timeMin'])
+        time_max = datetime.datetime.fromisoformat(body['timeMax'])
+        calendars = {}
+        for calendar_id in ids:
+            backend = self.calendars.get(calendar_id)
+            if backend is None:
+                calendars[calendar_id] = {'errors': [{'domain': 'global', 'reason': 'notFound'}], 'busy': []}
+                continue
+            busy = []
+            for event in backend.events_by_id.values():
+                start = datetime.datetime.fromisoformat(event['start']['dateTime'])
+                end = datetime.datetime.fromisoformat(event['end']['dateTime'])
+                if event['status'] != 'cancelled' and start < time_max and end > time_min:
+                    busy.append({
+                        'start': start.astimezone(datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
+                        'end': end.astimezone(datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
+                    })
+            calendars[calendar_id] = {'busy': sorted(busy, key=lambda b: b['start'])}
+        return {'kind': 'calendar#freeBusy', 'timeMin': body['timeMin'], 'timeMax': body['timeMax'], 'calendars': calendars}
+
+    def calls(self, kind: str) -> int:
+        """Number of `kind` calls (list, insert, delete, ...) over all calendars."""
+        return sum(1 for backend in self.calendars.values() for call in backend.calls if call[0] == kind)
+
+
+class FakeCalendarHttp:
+    """
+    httplib2.Http stand-in for a real discovery-built Calendar v3 service (build(..., http=...)).
+    Serves plain requests and multipart batch requests (/batch/calendar/v3) from a FakeCalendarService.
+    Set `fail_batches_with` to a status code to fail whole batch round trips.
+    """
+
+    _EVENTS_PATH = re.compile(r"^/calendar/v3/calendars/(?P<calendar>[^/]+)/events(?:/(?P<event>[^/?]+))?$")
+
+    def __init__(self, backend: "FakeCalendarService"):
+        self.backend = backend
+        self.requests = 0
+        self.batch_requests = 0
+        self.batch_sizes = []
+        self.fail_batches_with = None
+
+    def _dispatch(self, method: str, uri: str, body):
+        parsed = urllib.parse.urlparse(uri)
+        match = self._EVENTS_PATH.match(parsed.path)
+        if not match:
+            return 404, {"error": "notFound"}
+        calendar_id = urllib.parse.unquote(match["calendar"])
+        event_id = urllib.parse.unquote(match["event"]) if match["event"] else None
+        payload = json.loads(body) if body else None
+        try:
+            if method == "GET" and event_id is None:
+                params = dict(urllib.parse.parse_qsl(parsed.query))
+                params.pop("alt", None)
+                return 200, self.backend._list(params)
+            if method == "POST" and event_id is None:
+                return 200, self.backend._insert(calendar_id, payload)
+            if method == "PATCH":
+                return 200, self.backend._patch(calendar_id, event_id, payload)
+            if method == "DELETE":
+                self.backend._delete(calendar_id, event_id)
+                return 204, None
+        except HttpError as e:
+            return e.resp.status, json.loads(e.content)
+        return 405, {"error": "methodNotAllowed"}
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        self.requests += 1
+        if "/batch/" not in uri:
+            status, content = self._dispatch(method, uri, body)
+            return httplib2.Response({"status": status, "content-type": "application/json"}), json.dumps(content or {}).encode()
+
+        self.batch_requests += 1
+        if self.fail_batches_with:
+            return httplib2.Response({"status": self.fail_batches_with}), b'{"error": "backendError"}'
+
+        content_type = headers["content-type"]
+        raw = body if isinstance(body, bytes) else body.encode()
+        message = email.message_from_bytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + raw)
+        parts = message.get_payload()
+        self.batch_sizes.append(len(parts))
+
+        out = []
+        for part in parts:
+            content_id = re.sub(r"\s+", " ", part["Content-ID"]).strip()
+            request_line, rest = part.get_payload().split("\n", 1)
+            method_, path, _ = request_line.strip().split(" ", 2)
+            sub_body = re.split(r"\r?\n\r?\n", rest, maxsplit=1)[1] if re.search(r"\r?\n\r?\n", rest) else ""
+            status, content = self._dispatch(method_, path, sub_body.strip() or None)
+            reason = "OK" if status < 300 else "Error"
+            out.append(
+                "--batch_fake\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {reason}\r\n"
+                "Content-Type: application/json\r\n\r\n"
+                f"{json.dumps(content) if content is not None else ''}\r\n"
+            )
+        out.append("--batch_fake--\r\n")
+        return httplib2.Response({"status": 200, "content-type": "multipart/mixed; boundary=batch_fake"}), "".join(out).encode()
+
+
+class FakeGoSMS:
+    """
+    Local GoSMS API (ASGI app, serve it through httpx.ASGITransport).
+    `fail_with` holds status codes returned (in order) before requests succeed again.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        from fastapi import FastAPI, Request
+        from fastapi.responses import JSONResponse
+
+        self.latency = latency
+        self.fail_with = []
+        self.invalid_numbers = set()
+        self.request_times = []
+        self.messages = []
+        self.token_requests = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+
+        @self.app.post("/oauth/v2/token")
+        async def token():
+            self.token_requests += 1
+            return {"access_token": f"token-{self.token_requests}", "expires_in": 3600}
+
+        @self.app.post("/api/v1/messages")
+        async def messages(request: Request):
+            import asyncio
+
+            self.requests += 1
+            self.request_times.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if self.fail_with:
+                    return JSONResponse({"error": "fake failure"}, status_code=self.fail_with.pop(0))
+                if not request.headers.get("Authorization", "").startswith("Bearer token-"):
+                    return JSONResponse({"error": "unauthorized"}, status_code=401)
+                payload = await request.json()
+                self.messages.append(payload)
+                invalid = [n for n in payload["recipients"] if n in self.invalid_numbers]
+                return JSONResponse(
+                    {"link": f"/api/v1/messages/{len(self.messages)}", "recipients": {"invalid": invalid}},
+                    status_code=201,
+                )
+            finally:
+                self.in_flight -= 1
+
+
+class FlakyTransport(httpx.AsyncBaseTransport):
+    """Passes requests to the fake GoSMS, then raises `errors` (in order) instead of the response."""
+
+    def __init__(self, app, errors):
+        self.inner = httpx.ASGITransport(app=app)
+        self.errors = list(errors)
+
+    async def handle_async_request(self, request):
+        if request.url.path == "/api/v1/messages" and self.errors:
+            error = self.errors.pop(0)
+            if isinstance(error, httpx.ConnectError):
+                raise error
+            await self.inner.handle_async_request(request)
+            raise error
+        return await self.inner.handle_async_request(request)
@@ -0,0 +1,80 @@
+import datetime
+from unittest.mock import MagicMock
+
+import admin
+from admin import BookingFilters
+
+
+class _Query:
+    """Records the PostgREST builder calls of one query."""
+
+    def __init__(self, data=None):
+        self.calls = []
+        self.data = data or []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+    def execute(self):
+        return MagicMock(data=self.data)
+
+
+def _filters(**kwargs) -> BookingFilters:
+    return BookingFilters(datetime.date(2030, 1, 7), datetime.date(2030, 1, 13), **kwargs)
+
+
+def test_page_is_filtered_and_limited_by_the_database():
+    query = _Query([{"id": 5, "start_time": "2030-01-07T09:00:00+00:00", "service_type": "strih",
+                     "clients": {"full_name": "Petr", "phone_number": "+420777111222"}}])
+    client = MagicMock()
+    client.table.return_value = query
+
+    rows = admin.fetch_page(client, _filters(service="strih", client="Petr, (Nov*ák)", tenant="brno"), page=2, page_size=50)
+
+    client.table.assert_called_once_with('bookings')
+    calls = {name: (args, kwargs) for name, args, kwargs in query.calls}
+    assert "clients!inner(full_name, phone_number)" in calls["select"][0][0]
+    assert calls["gte"][0] == ('start_time', '2030-01-07T00:00:00+01:00')
+    assert calls["lt"][0] == ('start_time', '2030-01-14T00:00:00+01:00')
+    assert [args for name, args, _ in query.calls if name == "eq"] == [('service_type', 'strih'), ('tenant_id', 'brno')]
+    assert calls["or_"] == (("full_name.ilike.*Petr Novák*,phone_number.ilike.*Petr Novák*",), {"reference_table": "clients"})
+    assert calls["range"][0] == (100, 149)
+
+    frame = admin.to_frame(rows)
+    assert frame.loc[0, "full_name"] == "Petr"
+    assert frame.loc[0, "start_time"].hour == 10  # Prague time
+
+
+def test_without_client_search_bookings_are_not_inner_joined():
+    query = _Query()
+    client = MagicMock()
+    client.table.return_value = query
+
+    admin.fetch_page(client, _filters(client="  "), page=0, page_size=20)
+
+    names = [name for name, _, _ in query.calls]
+    assert "or_" not in names and "eq" not in names
+    assert "clients(full_name, phone_number)" in query.calls[0][1][0]
+    assert query.calls[-1] == ("range", (0, 19), {})
+
+
+def test_metrics_come_from_the_aggregate_rpc():
+    client = MagicMock()
+    client.rpc.return_value = _Query([
+        {"service_type": None, "bookings": 120, "clients": 45, "is_total": True},
+        {"service_type": "strih", "bookings": 100, "clients": 40, "is_total": False},
+        {"service_type": "vousy", "bookings": 20, "clients": 12, "is_total": False},
+    ])
+
+    metrics = admin.fetch_metrics(client, _filters(client="777"))
+
+    name, params = client.rpc.call_args.args
+    assert name == 'admin_booking_metrics'
+    assert params["p_client"] == "777" and params["p_service"] is None
+    assert metrics["bookings"] == 120 and metrics["clients"] == 45
+    assert [row["service_type"] for row in metrics["by_service"]] == ["strih", "vousy"]
+    assert admin.page_count(metrics["bookings"], 50) == 3
+    assert admin.page_count(0, 50) == 1
@@ -0,0 +1,68 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.services.availability import FreeBusyIndex, merge_intervals, opening_windows
+from app.services.booking_service import BookingService
+
+TZ = ZoneInfo("Europe/Prague")
+# Monday 09:00-18:00, Saturday 09:00-14:00, Sunday closed (weekday -> minutes)
+HOURS = {0: (9 * 60, 18 * 60), 5: (9 * 60, 14 * 60), 6: None}
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime.datetime:
+    # 2030-01-07 is a Monday
+    return datetime.datetime(2030, 1, day, hour, minute, tzinfo=TZ)
+
+
+def test_merge_and_point_queries():
+    busy = [(at(7, 12), at(7, 13)), (at(7, 10), at(7, 11)), (at(7, 10, 30), at(7, 11, 30))]
+    assert merge_intervals(busy) == [(at(7, 10), at(7, 11, 30)), (at(7, 12), at(7, 13))]
+
+    index = FreeBusyIndex(busy)
+    assert len(index) == 2
+    assert index.is_free(at(7, 9), at(7, 10)) is True
+    assert index.is_free(at(7, 9, 30), at(7, 10, 30)) is False
+    assert index.is_free(at(7, 11, 30), at(7, 12)) is True
+    assert index.is_free(at(7, 12, 30), at(7, 12, 45)) is False
+    assert index.free_windows(at(7, 9), at(7, 14)) == [
+        (at(7, 9), at(7, 10)), (at(7, 11, 30), at(7, 12)), (at(7, 13), at(7, 14))
+    ]
+
+
+def test_find_free_slots_for_a_week_respects_business_hours():
+    index = FreeBusyIndex([(at(7, 9), at(7, 17))])
+    windows = opening_windows(HOURS, at(7, 0), at(14, 0))
+    # Monday and Saturday are open, Sunday closed, other days unknown -> closed
+    assert windows == [(at(7, 9), at(7, 18)), (at(12, 9), at(12, 14))]
+
+    slots = index.find_free_slots(windows, datetime.timedelta(hours=1), datetime.timedelta(minutes=30))
+    assert slots[0] == at(7, 17)          # last hour on Monday
+    assert at(12, 13) in slots             # last hour on Saturday
+    assert at(12, 13, 30) not in slots     # would end after closing
+    assert len(slots) == 1 + 9
+
+    limited = index.find_free_slots(windows, datetime.timedelta(hours=1), datetime.timedelta(minutes=30), limit=2)
+    assert limited == [at(7, 17), at(12, 9)]
+
+
+def test_slots_are_aligned_to_grid_after_not_before():
+    index = FreeBusyIndex([])
+    windows = [(at(7, 9), at(7, 12))]
+    slots = index.find_free_slots(windows, datetime.timedelta(hours=1), datetime.timedelta(minutes=30), not_before=at(7, 9, 10))
+    assert slots == [at(7, 9, 30), at(7, 10), at(7, 10, 30), at(7, 11)]
+
+
+@pytest.mark.asyncio
+async def test_booking_service_find_free_slots_single_query():
+    calendar = MagicMock()
+    calendar.get_busy_slots = AsyncMock(return_value=[(at(7, 9), at(7, 16))])
+    service = BookingService(calendar=calendar)
+
+    slots = await service.find_free_slots(at(7, 0), at(8, 0), limit=10)
+
+    calendar.get_busy_slots.assert_awaited_once()
+    assert slots == [at(7, 16), at(7, 16, 30), at(7, 17)]
+    assert "16:00" in await service.get_free_slots("2030-01-07")
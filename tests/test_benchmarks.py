@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks.run import BenchmarkConfig, evaluate, percentile, run_benchmark
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_evaluate_limits_and_baseline():
+    scenarios = {"tools.get_booking": {"requests": 10, "errors": 1, "rps": 50.0, "p50_ms": 20, "p95_ms": 80, "p99_ms": 90}}
+    thresholds = {"default": {"max_error_rate": 0.0}, "tools.get_booking": {"p95_ms": 50}}
+
+    failures = evaluate(scenarios, thresholds)
+    assert any("p95_ms 80.0 > limit 50" in f for f in failures)
+    assert any("error rate" in f for f in failures)
+
+    scenarios["tools.get_booking"]["errors"] = 0
+    baseline = {"tools.get_booking": {"p95_ms": 40, "p99_ms": 88}}
+    failures = evaluate(scenarios, {}, baseline, max_regression=0.25, regression_slack_ms=5)
+    assert failures == ["tools.get_booking: p95_ms 80.0 regressed from baseline 40.0 (allowed 55.0)"]
+
+
+@pytest.mark.asyncio
+async def test_benchmark_runs_every_scenario_against_fakes():
+    config = BenchmarkConfig(requests=4, concurrency=2, calendar_latency_ms=0, supabase_latency_ms=0, gosms_latency_ms=0, smtp_latency_ms=0)
+    report = await run_benchmark(config)
+
+    scenarios = report["scenarios"]
+    assert len(scenarios) == 9
+    assert all(s["errors"] == 0 for s in scenarios.values()), scenarios
+    # Bookings and cancellations really went through the fake backends
+    assert report["backend_requests"]["calendar"] >= 16
+    assert report["backend_requests"]["supabase"] > 0
+    assert "supabase.bookings.insert" in report["spans"]
@@ -0,0 +1,99 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.availability import AvailabilityStatus
+from app.services.booking_service import BookingService, TZ
+
+
+def _next_monday(hour: int) -> datetime.datetime:
+    today = datetime.datetime.now(TZ).replace(hour=hour, minute=0, second=0, microsecond=0)
+    return today + datetime.timedelta(days=7 - today.weekday())
+
+
+@pytest.fixture
+def db():
+    mock_db = MagicMock()
+    mock_db.get_or_create_client = AsyncMock(return_value={"id": 1, "name": "Petr"})
+    mock_db.log_booking = AsyncMock(return_value=True)
+    return mock_db
+
+
+@pytest.fixture
+def service(calendar, db):
+    return BookingService(db=db, calendar=calendar, notifier=MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_booking_uses_single_insert_round_trip(service, fake_calendar, db):
+    start = _next_monday(10)
+    calls_before = len(fake_calendar.calls)
+
+    msg = await service.book_appointment(start.strftime("%Y-%m-%d"), "10:00", "petr", "+420777111222")
+
+    assert "úspěšně vytvořena" in msg
+    assert [c[0] for c in fake_calendar.calls[calls_before:]] == ["insert"]
+    db.log_booking.assert_awaited_once()
+    service.notifier.sms.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_client_upsert_deletes_orphaned_event(service, calendar, fake_calendar, db):
+    db.get_or_create_client.side_effect = RuntimeError("supabase down")
+    start = _next_monday(10)
+
+    msg = await service.book_appointment(start.strftime("%Y-%m-%d"), "10:00", "petr", "+420777111222")
+
+    assert "nepodařilo zarezervovat" in msg
+    assert [c[0] for c in fake_calendar.calls if c[0] != "list"] == ["insert", "delete"]
+    db.log_booking.assert_not_awaited()
+    # The compensated slot is free again
+    assert calendar.cache.is_free(start, start + datetime.timedelta(hours=1)) is True
+
+
+@pytest.mark.asyncio
+async def test_failed_booking_log_deletes_orphaned_event(service, fake_calendar, db):
+    db.log_booking.return_value = False
+    start = _next_monday(10)
+
+    msg = await service.book_appointment(start.strftime("%Y-%m-%d"), "10:00", "petr", "+420777111222")
+
+    assert "nepodařilo zarezervovat" in msg
+    assert [c[0] for c in fake_calendar.calls if c[0] != "list"] == ["insert", "delete"]
+
+
+@pytest.mark.asyncio
+async def test_booking_taken_slot_offers_alternatives(service, calendar, fake_calendar, db):
+    start = _next_monday(10)
+    fake_calendar.add_event(start, start + datetime.timedelta(hours=1))
+    calendar.cache.sync()
+
+    msg = await service.book_appointment(start.strftime("%Y-%m-%d"), "10:00", "petr", "+420777111222")
+
+    assert "je plno" in msg
+    assert not [c for c in fake_calendar.calls if c[0] == "insert"]
+    db.log_booking.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_booking_outside_hours_is_rejected_without_calendar(service, fake_calendar):
+    start = _next_monday(10)
+    calls_before = len(fake_calendar.calls)
+
+    msg = await service.book_appointment(start.strftime("%Y-%m-%d"), "20:00", "petr", "+420777111222")
+
+    assert "otevřeno jen od" in msg
+    assert len(fake_calendar.calls) == calls_before
+
+
+@pytest.mark.asyncio
+async def test_evaluate_availability_structured_result(service, calendar, fake_calendar):
+    start = _next_monday(10)
+    fake_calendar.add_event(start, start + datetime.timedelta(hours=1))
+    calendar.cache.sync()
+
+    result = await service.evaluate_availability(start.strftime("%Y-%m-%d"), "10:00")
+
+    assert result.status == AvailabilityStatus.BUSY
+    assert result.alternatives == [start - datetime.timedelta(hours=1), start + datetime.timedelta(hours=1)]
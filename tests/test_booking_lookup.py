@@ -0,0 +1,70 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.booking_service import BookingService
+from app.services.db_service import DBService
+
+
+@pytest.mark.asyncio
+async def test_cancel_booking_reuses_found_booking():
+    db = MagicMock()
+    db.get_upcoming_booking_by_phone = AsyncMock(return_value={
+        "id": 5, "gcal_event_id": "evt_5", "start_time": "2030-01-07T10:00:00",
+    })
+    db.delete_booking = AsyncMock(return_value=True)
+    calendar = MagicMock()
+    calendar.delete_event = AsyncMock(return_value=True)
+    service = BookingService(db=db, calendar=calendar, notifier=MagicMock())
+
+    msg = await service.cancel_booking("+420777111222")
+
+    assert msg == "Vaše rezervace na 07.01. 10:00 byla zrušena."
+    db.get_upcoming_booking_by_phone.assert_awaited_once_with("+420777111222")
+    db.delete_booking.assert_awaited_once_with(5)
+    calendar.delete_event.assert_awaited_once_with("evt_5")
+
+
+@pytest.mark.asyncio
+async def test_upcoming_booking_single_embedded_query():
+    db = DBService()
+    db.client_cache.invalidate()
+    booking = {"id": 9, "start_time": "2030-01-07T10:00:00"}
+    query = MagicMock()
+    for method in ("select", "eq", "gte", "order", "limit"):
+        getattr(query, method).return_value = query
+    query.execute = AsyncMock(return_value=MagicMock(data=[{"id": 3, "full_name": "Petr", "bookings": [booking]}]))
+    client = MagicMock()
+    client.table.return_value = query
+
+    with patch.object(DBService, "get_client", AsyncMock(return_value=client)):
+        assert await db.get_upcoming_booking_by_phone("+420777111555") == booking
+        # The client row warmed the cache, no further query needed
+        assert await db.get_client_id("+420777111555") == 3
+
+    client.table.assert_called_once_with("clients")
+    query.select.assert_called_once_with("id, full_name, bookings(*)")
+    query.order.assert_called_once_with("start_time", desc=False, foreign_table="bookings")
+    assert query.execute.await_count == 1
+    db.client_cache.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_upcoming_booking_lookup_normalizes_phone():
+    db = DBService()
+    db.client_cache.invalidate()
+    query = MagicMock()
+    for method in ("select", "eq", "gte", "order", "limit"):
+        getattr(query, method).return_value = query
+    query.execute = AsyncMock(return_value=MagicMock(data=[{"id": 3, "full_name": "Petr", "bookings": []}]))
+    client = MagicMock()
+    client.table.return_value = query
+
+    with patch.object(DBService, "get_client", AsyncMock(return_value=client)):
+        assert await db.get_upcoming_booking_by_phone("777 111 555") is None
+        # Found client is cached under the same key, no duplicate gets created
+        assert await db.get_or_create_client("+420777111555", "Petr") == {"id": 3, "name": "Petr"}
+
+    query.eq.assert_called_once_with("phone_number", "+420777111555")
+    assert query.execute.await_count == 1
+    db.client_cache.invalidate()
@@ -0,0 +1,99 @@
+import datetime
+
+import pytest
+from googleapiclient.discovery import build
+
+from app.services.calendar_cache import PRAGUE_TZ
+from app.services.calendar_service import CalendarService
+from fakes import FakeCalendarClient, FakeCalendarHttp
+
+
+def _tomorrow(hour: int) -> datetime.datetime:
+    day = datetime.datetime.now(PRAGUE_TZ) + datetime.timedelta(days=1)
+    return day.replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+def _body(start: datetime.datetime) -> dict:
+    return {
+        'summary': 'Batch',
+        'start': {'dateTime': start.isoformat()},
+        'end': {'dateTime': (start + datetime.timedelta(hours=1)).isoformat()},
+    }
+
+
+@pytest.fixture
+def http(fake_calendar):
+    return FakeCalendarHttp(fake_calendar)
+
+
+@pytest.fixture
+def batch_calendar(http):
+    """CalendarService over a real discovery-built client talking to the local fake endpoint."""
+    service = build('calendar', 'v3', http=http, static_discovery=True)
+    calendar = CalendarService(FakeCalendarClient(service), "primary")
+    calendar.cache.sync()
+    return calendar
+
+
+@pytest.mark.asyncio
+async def test_mixed_operations_in_one_round_trip(batch_calendar, fake_calendar, http):
+    moved = fake_calendar.add_event(_tomorrow(9), _tomorrow(10))
+    removed = fake_calendar.add_event(_tomorrow(12), _tomorrow(13))
+    batch_calendar.cache.sync()
+    requests_before = http.requests
+
+    batch = batch_calendar.batch()
+    batch.insert(_body(_tomorrow(15)))
+    batch.patch(moved['id'], {'start': {'dateTime': _tomorrow(16).isoformat()}, 'end': {'dateTime': _tomorrow(17).isoformat()}})
+    batch.delete(removed['id'])
+    batch.delete("already-gone")
+    batch.patch("missing", {'summary': 'x'})
+    results = await batch_calendar.execute_batch(batch)
+
+    assert http.requests == requests_before + 1
+    assert [(r.op, r.ok, r.status) for r in results] == [
+        ('insert', True, 200), ('patch', True, 200), ('delete', True, 200), ('delete', True, 404), ('patch', False, 404),
+    ]
+    assert results[0].event_id == results[0].event['id']
+
+    # Cache follows the successful writes without a sync
+    cache = batch_calendar.cache
+    assert cache.is_free(_tomorrow(15), _tomorrow(16)) is False
+    assert cache.is_free(_tomorrow(9), _tomorrow(10)) is True
+    assert cache.is_free(_tomorrow(16), _tomorrow(17)) is False
+    assert cache.is_free(_tomorrow(12), _tomorrow(13)) is True
+
+
+@pytest.mark.asyncio
+async def test_large_batches_are_split(batch_calendar, fake_calendar, http):
+    events = [fake_calendar.add_event(_tomorrow(8), _tomorrow(9)) for _ in range(120)]
+    results = await batch_calendar.delete_events(e['id'] for e in events)
+
+    assert all(r.ok for r in results)
+    assert http.batch_sizes == [50, 50, 20]
+    assert all(e['status'] == 'cancelled' for e in fake_calendar.events_by_id.values())
+
+
+@pytest.mark.asyncio
+async def test_failed_round_trip_fails_every_item(batch_calendar, http):
+    http.fail_batches_with = 400
+    batch = batch_calendar.batch()
+    batch.insert(_body(_tomorrow(10)))
+    batch.delete("evt1")
+    results = await batch_calendar.execute_batch(batch)
+
+    assert [r.ok for r in results] == [False, False]
+    assert not batch_calendar.cache.is_fresh()
+
+
+@pytest.mark.asyncio
+async def test_cancel_day_deletes_only_that_day(batch_calendar, fake_calendar, http):
+    same_day = [fake_calendar.add_event(_tomorrow(h), _tomorrow(h + 1)) for h in (9, 11, 14)]
+    other_day = fake_calendar.add_event(_tomorrow(10) + datetime.timedelta(days=1), _tomorrow(11) + datetime.timedelta(days=1))
+    batch_calendar.cache.invalidate()  # stale -> one sync before the lookup
+
+    results = await batch_calendar.cancel_day(_tomorrow(0).date())
+
+    assert [r.event_id for r in results] == [e['id'] for e in same_day]
+    assert http.batch_requests == 1
+    assert fake_calendar.events_by_id[other_day['id']]['status'] == 'confirmed'
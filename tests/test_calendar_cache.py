@@ -0,0 +1,135 @@
+import datetime
+import pytest
+
+from app.services.calendar_cache import BusyIntervalCache, PRAGUE_TZ
+from app.models.db_models import Booking
+
+
+def _tomorrow(hour: int) -> datetime.datetime:
+    day = datetime.datetime.now(PRAGUE_TZ) + datetime.timedelta(days=1)
+    return day.replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+def test_full_then_incremental_sync(fake_calendar):
+    fake_calendar.add_event(_tomorrow(10), _tomorrow(11))
+    fake_calendar.add_event(_tomorrow(12), _tomorrow(13))
+    fake_calendar.add_event(_tomorrow(14), _tomorrow(15))
+
+    cache = BusyIntervalCache(lambda: fake_calendar, "primary")
+    assert cache.is_free(_tomorrow(10), _tomorrow(11)) is None  # cold cache -> live query
+
+    assert cache.sync() is True
+    assert cache.is_free(_tomorrow(10), _tomorrow(11)) is False
+    assert cache.is_free(_tomorrow(11), _tomorrow(12)) is True
+    assert len(cache.busy_between(_tomorrow(0), _tomorrow(23))) == 3
+
+    # Someone else books and cancels in the calendar -> picked up by incremental sync
+    evt = fake_calendar.add_event(_tomorrow(16), _tomorrow(17))
+    fake_calendar.remove_event("evt1")
+    assert cache.sync() is True
+
+    last_list = [params for name, params in fake_calendar.calls if name == 'list'][-1]
+    assert 'syncToken' in last_list
+    assert cache.is_free(_tomorrow(10), _tomorrow(11)) is True
+    assert cache.is_free(_tomorrow(16), _tomorrow(17)) is False
+    assert evt['id'] in cache._events
+
+
+def test_expired_sync_token_falls_back_to_full_sync(fake_calendar):
+    fake_calendar.add_event(_tomorrow(10), _tomorrow(11))
+    cache = BusyIntervalCache(lambda: fake_calendar, "primary")
+    cache.sync()
+
+    fake_calendar.expired_tokens.add(cache._sync_token)
+    fake_calendar.add_event(_tomorrow(12), _tomorrow(13))
+    assert cache.sync() is True
+    assert cache.is_free(_tomorrow(12), _tomorrow(13)) is False
+
+
+def test_long_event_blocks_later_slots_after_index_rebuild(fake_calendar):
+    fake_calendar.add_event(_tomorrow(8), _tomorrow(18))  # all-day block
+    fake_calendar.add_event(_tomorrow(9), _tomorrow(10))
+    cache = BusyIntervalCache(lambda: fake_calendar, "primary")
+    cache.sync()
+
+    assert cache.is_free(_tomorrow(15), _tomorrow(16)) is False
+    assert cache.busy_between(_tomorrow(15), _tomorrow(16)) == [(_tomorrow(8), _tomorrow(18))]
+    assert cache.event_ids_between(_tomorrow(9), _tomorrow(18)) == ["evt2"]
+
+    cache.remove_event("evt1")
+    assert cache.is_free(_tomorrow(15), _tomorrow(16)) is True
+    assert cache.busy_between(_tomorrow(0), _tomorrow(23)) == [(_tomorrow(9), _tomorrow(10))]
+
+
+def test_stale_cache_does_not_answer(fake_calendar):
+    cache = BusyIntervalCache(lambda: fake_calendar, "primary", max_staleness_seconds=0)
+    cache.sync()
+    assert cache.is_free(_tomorrow(10), _tomorrow(11)) is None
+
+    cache = BusyIntervalCache(lambda: fake_calendar, "primary")
+    cache.sync()
+    cache.invalidate()
+    assert cache.busy_between(_tomorrow(10), _tomorrow(11)) is None
+
+
+@pytest.mark.asyncio
+async def test_own_writes_update_cache_immediately(calendar, fake_calendar):
+    start = _tomorrow(10)
+    assert await calendar.check_availability(start) is True
+
+    booking = Booking(name="Test", day=start.strftime("%Y-%m-%d"), time="10:00", service="strih")
+    event = await calendar.create_event(booking, start_time=start)
+
+    # No sync in between - the slot must be blocked right away
+    list_calls = len([c for c in fake_calendar.calls if c[0] == 'list'])
+    assert await calendar.check_availability(start) is False
+    assert len([c for c in fake_calendar.calls if c[0] == 'list']) == list_calls
+
+    assert await calendar.delete_event(event['id']) is True
+    assert await calendar.check_availability(start) is True
+
+
+def test_phone_index_from_paged_sync(fake_calendar):
+    tagged = fake_calendar.add_event(_tomorrow(14), _tomorrow(15), extendedProperties={'private': {'phone': '+420777111222'}})
+    legacy = fake_calendar.add_event(_tomorrow(10), _tomorrow(11), description="Rezervace přes AI Asistenta\nTelefon: 777 111 222")
+    fake_calendar.add_event(_tomorrow(12), _tomorrow(13), description="Telefon: +420 608 000 000")
+
+    cache = BusyIntervalCache(lambda: fake_calendar, "primary")
+    assert cache.events_for_phone("+420777111222") is None  # cold cache
+    cache.sync()  # page_size=2 -> two pages
+
+    found = cache.events_for_phone("777 111 222")
+    assert [event_id for event_id, _ in found] == [legacy['id'], tagged['id']]
+    assert cache.events_for_phone("+420777111222", after=_tomorrow(12)) == [(tagged['id'], (_tomorrow(14), _tomorrow(15)))]
+
+    fake_calendar.remove_event(legacy['id'])
+    cache.sync()
+    assert [event_id for event_id, _ in cache.events_for_phone("+420777111222")] == [tagged['id']]
+
+
+@pytest.mark.asyncio
+async def test_cancel_by_phone_is_lookup_plus_one_delete(calendar, fake_calendar):
+    start = _tomorrow(10)
+    booking = Booking(name="Test", day=start.strftime("%Y-%m-%d"), time="10:00", service="strih")
+    event = await calendar.create_event(booking, start_time=start, phone="+420 777 111 222")
+    assert fake_calendar.events_by_id[event['id']]['extendedProperties'] == {'private': {'phone': '+420777111222'}}
+
+    calls_before = len(fake_calendar.calls)
+    message = await calendar.cancel_event_by_description("777111222")
+    assert "byla zrušena" in message
+    assert fake_calendar.calls[calls_before:] == [('delete', event['id'])]
+
+    assert await calendar.cancel_event_by_description("777111222") == "Na toto číslo nemám žádnou rezervaci."
+    assert len(fake_calendar.calls) == calls_before + 1
+
+
+@pytest.mark.asyncio
+async def test_cancel_by_phone_refreshes_stale_index(calendar, fake_calendar):
+    # Booked by someone else after the last sync, the index is stale
+    event = fake_calendar.add_event(_tomorrow(9), _tomorrow(10), description="Telefon: +420777333444")
+    calendar.cache.invalidate()
+
+    assert "byla zrušena" in await calendar.cancel_event_by_description("+420777333444")
+    list_calls = [params for name, params in fake_calendar.calls if name == 'list']
+    assert 'syncToken' in list_calls[-1]  # incremental sync, not a scan of every future event
+    assert fake_calendar.events_by_id[event['id']]['status'] == 'cancelled'
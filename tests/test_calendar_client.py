@@ -0,0 +1,66 @@
+import datetime
+import threading
+from unittest.mock import MagicMock, patch
+
+from app.services.calendar_service import CalendarClient
+
+
+def _fresh_creds():
+    creds = MagicMock()
+    creds.token = "token"
+    creds.expiry = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) + datetime.timedelta(hours=1)
+    return creds
+
+
+@patch("app.services.calendar_service.build")
+def test_service_is_built_once_per_thread(mock_build):
+    client = CalendarClient()
+    creds = _fresh_creds()
+
+    with patch.object(CalendarClient, "_load_credentials", return_value=creds) as mock_load:
+        first = client.get_service()
+        second = client.get_service()
+
+        assert first is second
+        mock_load.assert_called_once()
+        mock_build.assert_called_once()
+
+        # Another worker thread gets its own service, credentials are shared
+        thread = threading.Thread(target=client.get_service)
+        thread.start()
+        thread.join()
+        assert mock_build.call_count == 2
+        mock_load.assert_called_once()
+
+
+@patch("app.services.calendar_service.build")
+def test_token_refreshed_before_expiry(mock_build):
+    client = CalendarClient(refresh_margin_seconds=300)
+    creds = _fresh_creds()
+    creds.expiry = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) + datetime.timedelta(seconds=60)
+
+    with patch.object(CalendarClient, "_load_credentials", return_value=creds):
+        client.get_service()
+
+    creds.refresh.assert_called_once()
+
+
+@patch("app.services.calendar_service.build")
+def test_invalidate_reloads_credentials(mock_build):
+    client = CalendarClient()
+
+    with patch.object(CalendarClient, "_load_credentials", side_effect=[_fresh_creds(), _fresh_creds()]) as mock_load:
+        client.get_service()
+        client.invalidate()
+        client.get_service()
+
+        assert mock_load.call_count == 2
+        assert mock_build.call_count == 2
+
+
+def test_missing_credentials_returns_none():
+    client = CalendarClient()
+
+    with patch.object(CalendarClient, "_load_credentials", return_value=None):
+        assert client.initialize() is False
+        assert client.get_service() is None
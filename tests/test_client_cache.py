@@ -0,0 +1,121 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.phone import normalize_phone
+from app.services.client_cache import ClientCache
+from app.services.db_service import DBService
+from benchmarks.backends import FakePostgREST
+
+
+@pytest.mark.parametrize("raw", ["777 111 222", "+420 777-111-222", "00420777111222", "420777111222", "+420777111222"])
+def test_normalize_phone_to_e164(raw):
+    assert normalize_phone(raw) == "+420777111222"
+
+
+def test_normalize_phone_empty():
+    assert normalize_phone("") is None
+    assert normalize_phone(None) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_query():
+    cache = ClientCache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": 1, "full_name": "Petr"}
+
+    results = await asyncio.gather(*[cache.get_or_load("+420 777 111 222", loader) for _ in range(5)])
+
+    assert calls == 1
+    assert all(r == {"id": 1, "full_name": "Petr"} for r in results)
+    # Different formatting of the same number is a hit
+    assert await cache.get_or_load("777111222", loader) == {"id": 1, "full_name": "Petr"}
+    assert calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 5
+
+
+@pytest.mark.asyncio
+async def test_ttl_lru_and_errors_not_cached():
+    cache = ClientCache(ttl_seconds=0, max_size=2)
+    loader = AsyncMock(return_value={"id": 1})
+    await cache.get_or_load("777111222", loader)
+    await cache.get_or_load("777111222", loader)
+    assert loader.await_count == 2  # expired immediately
+
+    cache = ClientCache(max_size=2)
+    for phone in ["777000001", "777000002", "777000003"]:
+        cache.put(phone, {"id": phone})
+    assert cache.stats()["size"] == 2
+
+    failing = AsyncMock(side_effect=RuntimeError("db down"))
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("777000009", failing)
+    assert await cache.get_or_load("777000009", AsyncMock(return_value=None)) is None
+
+
+def _supabase(rows):
+    """Supabase client mock whose clients select returns `rows`."""
+    table = MagicMock()
+    query = table.select.return_value.eq.return_value.limit.return_value
+    query.execute = AsyncMock(return_value=MagicMock(data=rows))
+    table.update.return_value.eq.return_value.execute = AsyncMock()
+    table.insert.return_value.execute = AsyncMock(return_value=MagicMock(data=[{"id": 7, "full_name": "Nový"}]))
+    client = MagicMock()
+    client.table.return_value = table
+    return client, query
+
+
+@pytest.mark.asyncio
+async def test_db_service_reuses_cached_client():
+    db = DBService()
+    db.client_cache.invalidate()
+    client, query = _supabase([{"id": 3, "full_name": "Petr"}])
+
+    with patch.object(DBService, "get_client", AsyncMock(return_value=client)):
+        assert await db.get_client_by_phone("+420777111333") == "Petr"
+        assert await db.get_client_id("777 111 333") == 3
+        result = await db.get_or_create_client("+420777111333", "Petr Novák")
+        # Name upgrade is written through to the cache
+        assert await db.get_client_by_phone("+420777111333") == "Petr Novák"
+
+    assert result == {"id": 3, "name": "Petr Novák"}
+    assert query.execute.await_count == 1
+    db.client_cache.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_db_service_caches_new_client_after_insert():
+    db = DBService()
+    db.client_cache.invalidate()
+    client, query = _supabase([])
+
+    with patch.object(DBService, "get_client", AsyncMock(return_value=client)):
+        assert await db.get_client_id("+420777111444") is None
+        assert await db.get_or_create_client("+420777111444", "Nový") == {"id": 7, "name": "Nový"}
+        assert await db.get_client_id("+420777111444") == 7
+
+    assert query.execute.await_count == 1
+    db.client_cache.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_db_service_queries_and_inserts_normalized_phone():
+    db = DBService()
+    db.client_cache.invalidate()
+    backend = FakePostgREST()
+    backend.tables["clients"].append({"id": 1, "phone_number": "+420777111666", "full_name": "Petr"})
+
+    with patch.object(DBService, "get_client", AsyncMock(return_value=await backend.client())):
+        assert await db.get_or_create_client("777 111 666", "Petr") == {"id": 1, "name": "Petr"}
+        created = await db.get_or_create_client("00420 777 111 777", "Jana")
+        assert await db.get_client_id("+420777111777") == created["id"]
+
+    assert [row["phone_number"] for row in backend.tables["clients"]] == ["+420777111666", "+420777111777"]
+    db.client_cache.invalidate()
@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+from app.core.config_loader import CompanyConfigRegistry, load_company_config
+
+CONFIG = {
+    "company_name": "Test Shop",
+    "business_hours": {
+        "monday": {"start": "09:00", "end": "18:00"},
+        "saturday": {"start": "09:30", "end": "14:00"},
+        "sunday": None,
+    },
+    "settings": {"slot_duration_minutes": 15},
+}
+
+
+def _write(path, data, mtime):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_parsed_once_and_reloaded_on_mtime_change(tmp_path):
+    path = tmp_path / "company_config.json"
+    _write(path, CONFIG, 1000)
+    registry = CompanyConfigRegistry(str(path), check_interval_seconds=0)
+
+    first = registry.get()
+    assert registry.get() is first
+    assert first.company_name == "Test Shop"
+    assert first.settings.slot_duration_minutes == 15
+    assert first.raw["company_name"] == "Test Shop"
+
+    _write(path, dict(CONFIG, company_name="Renamed"), 2000)
+    assert registry.get().company_name == "Renamed"
+
+
+def test_weekday_minutes_precomputed(tmp_path):
+    path = tmp_path / "company_config.json"
+    _write(path, CONFIG, 1000)
+    config = CompanyConfigRegistry(str(path)).get()
+
+    assert config.hours_for(0) == (9 * 60, 18 * 60)
+    assert config.hours_for(5) == (9 * 60 + 30, 14 * 60)
+    assert config.hours_for(6) is None
+    assert config.hours_for(2) is None  # not configured -> closed
+
+
+def test_broken_edit_keeps_last_good_config(tmp_path):
+    path = tmp_path / "company_config.json"
+    _write(path, CONFIG, 1000)
+    registry = CompanyConfigRegistry(str(path), check_interval_seconds=0)
+    registry.get()
+
+    path.write_text("{ not json", encoding="utf-8")
+    os.utime(path, (2000, 2000))
+    assert registry.get().company_name == "Test Shop"
+
+    with pytest.raises(ValueError):
+        CompanyConfigRegistry(str(path)).get()
+
+
+def test_invalid_business_hours_rejected(tmp_path):
+    path = tmp_path / "company_config.json"
+    _write(path, dict(CONFIG, business_hours={"monday": {"start": "18:00", "end": "09:00"}}), 1000)
+
+    with pytest.raises(ValueError):
+        CompanyConfigRegistry(str(path)).reload()
+
+
+def test_load_company_config_returns_dict():
+    config = load_company_config()
+    assert isinstance(config, dict)
+    assert config is load_company_config()
@@ -0,0 +1,52 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_booking_service
+from app.main import app
+from app.services.booking_service import BookingService, TZ
+from app.services.container import ServiceContainer
+
+
+def _next_monday() -> datetime.date:
+    today = datetime.datetime.now(TZ).date()
+    return today + datetime.timedelta(days=(7 - today.weekday()) or 7)
+
+
+def test_container_wires_injected_services():
+    calendar, db, notifier = MagicMock(), MagicMock(), MagicMock()
+
+    container = ServiceContainer.create(calendar=calendar, db=db, notifier=notifier)
+
+    assert container.booking.calendar is calendar
+    assert container.booking.db is db
+    assert container.booking.notifier is notifier
+
+
+def test_router_uses_overridden_booking_service(calendar):
+    service = BookingService(calendar=calendar, db=MagicMock(), notifier=MagicMock())
+    app.dependency_overrides[get_booking_service] = lambda: service
+    try:
+        day = _next_monday().strftime("%Y-%m-%d")
+        response = TestClient(app).post("/tools/check_availability", json={"day": day, "time": "10:00"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert "volno" in response.json()["result"]
+
+
+def test_lifespan_does_not_touch_google_with_fakes(calendar):
+    # The lifespan builds its own container; a fake one keeps the test offline
+    fake = ServiceContainer.create(calendar=calendar, db=MagicMock(), notifier=MagicMock())
+    fake.start = AsyncMock()
+    fake.stop = AsyncMock()
+    try:
+        with patch.object(ServiceContainer, "create", return_value=fake), TestClient(app):
+            assert app.state.container is fake
+    finally:
+        app.state.container = None
+
+    fake.start.assert_awaited_once()
+    fake.stop.assert_awaited_once()
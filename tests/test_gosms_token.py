@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.gosms_token import GoSMSTokenManager
+
+
+class CountingFetch:
+    def __init__(self, expires_in=3600, delay=0.05):
+        self.calls = 0
+        self.expires_in = expires_in
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        time.sleep(self.delay)
+        return {"access_token": f"token-{n}", "expires_in": self.expires_in}
+
+    async def fetch_async(self):
+        await asyncio.sleep(self.delay)
+        self.calls += 1
+        return {"access_token": f"token-{self.calls}", "expires_in": self.expires_in}
+
+
+def test_threads_share_one_refresh():
+    fetch = CountingFetch()
+    manager = GoSMSTokenManager(fetch_sync=fetch)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        tokens = list(pool.map(lambda _: manager.get_token(), range(10)))
+
+    assert fetch.calls == 1
+    assert set(tokens) == {"token-1"}
+    assert manager.stats()["refreshes"] == 1
+    assert manager.stats()["last_refresh_ms"] >= 40
+
+
+@pytest.mark.asyncio
+async def test_coroutines_share_one_refresh():
+    fetch = CountingFetch()
+    manager = GoSMSTokenManager(fetch_async=fetch.fetch_async)
+
+    tokens = await asyncio.gather(*[manager.aget_token() for _ in range(10)])
+
+    assert fetch.calls == 1
+    assert set(tokens) == {"token-1"}
+
+
+@pytest.mark.asyncio
+async def test_sync_and_async_callers_share_refresh():
+    fetch = CountingFetch()
+    manager = GoSMSTokenManager(fetch_sync=fetch)
+
+    thread_tokens = asyncio.gather(*[asyncio.to_thread(manager.get_token) for _ in range(5)])
+    async_tokens = asyncio.gather(*[manager.aget_token() for _ in range(5)])
+    tokens = await thread_tokens + await async_tokens
+
+    assert fetch.calls == 1
+    assert set(tokens) == {"token-1"}
+
+
+@pytest.mark.asyncio
+async def test_proactive_refresh_does_not_block():
+    # 200s left: usable, but inside the 300s refresh margin
+    fetch = CountingFetch(expires_in=200, delay=0.05)
+    manager = GoSMSTokenManager(fetch_async=fetch.fetch_async)
+    assert await manager.aget_token() == "token-1"
+
+    fetch.expires_in = 3600
+    started = time.perf_counter()
+    tokens = await asyncio.gather(*[manager.aget_token() for _ in range(5)])
+    assert time.perf_counter() - started < 0.04
+    assert set(tokens) == {"token-1"}
+
+    await asyncio.sleep(0.1)
+    assert fetch.calls == 2
+    assert await manager.aget_token() == "token-2"
+
+
+def test_failures_are_counted():
+    def failing():
+        raise RuntimeError("gosms down")
+
+    manager = GoSMSTokenManager(fetch_sync=failing)
+
+    assert manager.get_token() is None
+    assert manager.stats()["failures"] == 1
+    assert manager.stats()["refreshes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_async_refresh_waits_for_thread_off_the_loop():
+    fetch = CountingFetch(delay=0.2)
+    manager = GoSMSTokenManager(fetch_sync=fetch, fetch_async=fetch.fetch_async)
+
+    thread_token = asyncio.ensure_future(asyncio.to_thread(manager.get_token))
+    await asyncio.sleep(0.05)  # the thread holds the lock for its request
+    async_token = asyncio.ensure_future(manager.aget_token())
+
+    # The loop stays responsive while the coroutine waits for the thread's refresh
+    started = time.perf_counter()
+    await asyncio.sleep(0.01)
+    assert time.perf_counter() - started < 0.1
+
+    assert {await thread_token, await async_token} == {"token-1"}
+    assert fetch.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_threads_wait_for_async_refresh():
+    fetch = CountingFetch(delay=0.1)
+    manager = GoSMSTokenManager(fetch_sync=fetch, fetch_async=fetch.fetch_async)
+
+    async_token = asyncio.ensure_future(manager.aget_token())
+    await asyncio.sleep(0.02)
+    thread_tokens = await asyncio.gather(*[asyncio.to_thread(manager.get_token) for _ in range(3)])
+
+    assert await async_token == "token-1"
+    assert set(thread_tokens) == {"token-1"}
+    assert fetch.calls == 1
+
+
+def test_invalidate_keeps_newer_token():
+    fetch = CountingFetch(delay=0)
+    manager = GoSMSTokenManager(fetch_sync=fetch)
+    old = manager.get_token()
+
+    manager.invalidate(old)
+    new = manager.get_token()
+    # A late 401 for the old token must not drop the new one
+    manager.invalidate(old)
+
+    assert new == "token-2"
+    assert manager.get_token() == "token-2"
+    assert fetch.calls == 2
@@ -0,0 +1,98 @@
+import io
+import json
+import logging
+import threading
+
+from app.core.logger import BackgroundSink, InterceptHandler, _call_site_logger, logger
+
+
+class BlockingStream(io.StringIO):
+    """Stream whose writes wait until `release` is set (simulates slow stdout)."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(5)
+        return super().write(text)
+
+
+def _capture(sink, **kwargs):
+    return logger.add(sink.write, format="{message}", level="DEBUG", **kwargs)
+
+
+def test_sink_writes_text_off_thread():
+    stream = io.StringIO()
+    sink = BackgroundSink(stream)
+    handler_id = _capture(sink)
+    try:
+        logger.info("✅ Rezervace uložena")
+        sink.flush()
+    finally:
+        logger.remove(handler_id)
+        sink.stop()
+
+    assert "| INFO     | " in stream.getvalue()
+    assert "✅ Rezervace uložena" in stream.getvalue()
+
+
+def test_json_lines_mode():
+    stream = io.StringIO()
+    sink = BackgroundSink(stream, json_lines=True)
+    handler_id = _capture(sink)
+    try:
+        logger.bind(call_id="abc").warning("pozor")
+        sink.flush()
+    finally:
+        logger.remove(handler_id)
+        sink.stop()
+
+    entry = json.loads(stream.getvalue().strip())
+    assert entry["level"] == "WARNING"
+    assert entry["msg"] == "pozor"
+    assert entry["extra"] == {"call_id": "abc"}
+    assert entry["function"] == "test_json_lines_mode"
+
+
+def test_full_queue_drops_info_but_not_errors():
+    stream = BlockingStream()
+    sink = BackgroundSink(stream, max_queue=2, block_timeout=0.01)
+    handler_id = _capture(sink)
+    try:
+        for i in range(10):
+            logger.info(f"info {i}")
+        assert sink.dropped >= 7
+        stream.release.set()
+        logger.error("still logged")
+        sink.flush()
+    finally:
+        logger.remove(handler_id)
+        sink.stop()
+
+    assert "still logged" in stream.getvalue()
+    assert "dropped" in stream.getvalue()
+
+
+def test_intercept_handler_uses_record_call_site():
+    stream = io.StringIO()
+    sink = BackgroundSink(stream)
+    handler_id = _capture(sink)
+    std_logger = logging.getLogger("app.test_intercept")
+    std_logger.addHandler(InterceptHandler())
+    std_logger.propagate = False
+    try:
+        _call_site_logger.cache_clear()
+        for _ in range(3):
+            std_logger.warning("z knihovny")
+        sink.flush()
+    finally:
+        std_logger.handlers.clear()
+        logger.remove(handler_id)
+        sink.stop()
+
+    lines = stream.getvalue().strip().splitlines()
+    assert len(lines) == 3
+    assert all("app.test_intercept:test_intercept_handler_uses_record_call_site:" in line for line in lines)
+    # One cached patched logger for the single call site
+    assert _call_site_logger.cache_info().currsize == 1
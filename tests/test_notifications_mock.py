@@ -7,6 +7,7 @@ from app.services.notification_service import send_sms, send_email
 @patch("app.services.notification_service.GOSMS_CHANNEL_ID", "123") # Ensure ID exists
 @patch("app.services.notification_service.GOSMS_CLIENT_ID", "mock_id")
 @patch("app.services.notification_service.GOSMS_CLIENT_SECRET", "mock_secret")
+@patch("app.services.notification_service.settings.GOSMS_BASE_URL", "http://gosms.test")
 def test_send_sms_mocked(mock_post):
     # Mock Token Response
     mock_response_token = MagicMock()
@@ -40,7 +41,7 @@ def test_send_sms_mocked(mock_post):
             assert result is True
             mock_post.assert_called_once()
             args, kwargs = mock_post.call_args
-            assert "api/v1/messages" in args[0]
+            assert args[0] == "http://gosms.test/api/v1/messages"
             assert kwargs['json']['message'] == "Test Message"
             assert kwargs['json']['recipients'] == ["+420123456789"]
 
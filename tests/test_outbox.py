@@ -0,0 +1,197 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from app.services.notification_service import NotificationDispatcher
+from app.services.outbox import Outbox, OutboxWorker
+from app.services.sms_client import GoSMSClient, SmsResult
+from fakes import FlakyTransport
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.db"), max_attempts=3, backoff_base_seconds=0)
+    yield box
+    box.close()
+
+
+def _dispatcher(sms_result=None):
+    dispatcher = MagicMock()
+    dispatcher.deliver_sms = AsyncMock(return_value=sms_result or SmsResult("+420777111222", True))
+    dispatcher.send_email = AsyncMock(return_value=True)
+    return dispatcher
+
+
+def test_dedup_key_enqueues_once(outbox):
+    assert outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"}, "booking:1:sms") is True
+    assert outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"}, "booking:1:sms") is False
+    assert outbox.stats()["pending"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_drains_batch(outbox):
+    outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"})
+    outbox.enqueue("email", {"subject": "Nová rezervace", "body": "Petr", "to_email": None})
+    dispatcher = _dispatcher()
+
+    assert await OutboxWorker(outbox, dispatcher).drain_once() == 2
+
+    dispatcher.deliver_sms.assert_awaited_once_with("+420777111222", "Ahoj")
+    dispatcher.send_email.assert_awaited_once_with("Nová rezervace", "Petr", None)
+    assert outbox.stats()["sent"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_retry_then_dead_letter(outbox):
+    outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"}, "k")
+    worker = OutboxWorker(outbox, _dispatcher(SmsResult("+420777111222", False, "GoSMS Error 503", retryable=True)))
+
+    for _ in range(3):
+        assert await worker.drain_once() == 1
+    assert await worker.drain_once() == 0
+
+    stats = outbox.stats()
+    assert stats["dead"] == 1
+    assert stats["dead_letters"] == 1
+    # A dead message still blocks its dedup key
+    assert outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"}, "k") is False
+
+
+def test_interrupted_messages_are_recovered(outbox, tmp_path):
+    outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"})
+    assert len(outbox.claim_batch(10)) == 1
+    outbox.close()
+
+    # "Restart": a new process finds the message still marked as sending
+    reopened = Outbox(str(tmp_path / "outbox.db"))
+    assert reopened.recover() == 1
+    assert len(reopened.claim_batch(10)) == 1
+    reopened.close()
+
+
+def test_dispatcher_queues_instead_of_sending(outbox):
+    dispatcher = NotificationDispatcher(sms_client=MagicMock(), outbox=outbox)
+    background_tasks = MagicMock()
+
+    with patch("app.services.notification_service.get_notification_config", return_value={"sms_enabled": True, "email_enabled": False}):
+        dispatcher.sms("+420777111222", "Ahoj", background_tasks, dedup_key="booking:1:sms")
+        dispatcher.email("Nová rezervace", "Petr", background_tasks, dedup_key="booking:1:email")
+
+    background_tasks.add_task.assert_not_called()
+    assert outbox.stats()["pending"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_sends_sms_batch_through_bulk_api(outbox):
+    for i in range(3):
+        outbox.enqueue("sms", {"to": f"+42077711122{i}", "message": "Připomínka"})
+    dispatcher = _dispatcher()
+    dispatcher.send_sms_bulk = AsyncMock(return_value=[
+        SmsResult("+420777111220", True), SmsResult("+420777111221", False, "invalid recipient"), SmsResult("+420777111222", True),
+    ])
+
+    assert await OutboxWorker(outbox, dispatcher).drain_once() == 3
+
+    dispatcher.deliver_sms.assert_not_awaited()
+    dispatcher.send_sms_bulk.assert_awaited_once()
+    stats = outbox.stats()
+    assert stats["sent"] == 2
+    assert stats["pending"] == 0
+    assert stats["dead"] == 1  # an invalid number stays invalid
+
+
+@pytest.mark.asyncio
+async def test_possibly_sent_sms_is_not_retried(outbox, fake_gosms):
+    client = GoSMSClient(
+        "client-id", "client-secret", "123",
+        base_url="http://gosms.test",
+        backoff_base_seconds=0,
+        transport=FlakyTransport(fake_gosms.app, [httpx.ReadTimeout("read timeout")]),
+    )
+    dispatcher = NotificationDispatcher(sms_client=client)
+    outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"})
+    worker = OutboxWorker(outbox, dispatcher)
+
+    with patch("app.services.notification_service.get_notification_config", return_value={"sms_enabled": True}):
+        assert await worker.drain_once() == 1
+        assert await worker.drain_once() == 0
+
+    # GoSMS got it before the timeout, a retry would send it twice
+    assert len(fake_gosms.messages) == 1
+    stats = outbox.stats()
+    assert stats["dead"] == 1 and stats["pending"] == 0
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_unavailable_provider_is_retried(outbox, fake_gosms):
+    client = GoSMSClient(
+        "client-id", "client-secret", "123",
+        base_url="http://gosms.test",
+        max_retries=0,
+        transport=httpx.ASGITransport(app=fake_gosms.app),
+    )
+    fake_gosms.fail_with = [503, 400]
+    dispatcher = NotificationDispatcher(sms_client=client)
+    outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"})
+    worker = OutboxWorker(outbox, dispatcher)
+
+    with patch("app.services.notification_service.get_notification_config", return_value={"sms_enabled": True}):
+        assert await worker.drain_once() == 1  # 503 -> retry
+        assert outbox.stats()["pending"] == 1
+        assert await worker.drain_once() == 1  # 400 -> rejected for good
+        assert await worker.drain_once() == 0
+
+    assert outbox.stats()["dead"] == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_writes_outbox_off_the_event_loop(outbox):
+    import threading
+
+    dispatcher = NotificationDispatcher(sms_client=MagicMock(), outbox=outbox)
+    loop_thread = threading.get_ident()
+    writers = []
+    insert = outbox._insert
+
+    def recording_insert(*args):
+        writers.append(threading.get_ident())
+        return insert(*args)
+
+    with patch("app.services.notification_service.get_notification_config", return_value={"sms_enabled": True}), \
+         patch.object(outbox, "_insert", recording_insert):
+        dispatcher.sms("+420777111222", "Ahoj", dedup_key="booking:1:sms")
+        await dispatcher.drain()
+
+    assert writers and loop_thread not in writers
+    assert outbox.stats()["pending"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_outbox_write_sends_directly(outbox):
+    dispatcher = NotificationDispatcher(sms_client=MagicMock(), outbox=outbox)
+    dispatcher.send_sms = AsyncMock(return_value=True)
+
+    with patch("app.services.notification_service.get_notification_config", return_value={"sms_enabled": True}), \
+         patch.object(outbox, "_insert", side_effect=RuntimeError("disk full")):
+        dispatcher.sms("+420777111222", "Ahoj")
+        await dispatcher.drain()
+
+    dispatcher.send_sms.assert_awaited_once_with("+420777111222", "Ahoj")
+
+
+def test_sent_messages_are_pruned(outbox):
+    for key in ("a", "b", "c"):
+        outbox.enqueue("sms", {"to": "+420777111222", "message": "Ahoj"}, key)
+    first, second, _ = outbox.claim_batch(10)
+    outbox.mark_sent(first.id)
+    outbox.mark_failed(second, "boom")
+
+    # Only sent rows older than the retention go, pending/failed ones stay
+    assert outbox.prune(3600) == 0
+    assert outbox.prune(3600, now=time.time() + 7200) == 1
+    stats = outbox.stats()
+    assert stats["sent"] == 0 and stats["pending"] == 1 and stats["sending"] == 1
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.config_models import CompanyConfig
+from app.services.outbox import Outbox
+from app.services.reminder_service import ReminderScheduler, TZ
+
+NOW = datetime(2030, 1, 7, 8, 0, tzinfo=TZ)
+
+
+def _config(**notifications):
+    registry = MagicMock()
+    registry.get.return_value = CompanyConfig.from_raw({
+        "company_name": "Test Shop",
+        "notifications": {"reminder_offsets_hours": [24, 2], "reminder_template": "{name}: {date} {time}", **notifications},
+    })
+    return registry
+
+
+def _booking(booking_id, start, phone="+420777111222"):
+    return {
+        "id": booking_id,
+        "start_time": start.isoformat(),
+        "service_type": "Střih",
+        "clients": {"full_name": "Petr", "phone_number": phone},
+    }
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.db"))
+    yield box
+    box.close()
+
+
+@pytest.mark.asyncio
+async def test_reminders_fire_in_due_order_once(outbox):
+    db = MagicMock()
+    db.get_bookings_between = AsyncMock(return_value=[
+        _booking(1, NOW + timedelta(hours=26)),
+        _booking(2, NOW + timedelta(hours=3)),
+    ])
+    scheduler = ReminderScheduler(db, outbox, _config(reminder_spread_seconds=0))
+
+    # Booking 1: 24h and 2h reminders; booking 2: only 2h (24h is long past)
+    assert await scheduler.refresh(now=NOW.timestamp()) == 3
+    assert scheduler.next_due() == (NOW + timedelta(hours=1)).timestamp()
+
+    assert await scheduler.fire_due(now=(NOW + timedelta(hours=2)).timestamp()) == 2
+    stats = outbox.stats()
+    assert stats["pending"] == 2
+
+    # A restart rebuilds the heap, already queued reminders are not queued again
+    await scheduler.refresh(now=NOW.timestamp())
+    assert await scheduler.fire_due(now=(NOW + timedelta(hours=2)).timestamp()) == 0
+    assert outbox.stats()["pending"] == 2
+
+
+@pytest.mark.asyncio
+async def test_due_reminders_are_queued_in_one_write_off_the_loop(outbox):
+    import threading
+    from unittest.mock import patch
+
+    db = MagicMock()
+    db.get_bookings_between = AsyncMock(return_value=[_booking(i, NOW + timedelta(hours=3), f"+42077711{i:04d}") for i in range(5)])
+    scheduler = ReminderScheduler(db, outbox, _config(reminder_spread_seconds=0))
+    await scheduler.refresh(now=NOW.timestamp())
+
+    loop_thread = threading.get_ident()
+    writes = []
+    insert_many = outbox._insert_many
+
+    def recording_insert_many(items):
+        writes.append((threading.get_ident(), len(items)))
+        return insert_many(items)
+
+    with patch.object(outbox, "_insert_many", recording_insert_many):
+        assert await scheduler.fire_due(now=(NOW + timedelta(hours=2)).timestamp()) == 5
+
+    assert len(writes) == 1 and writes[0][0] != loop_thread and writes[0][1] == 5
+    assert outbox.stats()["pending"] == 5
+
+
+@pytest.mark.asyncio
+async def test_reminders_are_spread_deterministically(outbox):
+    start = NOW + timedelta(hours=30)
+    db = MagicMock()
+    db.get_bookings_between = AsyncMock(return_value=[_booking(i, start, f"+42077711{i:04d}") for i in range(50)])
+    scheduler = ReminderScheduler(db, outbox, _config(reminder_offsets_hours=[24], reminder_spread_seconds=600))
+
+    await scheduler.refresh(now=NOW.timestamp())
+    due_times = sorted(entry[0] for entry in scheduler._heap)
+
+    base = (start - timedelta(hours=24)).timestamp()
+    assert all(base <= due < base + 600 for due in due_times)
+    assert len(set(due_times)) > 25
+
+    # Same schedule after a restart
+    first = sorted(scheduler._heap)
+    await scheduler.refresh(now=NOW.timestamp())
+    assert sorted(scheduler._heap) == first
+
+
+@pytest.mark.asyncio
+async def test_no_offsets_no_reminders(outbox):
+    db = MagicMock()
+    db.get_bookings_between = AsyncMock()
+    scheduler = ReminderScheduler(db, outbox, _config(reminder_offsets_hours=[]))
+
+    assert await scheduler.refresh(now=NOW.timestamp()) == 0
+    db.get_bookings_between.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_bookings_are_read_in_pages():
+    from unittest.mock import patch
+    from app.services.db_service import DBService
+
+    pages = [[{"id": 1}, {"id": 2}], [{"id": 3}, {"id": 4}], [{"id": 5}]]
+    query = MagicMock()
+    for method in ("select", "gte", "lt", "order", "range"):
+        getattr(query, method).return_value = query
+    query.execute = AsyncMock(side_effect=[MagicMock(data=page) for page in pages])
+    client = MagicMock()
+    client.table.return_value = query
+
+    with patch.object(DBService, "get_client", AsyncMock(return_value=client)):
+        rows = await DBService().get_bookings_between(NOW, NOW + timedelta(days=1), page_size=2)
+
+    assert [row["id"] for row in rows] == [1, 2, 3, 4, 5]
+    assert [c.args for c in query.range.call_args_list] == [(0, 1), (2, 3), (4, 5)]
+
+
+@pytest.mark.asyncio
+async def test_broken_reminder_does_not_stop_the_schedule(outbox):
+    db = MagicMock()
+    db.get_bookings_between = AsyncMock(return_value=[
+        _booking(1, NOW + timedelta(hours=3)),
+        _booking(2, NOW + timedelta(hours=4)),
+    ])
+    config = _config(reminder_spread_seconds=0)
+    templates = config.get.return_value.templates
+    render = templates.render
+
+    def failing_for_booking_1(key, variables):
+        if variables["time"] == (NOW + timedelta(hours=3)).strftime("%H:%M"):
+            raise ValueError("bad template")
+        return render(key, variables)
+
+    templates.render = failing_for_booking_1
+    scheduler = ReminderScheduler(db, outbox, config)
+
+    assert await scheduler.refresh(now=NOW.timestamp()) == 1
@@ -0,0 +1,200 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from app.services.notification_service import NotificationDispatcher
+from app.services.sms_client import GoSMSClient
+from fakes import FlakyTransport
+
+
+@pytest.mark.asyncio
+async def test_send_sms_reuses_token_and_pool(gosms_client, fake_gosms):
+    assert await gosms_client.send_sms("+420 777 111 222", "Ahoj") is True
+    assert await gosms_client.send_sms("+420777111333", "Ahoj") is True
+
+    assert fake_gosms.token_requests == 1
+    assert fake_gosms.messages[0] == {"message": "Ahoj", "recipients": ["+420777111222"], "channel": 123}
+    await gosms_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_retries_5xx_and_429(gosms_client, fake_gosms):
+    fake_gosms.fail_with = [503, 429]
+
+    assert await gosms_client.send_sms("+420777111222", "Ahoj") is True
+    assert fake_gosms.requests == 3
+    assert len(fake_gosms.messages) == 1
+    await gosms_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries(gosms_client, fake_gosms):
+    fake_gosms.fail_with = [500] * 10
+
+    assert await gosms_client.send_sms("+420777111222", "Ahoj") is False
+    assert fake_gosms.requests == gosms_client.max_retries + 1
+    await gosms_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(gosms_client, fake_gosms):
+    fake_gosms.fail_with = [400]
+
+    assert await gosms_client.send_sms("+420777111222", "Ahoj") is False
+    assert fake_gosms.requests == 1
+    await gosms_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(gosms_client, fake_gosms):
+    fake_gosms.latency = 0.02
+
+    results = await asyncio.gather(*[gosms_client.send_sms(f"+42077711122{i}", "Ahoj") for i in range(6)])
+
+    assert all(results)
+    assert fake_gosms.max_in_flight <= gosms_client.max_concurrency
+    await gosms_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sends_without_blocking(gosms_client, fake_gosms):
+    dispatcher = NotificationDispatcher(sms_client=gosms_client)
+    fake_gosms.latency = 0.05
+
+    with patch("app.services.notification_service.get_notification_config", return_value={"sms_enabled": True}):
+        dispatcher.sms("+420777111222", "Ahoj")
+        assert fake_gosms.messages == []  # only scheduled, nothing sent inline
+        await dispatcher.drain()
+
+    assert len(fake_gosms.messages) == 1
+    await dispatcher.aclose()
+
+
+def test_dispatcher_uses_background_tasks(gosms_client):
+    dispatcher = NotificationDispatcher(sms_client=gosms_client)
+    background_tasks = MagicMock()
+
+    dispatcher.sms("+420777111222", "Ahoj", background_tasks)
+
+    background_tasks.add_task.assert_called_once_with(dispatcher.send_sms, "+420777111222", "Ahoj")
+
+
+@pytest.mark.asyncio
+async def test_bulk_groups_identical_texts(gosms_client, fake_gosms):
+    gosms_client.max_recipients_per_request = 2
+    fake_gosms.invalid_numbers = {"+420777000003"}
+    messages = [
+        ("+420777000001", "Zítra v 10:00"),
+        ("+420 777 000 002", "Zítra v 10:00"),
+        ("+420777000003", "Zítra v 10:00"),
+        ("+420777000004", "Zítra v 14:00"),
+    ]
+
+    results = await gosms_client.send_bulk(messages)
+
+    # 3 identical texts -> 2 requests (2 + 1 recipients), 1 other text -> 1 request
+    assert fake_gosms.requests == 3
+    assert sorted(len(m["recipients"]) for m in fake_gosms.messages) == [1, 1, 2]
+    assert [r.to for r in results] == ["+420777000001", "+420777000002", "+420777000003", "+420777000004"]
+    assert [r.ok for r in results] == [True, True, False, True]
+    assert results[2].error == "invalid recipient"
+    await gosms_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_bulk_reports_failed_batches(gosms_client, fake_gosms):
+    gosms_client.max_retries = 0
+    fake_gosms.fail_with = [400]
+
+    results = await gosms_client.send_bulk([("+420777000001", "A"), ("+420777000002", "A")])
+
+    assert [r.ok for r in results] == [False, False]
+    assert "400" in results[0].error
+    await gosms_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_bulk_respects_rate_limit(fake_gosms):
+    import httpx
+    from app.services.sms_client import GoSMSClient
+
+    client = GoSMSClient(
+        "client-id", "client-secret", "123",
+        base_url="http://gosms.test",
+        requests_per_second=20,
+        max_recipients_per_request=1,
+        transport=httpx.ASGITransport(app=fake_gosms.app),
+    )
+
+    await client.send_bulk([(f"+42077700000{i}", "A") for i in range(4)])
+
+    gaps = [b - a for a, b in zip(fake_gosms.request_times, fake_gosms.request_times[1:])]
+    assert len(gaps) == 3
+    assert min(gaps) >= 0.04
+    await client.aclose()
+
+
+def _flaky_client(fake_gosms, errors) -> GoSMSClient:
+    return GoSMSClient(
+        "client-id", "client-secret", "123",
+        base_url="http://gosms.test",
+        backoff_base_seconds=0,
+        transport=FlakyTransport(fake_gosms.app, errors),
+    )
+
+
+@pytest.mark.asyncio
+async def test_send_is_not_retried_after_read_timeout(fake_gosms):
+    client = _flaky_client(fake_gosms, [httpx.ReadTimeout("read timeout")])
+
+    # GoSMS got the message, a retry would send it twice
+    result = await client.send_one("+420777111222", "Ahoj")
+    assert result.ok is False and result.retryable is False
+    assert result.error.startswith("outcome unknown")
+    assert len(fake_gosms.messages) == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_send_outcome_tells_retryable_from_final(gosms_client, fake_gosms):
+    gosms_client.max_retries = 0
+    fake_gosms.fail_with = [503, 400]
+
+    unavailable = await gosms_client.send_one("+420777111222", "Ahoj")
+    rejected = await gosms_client.send_one("+420777111222", "Ahoj")
+
+    assert (unavailable.ok, unavailable.retryable) == (False, True)
+    assert (rejected.ok, rejected.retryable) == (False, False)
+    await gosms_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_send_is_retried_when_not_connected(fake_gosms):
+    client = _flaky_client(fake_gosms, [httpx.ConnectError("refused")])
+
+    assert await client.send_sms("+420777111222", "Ahoj") is True
+    assert len(fake_gosms.messages) == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_shared_token_manager_refreshes_over_the_client_pool(fake_gosms):
+    from app.services.gosms_token import GoSMSTokenManager
+
+    def blocking_fetch():
+        raise AssertionError("async callers must not use the blocking fetch")
+
+    manager = GoSMSTokenManager(fetch_sync=blocking_fetch)
+    client = GoSMSClient(
+        "client-id", "client-secret", "123",
+        base_url="http://gosms.test",
+        transport=httpx.ASGITransport(app=fake_gosms.app),
+        token_manager=manager,
+    )
+
+    assert await client.send_sms("+420777111222", "Ahoj") is True
+    assert fake_gosms.token_requests == 1
+    assert manager.stats()["failures"] == 0
+    await client.aclose()
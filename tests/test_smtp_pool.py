@@ -0,0 +1,115 @@
+import smtplib
+import socket
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.smtp_pool import SMTPConnectionPool
+
+
+def _pool(**kwargs):
+    return SMTPConnectionPool("smtp.test", 587, "user", "pass", **kwargs)
+
+
+@patch("app.services.smtp_pool.smtplib.SMTP")
+def test_session_is_reused(mock_smtp_cls):
+    pool = _pool()
+
+    assert pool.send_many([("a@test", ["b@test"], "one"), ("a@test", ["c@test"], "two")]) == 2
+    assert pool.send("a@test", ["b@test"], "three") is True
+
+    mock_smtp_cls.assert_called_once()
+    server = mock_smtp_cls.return_value
+    server.starttls.assert_called_once()
+    server.login.assert_called_once_with("user", "pass")
+    assert server.sendmail.call_count == 3
+
+
+@patch("app.services.smtp_pool.smtplib.SMTP")
+def test_session_lost_mid_send_is_not_resent(mock_smtp_cls):
+    broken, fresh = MagicMock(), MagicMock()
+    broken.sendmail.side_effect = smtplib.SMTPServerDisconnected("gone")
+    mock_smtp_cls.side_effect = [broken, fresh]
+    pool = _pool()
+
+    assert pool.send_many([("a@test", ["b@test"], "one"), ("a@test", ["c@test"], "two")]) == 1
+    broken.sendmail.assert_called_once_with("a@test", ["b@test"], "one")
+    fresh.sendmail.assert_called_once_with("a@test", ["c@test"], "two")  # next message on a new session
+    assert pool.connects == 2
+
+
+@patch("app.services.smtp_pool.smtplib.SMTP")
+def test_timeout_mid_send_is_final(mock_smtp_cls):
+    server = mock_smtp_cls.return_value
+    server.sendmail.side_effect = TimeoutError("timed out")
+    pool = _pool()
+
+    assert pool.send("a@test", ["b@test"], "hello") is False
+    server.sendmail.assert_called_once()
+    assert pool.connects == 1
+
+
+@patch("app.services.smtp_pool.smtplib.SMTP")
+def test_stale_session_fails_health_check(mock_smtp_cls):
+    stale, fresh = MagicMock(), MagicMock()
+    stale.noop.return_value = (421, b"closing")
+    mock_smtp_cls.side_effect = [stale, fresh]
+    pool = _pool(health_check_after_seconds=0)
+
+    pool.send("a@test", ["b@test"], "one")
+    pool.send("a@test", ["b@test"], "two")
+
+    stale.noop.assert_called_once()
+    fresh.sendmail.assert_called_once_with("a@test", ["b@test"], "two")
+
+
+@patch("app.services.smtp_pool.smtplib.SMTP")
+def test_rejected_message_keeps_session(mock_smtp_cls):
+    server = mock_smtp_cls.return_value
+    server.sendmail.side_effect = [smtplib.SMTPRecipientsRefused({"x@test": (550, b"no")}), {}]
+    pool = _pool()
+
+    assert pool.send_many([("a@test", ["x@test"], "one"), ("a@test", ["b@test"], "two")]) == 1
+    mock_smtp_cls.assert_called_once()
+
+
+@patch("app.services.smtp_pool.smtplib.SMTP")
+def test_server_replies_are_not_retried(mock_smtp_cls):
+    server = mock_smtp_cls.return_value
+    server.sendmail.side_effect = [smtplib.SMTPResponseException(554, b"policy"), smtplib.SMTPSenderRefused(553, b"no", "a@test"), {}]
+    pool = _pool()
+
+    assert pool.send_many([("a@test", ["b@test"], "one"), ("a@test", ["b@test"], "two"), ("a@test", ["b@test"], "three")]) == 1
+    mock_smtp_cls.assert_called_once()
+    assert server.sendmail.call_count == 3
+
+
+def test_against_local_smtp_server():
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    from aiosmtpd.handlers import Sink
+
+    class Recorder(Sink):
+        def __init__(self):
+            self.envelopes = []
+
+        async def handle_DATA(self, server, session, envelope):
+            self.envelopes.append(envelope)
+            return "250 OK"
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    handler = Recorder()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        pool = SMTPConnectionPool("127.0.0.1", port, use_starttls=False)
+        assert pool.send_many([("a@test", ["b@test"], "Subject: 1\n\none"), ("a@test", ["c@test"], "Subject: 2\n\ntwo")]) == 2
+        assert pool.send("a@test", ["d@test"], "Subject: 3\n\nthree") is True
+        pool.close()
+    finally:
+        controller.stop()
+
+    assert [e.rcpt_tos for e in handler.envelopes] == [["b@test"], ["c@test"], ["d@test"]]
+    assert pool.connects == 1
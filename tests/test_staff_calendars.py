@@ -0,0 +1,170 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.config_models import CompanyConfig
+from app.services.availability import ResourceFreeBusyIndex, opening_windows
+from app.services.booking_service import BookingService, TZ
+from app.services.calendar_cache import PHONE_PROPERTY
+from app.services.calendar_service import CalendarService
+from fakes import FakeCalendarClient, FakeStaffCalendarService
+
+STAFF = [
+    {"id": "petr", "name": "Petr", "calendar_id": "petr@shop"},
+    {"id": "jana", "name": "Jana", "calendar_id": "jana@shop"},
+    {"id": "karel", "name": "Karel", "calendar_id": "karel@shop"},
+]
+
+
+def _next_monday(hour: int) -> datetime.datetime:
+    today = datetime.datetime.now(TZ).replace(hour=hour, minute=0, second=0, microsecond=0)
+    return today + datetime.timedelta(days=7 - today.weekday())
+
+
+@pytest.fixture
+def staff_backend():
+    return FakeStaffCalendarService([member["calendar_id"] for member in STAFF])
+
+
+@pytest.fixture
+def db():
+    mock_db = MagicMock()
+    mock_db.get_or_create_client = AsyncMock(return_value={"id": 1, "name": "Petr"})
+    mock_db.log_booking = AsyncMock(return_value=True)
+    mock_db.delete_booking = AsyncMock(return_value=True)
+    return mock_db
+
+
+@pytest.fixture
+def service(staff_backend, db):
+    registry = MagicMock()
+    registry.get.return_value = CompanyConfig.from_raw({
+        "business_hours": {"monday": {"start": "09:00", "end": "18:00"}},
+        "staff": STAFF,
+    })
+    # Default calendar is Petr's, the others are created by StaffCalendars (caches never synced)
+    calendar = CalendarService(FakeCalendarClient(staff_backend), "petr@shop")
+    return BookingService(db=db, calendar=calendar, config=registry, notifier=MagicMock())
+
+
+def test_resource_index_merges_staff():
+    start = _next_monday(9)
+    hour = datetime.timedelta(hours=1)
+    index = ResourceFreeBusyIndex({
+        "petr": [(start, start + 3 * hour)],
+        "jana": [(start + hour, start + 2 * hour)],
+    })
+    assert index.free_resources(start, start + hour) == ["jana"]
+    assert index.is_free(start + hour, start + 2 * hour) is False
+    windows = opening_windows({0: (9 * 60, 18 * 60)}, start, start + 3 * hour)
+    slots = index.find_free_slots(windows, hour, datetime.timedelta(minutes=30), limit=3)
+    # Jana is free at 09:00, Petr from 12:00 -> union, deduplicated and ordered
+    assert slots == [start, start + 2 * hour]
+
+
+def test_duplicate_staff_ids_fail_validation():
+    with pytest.raises(ValueError):
+        CompanyConfig.from_raw({"staff": [STAFF[0], STAFF[0]]})
+
+
+@pytest.mark.asyncio
+async def test_free_slots_over_all_staff_cost_one_round_trip(service, staff_backend):
+    start = _next_monday(9)
+    for member in STAFF:
+        staff_backend.calendar(member["calendar_id"]).add_event(start, start + datetime.timedelta(hours=2))
+    staff_backend.calendar("jana@shop").add_event(start + datetime.timedelta(hours=2), start + datetime.timedelta(hours=9))
+
+    slots = await service.find_free_slots(start, start + datetime.timedelta(hours=9), limit=2)
+
+    assert slots == [start + datetime.timedelta(hours=2), start + datetime.timedelta(hours=2, minutes=30)]
+    assert staff_backend.freebusy_calls == [["petr@shop", "jana@shop", "karel@shop"]]
+    assert staff_backend.calls("list") == 0
+
+
+@pytest.mark.asyncio
+async def test_fresh_caches_answer_without_google(service, staff_backend):
+    for calendar in service.staff_calendars().calendars.values():
+        calendar.cache.sync()
+    start = _next_monday(10)
+
+    result = await service.evaluate_availability(start.strftime("%Y-%m-%d"), "10:00")
+
+    assert result.is_available and result.staff == "Petr"
+    assert staff_backend.freebusy_calls == []
+
+
+@pytest.mark.asyncio
+async def test_unreadable_calendar_is_never_free(service, staff_backend):
+    del staff_backend.calendars["petr@shop"]
+    del staff_backend.calendars["karel@shop"]
+    start = _next_monday(10)
+
+    result = await service.evaluate_availability(start.strftime("%Y-%m-%d"), "10:00")
+
+    assert result.staff == "Jana"
+
+
+@pytest.mark.asyncio
+async def test_booking_goes_to_first_free_member(service, staff_backend, db):
+    start = _next_monday(10)
+    staff_backend.calendar("petr@shop").add_event(start, start + datetime.timedelta(hours=1))
+
+    msg = await service.book_appointment(start.strftime("%Y-%m-%d"), "10:00", "petr", "+420777111222")
+
+    assert "úspěšně vytvořena" in msg
+    assert len(staff_backend.freebusy_calls) == 1
+    assert [c[0] for c in staff_backend.calendar("jana@shop").calls if c[0] != "list"] == ["insert"]
+    assert staff_backend.calls("insert") == 1
+    gcal_id = db.log_booking.call_args.args[3]
+    assert gcal_id.startswith("jana@shop")
+
+    # Cancellation finds Jana's calendar from her cache, not the default one
+    await service.cancel_active_booking("+420777111222", {"id": 7, "gcal_event_id": gcal_id})
+    assert staff_backend.calendar("jana@shop").events_by_id[gcal_id]["status"] == "cancelled"
+    assert staff_backend.calls("delete") == 1
+
+
+@pytest.mark.asyncio
+async def test_booking_requested_member(service, staff_backend):
+    start = _next_monday(10)
+    staff_backend.calendar("karel@shop").add_event(start, start + datetime.timedelta(hours=1))
+    day = start.strftime("%Y-%m-%d")
+
+    busy = await service.book_appointment(day, "10:00", "petr", "+420777111222", staff="karel")
+    assert "je plno" in busy
+    assert staff_backend.calls("insert") == 0
+
+    await service.book_appointment(day, "10:00", "petr", "+420777111222", staff="Karel")
+    await service.book_appointment(day, "11:00", "petr", "+420777111222", staff="karel")
+    assert [c[0] for c in staff_backend.calendar("karel@shop").calls if c[0] == "insert"] == ["insert"]
+
+    unknown = await service.book_appointment(day, "12:00", "petr", "+420777111222", staff="Zdeněk")
+    assert "Zdeněk u nás nepracuje" in unknown
+    assert "Petr, Jana, Karel" in unknown
+
+
+@pytest.mark.asyncio
+async def test_phone_fallback_cancels_on_staff_calendar(service, staff_backend, db):
+    db.get_upcoming_booking_by_phone = AsyncMock(return_value=None)
+    start = _next_monday(10)
+    phone = {"extendedProperties": {"private": {PHONE_PROPERTY: "+420777111222"}}}
+    later = staff_backend.calendar("karel@shop").add_event(start + datetime.timedelta(days=1), start + datetime.timedelta(days=1, hours=1), **phone)
+    nearest = staff_backend.calendar("jana@shop").add_event(start, start + datetime.timedelta(hours=1), **phone)
+
+    msg = await service.cancel_booking("777 111 222")
+
+    assert "byla zrušena" in msg
+    assert staff_backend.calendar("jana@shop").events_by_id[nearest["id"]]["status"] == "cancelled"
+    assert staff_backend.calendar("karel@shop").events_by_id[later["id"]]["status"] == "confirmed"
+    assert "nemám žádnou rezervaci" in await service.cancel_booking("+420777999999")
+
+
+@pytest.mark.asyncio
+async def test_unknown_staff_has_no_free_slots(service, staff_backend):
+    start = _next_monday(9)
+
+    assert await service.find_free_slots(start, start + datetime.timedelta(hours=9), staff="Zdeněk") == []
+    answer = await service.get_free_slots(start.strftime("%Y-%m-%d"), staff="Zdeněk")
+    assert "Zdeněk u nás nepracuje" in answer
+    assert staff_backend.freebusy_calls == []
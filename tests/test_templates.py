@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.templates import BOOKING_VARIABLES, TemplateError, compile_template, get_locale
+from app.models.config_models import CompanyConfig
+
+START = datetime(2030, 1, 7, 10, 30)
+
+
+def test_compiled_template_renders_and_is_cached():
+    template = compile_template("Rezervace {name} na {date:>12} v {time}.", BOOKING_VARIABLES)
+
+    assert template.fields == {"name", "date", "time"}
+    assert template.render({"name": "Petr", "date": "07.01.2030", "time": "10:30"}) == "Rezervace Petr na   07.01.2030 v 10:30."
+    assert compile_template("Rezervace {name} na {date:>12} v {time}.", BOOKING_VARIABLES) is template
+
+
+@pytest.mark.parametrize("source", ["{unknown}", "{0}", "{name.upper}", "{name!r}", "{name", "{time:%H}", "{name:d}", "{name:{time}}"])
+def test_invalid_placeholders_are_rejected(source):
+    with pytest.raises(TemplateError):
+        compile_template(source, BOOKING_VARIABLES)
+
+
+def test_config_load_fails_on_bad_template():
+    with pytest.raises(ValidationError):
+        CompanyConfig.from_raw({"notifications": {"email_subject": "Nová rezervace: {jmeno}"}})
+
+
+def test_engine_renders_notifications_and_spoken_responses():
+    config = CompanyConfig.from_raw({
+        "company_name": "Test Shop",
+        "notifications": {"sms_template": "{company_name}: {service} {long_date} v {time}"},
+    })
+    templates = config.templates
+    variables = templates.booking_variables("Petr", "+420777111222", "Střih", START)
+
+    assert templates.render("sms", variables) == "Test Shop: Střih 7. ledna 2030 v 10:30"
+    assert templates.say("booking_confirmed", **variables) == (
+        "Vaše rezervace na jméno Petr na 7. ledna 2030 v 10:30 byla úspěšně vytvořena. Těšíme se na vás."
+    )
+    assert templates.say("closed", weekday=templates.locale.weekday(START)) == "V pondělí máme bohužel zavřeno."
+
+
+def test_czech_locale_formatting():
+    cs = get_locale("cs")
+
+    assert cs.long_date(START) == "7. ledna 2030"
+    assert cs.long_date(START, with_year=False) == "7. ledna"
+    assert cs.join_times([START, START.replace(hour=11), START.replace(hour=12)]) == "10:30, 11:30 nebo 12:30"
+    assert get_locale("xx") is cs
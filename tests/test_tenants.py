@@ -0,0 +1,189 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_booking_service
+from app.main import app
+from app.models.config_models import CompanyConfig
+from app.services.container import ServiceContainer
+from app.services.db_service import DBService, TenantDBService, db_service
+from app.services.notification_service import NotificationDispatcher
+from app.services.outbox import Outbox, OutboxWorker
+from app.services.tenants import TenantRegistry
+from benchmarks.backends import FakePostgREST
+
+
+def _write_tenant(directory, tenant_id: str, **tenant):
+    path = directory / f"{tenant_id}.json"
+    path.write_text(json.dumps({"company_name": tenant_id, "tenant": tenant}), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def default():
+    return ServiceContainer.create(calendar=MagicMock(), db=db_service, notifier=NotificationDispatcher(sms_client=MagicMock()))
+
+
+@pytest.fixture
+def tenants(tmp_path, default):
+    _write_tenant(tmp_path, "ostrava", assistant_ids=["asst-ostrava"], phone_numbers=["+420 555 000 111"], calendar_id="ostrava@shop", sms_channel_id="11")
+    _write_tenant(tmp_path, "brno", assistant_ids=["asst-brno"], calendar_id="brno@shop")
+    # Claims a number that already belongs to ostrava -> skipped
+    _write_tenant(tmp_path, "zlin", phone_numbers=["555000111"], calendar_id="zlin@shop")
+    registry = TenantRegistry(default, directory=str(tmp_path))
+    registry.load()
+    return registry
+
+
+def test_tenants_are_routed_and_isolated(tenants, default):
+    assert sorted(tenants.tenant_ids) == ["brno", "ostrava"]
+
+    ostrava, brno = tenants.get("ostrava"), tenants.get("brno")
+    assert tenants.resolve(assistant_id="asst-brno") is brno
+    assert tenants.resolve(phone_number="555 000 111") is ostrava
+    # The assistant wins over the number
+    assert tenants.resolve(assistant_id="asst-brno", phone_number="+420555000111") is brno
+    assert tenants.find(assistant_id="asst-unknown") is None
+    assert tenants.resolve(assistant_id="asst-unknown") is default
+
+    assert ostrava.booking.company.company_name == "ostrava"
+    assert ostrava.calendar.calendar_id == "ostrava@shop"
+    assert ostrava.calendar.client is not brno.calendar.client
+    assert ostrava.calendar.cache is not brno.calendar.cache
+    assert ostrava.db.tenant_id == "ostrava" and ostrava.db.base is db_service
+    # Shared GoSMS pool and outbox, own channel
+    assert ostrava.notifier.sms_client is default.notifier.sms_client
+    assert ostrava.notifier.sms_channel_id == "11"
+    assert tenants.dispatcher("ostrava") is ostrava.notifier
+
+
+def test_webhook_uses_the_tenant_of_the_assistant(tenants, default):
+    tenant_booking = tenants.get("brno").booking
+    tenant_booking.check_availability = AsyncMock(return_value="brno volno")
+    default_booking = MagicMock()
+    default_booking.check_availability = AsyncMock(return_value="default volno")
+
+    def call(assistant_id: str) -> str:
+        payload = {"message": {
+            "type": "tool-calls",
+            "call": {"id": "call-1", "assistantId": assistant_id},
+            "toolCalls": [{"id": "a", "function": {"name": "check_availability", "arguments": {"day": "2030-01-07", "time": "10:00"}}}],
+        }}
+        return client.post("/api/webhook", json=payload).json()["results"][0]["result"]
+
+    app.state.container = default
+    app.state.tenants = tenants
+    app.dependency_overrides[get_booking_service] = lambda: default_booking
+    try:
+        client = TestClient(app)
+        assert call("asst-brno") == "brno volno"
+        assert call("asst-unknown") == "default volno"
+    finally:
+        app.dependency_overrides.clear()
+        app.state.container = None
+        app.state.tenants = None
+
+
+@pytest.mark.asyncio
+async def test_db_scope_keeps_tenants_apart():
+    backend = FakePostgREST()
+    base = MagicMock()
+    base.get_client = AsyncMock(return_value=await backend.client())
+    ostrava, brno = TenantDBService(base, "ostrava"), TenantDBService(base, "brno")
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+
+    # The same caller is a separate client of each shop
+    a = await ostrava.get_or_create_client("+420777111222", "Petr")
+    b = await brno.get_or_create_client("+420777111222", "Petr Novák")
+    assert a["id"] != b["id"]
+    assert await ostrava.log_booking(a["id"], start, "strih", "evt-a")
+    assert await brno.log_booking(b["id"], start + timedelta(hours=1), "vousy", "evt-b")
+
+    assert (await ostrava.get_upcoming_booking_by_phone("+420777111222"))["gcal_event_id"] == "evt-a"
+    assert (await brno.get_upcoming_booking_by_phone("+420777111222"))["gcal_event_id"] == "evt-b"
+    rows = await brno.get_bookings_between(start - timedelta(hours=1), start + timedelta(hours=2))
+    assert [row["service_type"] for row in rows] == ["vousy"]
+    assert {row["tenant_id"] for row in backend.tables["bookings"]} == {"ostrava", "brno"}
+
+    # Another tenant's booking id cannot be deleted
+    other_id = backend.tables["bookings"][0]["id"]
+    await brno.delete_booking(other_id)
+    assert len(backend.tables["bookings"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_default_shop_does_not_see_tenant_rows(tenants, default):
+    backend = FakePostgREST()
+    client = await backend.client()
+    brno = tenants.get("brno").db
+    own_db = default.db
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    # The default container got its own view, the process-wide service is left alone
+    assert own_db is not db_service and own_db.tenant_id is None
+    assert default.booking.db is own_db
+
+    with patch.object(DBService, "get_client", AsyncMock(return_value=client)):
+        tenant_client = await brno.get_or_create_client("+420777111222", "Petr")
+        assert await brno.log_booking(tenant_client["id"], start, "strih", "evt-brno")
+
+        # The same caller of the default shop is a new client without bookings
+        assert await own_db.get_upcoming_booking_by_phone("+420777111222") is None
+        own = await own_db.get_or_create_client("+420777111222", "Petr")
+        assert own["id"] != tenant_client["id"]
+        # Reminders of the default shop skip the tenant's bookings
+        assert await own_db.get_bookings_between(start - timedelta(hours=1), start + timedelta(hours=1)) == []
+
+        assert await own_db.log_booking(own["id"], start, "vousy", "evt-default")
+        rows = await own_db.get_bookings_between(start - timedelta(hours=1), start + timedelta(hours=1))
+        assert [row["service_type"] for row in rows] == ["vousy"]
+        assert (await own_db.get_upcoming_booking_by_phone("+420777111222"))["gcal_event_id"] == "evt-default"
+        assert (await brno.get_upcoming_booking_by_phone("+420777111222"))["gcal_event_id"] == "evt-brno"
+
+        # The tenant's booking cannot be deleted through the default service
+        await own_db.delete_booking(backend.tables["bookings"][0]["id"])
+        assert len(backend.tables["bookings"]) == 2
+        # Anything else holding db_service still sees every shop's rows
+        assert len(await db_service.get_bookings_between(start - timedelta(hours=1), start + timedelta(hours=1))) == 2
+
+
+def test_assistant_request_uses_tenant_config(tenants, default):
+    def call(assistant_id: str) -> dict:
+        payload = {"message": {"type": "assistant-request", "call": {"id": "call-1", "assistantId": assistant_id}}}
+        return client.post("/api/webhook", json=payload).json()["assistant"]
+
+    app.state.container = default
+    app.state.tenants = tenants
+    try:
+        client = TestClient(app)
+        assert "brno" in call("asst-brno")["firstMessage"]
+        assert "brno" in call("asst-brno")["model"]["messages"][0]["content"]
+        assert "brno" not in call("asst-unknown")["firstMessage"]
+    finally:
+        app.state.container = None
+        app.state.tenants = None
+
+
+@pytest.mark.asyncio
+async def test_tenant_notifications_share_outbox_and_pool(tmp_path, gosms_client, fake_gosms):
+    outbox = Outbox(str(tmp_path / "outbox.db"), backoff_base_seconds=0)
+    default = NotificationDispatcher(sms_client=gosms_client, outbox=outbox)
+    config = MagicMock()
+    config.get.return_value = CompanyConfig.from_raw({"notifications": {"sms_enabled": True}})
+    tenant = default.for_tenant("ostrava", config, sms_channel_id="77")
+
+    tenant.sms("+420777111222", "Ahoj")
+    tenant.sms("+420777111333", "Ahoj")
+    await tenant.drain()  # outbox writes run off the event loop
+    worker = OutboxWorker(outbox, default, dispatchers={"ostrava": tenant}.get)
+    assert await worker.drain_once() == 2
+
+    # Delivered in one bulk request from the tenant's channel over the shared client
+    assert [m["channel"] for m in fake_gosms.messages] == [77]
+    assert outbox.stats()["sent"] == 2
+
+    await tenant.aclose()
+    assert gosms_client._http is not None
+    await default.aclose()
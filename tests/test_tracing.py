@@ -0,0 +1,100 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.tracing import MetricsStore, get_trace_id, metrics, set_trace_id, span
+from app.main import app
+from app.services.db_service import DBService
+
+client = TestClient(app)
+
+
+def test_span_records_duration_and_errors():
+    store = MetricsStore()
+    with span("google.events.list", store):
+        pass
+    with pytest.raises(RuntimeError):
+        with span("google.events.list", store):
+            raise RuntimeError("boom")
+    with span("gosms.send", store) as sp:
+        sp.error = True
+
+    stats = store.snapshot()
+    assert stats["google.events.list"]["count"] == 2
+    assert stats["google.events.list"]["errors"] == 1
+    assert stats["gosms.send"]["errors"] == 1
+
+
+def test_quantiles_and_prometheus_format():
+    store = MetricsStore(buckets=(0.01, 0.1, 1.0))
+    for _ in range(98):
+        store.observe("supabase.clients.select", 0.005)
+    store.observe("supabase.clients.select", 0.5)
+    store.observe("supabase.clients.select", 3.0)
+
+    stats = store.snapshot()["supabase.clients.select"]
+    assert stats["p50_ms"] <= 10
+    assert 100 <= stats["p99_ms"] <= 1000
+
+    text = store.render_prometheus()
+    assert '# TYPE app_span_duration_seconds histogram' in text
+    assert 'app_span_duration_seconds_bucket{span="supabase.clients.select",le="0.01"} 98' in text
+    assert 'app_span_duration_seconds_bucket{span="supabase.clients.select",le="1"} 99' in text
+    assert 'app_span_duration_seconds_bucket{span="supabase.clients.select",le="+Inf"} 100' in text
+    assert 'app_span_duration_seconds_count{span="supabase.clients.select"} 100' in text
+
+
+@pytest.mark.asyncio
+async def test_trace_id_reaches_worker_threads():
+    set_trace_id("call-123")
+    seen = await asyncio.to_thread(get_trace_id)
+    assert seen == "call-123"
+
+
+@pytest.mark.asyncio
+async def test_db_queries_are_traced():
+    metrics.reset()
+    query = MagicMock()
+    query.execute = AsyncMock(return_value=MagicMock(data=[{"id": 1, "full_name": "Jana"}]))
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value.limit.return_value = query
+
+    db = DBService()
+    with patch.object(db, "get_client", AsyncMock(return_value=supabase)):
+        assert await db._fetch_client("+420777111222") == {"id": 1, "full_name": "Jana"}
+
+    assert metrics.snapshot()["supabase.clients.select"]["count"] == 1
+
+
+def test_webhook_sets_trace_id_and_metrics_endpoint():
+    metrics.reset()
+    seen = []
+
+    async def check(self, day, time=None, staff=None):
+        seen.append(get_trace_id())
+        return "ok"
+
+    payload = {"message": {
+        "type": "tool-calls",
+        "call": {"id": "vapi-call-42"},
+        "toolCalls": [
+            {"id": "a", "function": {"name": "check_availability", "arguments": {"day": "2030-01-01", "time": "10:00"}}},
+            {"id": "b", "function": {"name": "drop_tables", "arguments": {}}},
+        ],
+    }}
+    with patch("app.services.booking_service.BookingService.check_availability", check):
+        response = client.post("/api/webhook", json=payload)
+
+    assert response.status_code == 200
+    assert seen == ["vapi-call-42"]
+
+    text = client.get("/metrics").text
+    assert 'app_span_duration_seconds_count{span="webhook.tool_calls"} 1' in text
+    assert 'app_span_duration_seconds_count{span="tool.check_availability"} 1' in text
+    assert 'span="tool.unknown"' in text
+    assert "drop_tables" not in text
+
+    stats = client.get("/metrics", params={"format": "json"}).json()
+    assert stats["tool.check_availability"]["count"] == 1
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import BackgroundTasks
+
+from fastapi.testclient import TestClient
+
+from app.api.webhook import HOLD_MESSAGE, _RequestTasks, _with_deadline
+from app.main import app
+
+client = TestClient(app)
+
+
+def _tool_call(call_id: str, day: str, time_: str = "10:00") -> dict:
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": "check_availability", "arguments": {"day": day, "time": time_}},
+    }
+
+
+async def _slow_check(self, day, time=None, staff=None):
+    await asyncio.sleep(0.3 if day == "slow" else 0.1)
+    return f"checked {day}"
+
+
+def test_tool_calls_run_concurrently_and_keep_order():
+    payload = {"message": {"type": "tool-calls", "toolCalls": [
+        _tool_call("a", "slow"), _tool_call("b", "fast"), _tool_call("c", "fast")
+    ]}}
+
+    with patch("app.services.booking_service.BookingService.check_availability", _slow_check):
+        started = time.perf_counter()
+        response = client.post("/api/webhook", json=payload)
+        elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["toolCallId"] for r in results] == ["a", "b", "c"]
+    assert [r["result"] for r in results] == ["checked slow", "checked fast", "checked fast"]
+    assert elapsed < 0.5  # sequential would be 0.5s+
+
+
+def test_slow_tool_call_returns_hold_message():
+    payload = {"message": {"type": "tool-calls", "toolCalls": [
+        _tool_call("a", "slow"), _tool_call("b", "fast")
+    ]}}
+
+    with patch("app.services.booking_service.BookingService.check_availability", _slow_check), \
+         patch("app.api.webhook.settings.TOOL_CALL_TIMEOUT_SECONDS", 0.2):
+        response = client.post("/api/webhook", json=payload)
+
+    results = response.json()["results"]
+    assert results[0] == {"toolCallId": "a", "result": HOLD_MESSAGE}
+    assert results[1] == {"toolCallId": "b", "result": "checked fast"}
+
+
+def test_concurrency_limit():
+    running = 0
+    peak = 0
+
+    async def counting_check(self, day, time=None, staff=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return "ok"
+
+    payload = {"message": {"type": "tool-calls", "toolCalls": [_tool_call(str(i), "d") for i in range(5)]}}
+    with patch("app.services.booking_service.BookingService.check_availability", counting_check), \
+         patch("app.api.webhook.settings.TOOL_CALL_CONCURRENCY", 2):
+        response = client.post("/api/webhook", json=payload)
+
+    assert len(response.json()["results"]) == 5
+    assert peak == 2
+
+
+def test_write_tool_calls_run_in_order():
+    events = []
+
+    async def cancel(self, phone, background_tasks=None):
+        events.append("cancel start")
+        await asyncio.sleep(0.1)
+        events.append("cancel end")
+        return "zrušeno"
+
+    async def book(self, day, time, name, phone="", service="general", background_tasks=None, staff=None):
+        events.append("book start")
+        return "rezervováno"
+
+    payload = {"message": {"type": "tool-calls", "toolCalls": [
+        {"id": "a", "function": {"name": "cancel_booking", "arguments": {"phone": "+420777111222"}}},
+        {"id": "b", "function": {"name": "book_appointment", "arguments": {"day": "d", "time": "10:00", "phone": "+420777111222"}}},
+        _tool_call("c", "fast"),
+    ]}}
+    with patch("app.services.booking_service.BookingService.cancel_booking", cancel), \
+         patch("app.services.booking_service.BookingService.book_appointment", book), \
+         patch("app.services.booking_service.BookingService.check_availability", _slow_check):
+        response = client.post("/api/webhook", json=payload)
+
+    assert [r["result"] for r in response.json()["results"]] == ["zrušeno", "rezervováno", "checked fast"]
+    assert events == ["cancel start", "cancel end", "book start"]
+
+
+@pytest.mark.asyncio
+async def test_late_tool_call_still_runs_its_background_tasks():
+    sent = []
+    background_tasks = BackgroundTasks()
+    request_tasks = _RequestTasks(background_tasks)
+
+    async def notify(text):
+        sent.append(text)
+
+    async def slow_book():
+        await asyncio.sleep(0.2)
+        # The response is gone by now, BackgroundTasks would never run this
+        request_tasks.add_task(notify, "potvrzení")
+        return "rezervováno"
+
+    with patch("app.api.webhook.settings.TOOL_CALL_TIMEOUT_SECONDS", 0.05):
+        assert await _with_deadline(asyncio.ensure_future(slow_book()), "book_appointment", request_tasks) == HOLD_MESSAGE
+    await asyncio.sleep(0.3)
+
+    assert sent == ["potvrzení"]
+    assert background_tasks.tasks == []